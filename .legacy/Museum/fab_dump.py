@@ -4,17 +4,28 @@ import lzma
 import sys
 from collections import Counter
 
-def process(json_in, mode="--count"):
-    if json_in.endswith(".xz"):
-        with lzma.open(json_in, "rt") as f:
-            data = json.load(f)
-    else:
-        with open(json_in, "r") as f:
-            data = json.load(f)
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def iter_records(json_in):
+    """Records of the top-level JSON array, parsed incrementally with ijson when available"""
+    opener = lzma.open if json_in.endswith(".xz") else open
+    if ijson is not None:
+        with opener(json_in, "rb") as f:
+            yield from ijson.items(f, "item")
+        return
+    print("ijson not installed, loading the whole dump (pip install ijson to stream it)")
+    with opener(json_in, "rt") as f:
+        yield from json.load(f)
 
+
+def process(json_in, mode="--count"):
     counter = Counter()
     total = 0
-    for rec in data:
+    for rec in iter_records(json_in):
         creators = rec.get("objectWork", {}).get("creatorDescription", None)
         total += 1
         if isinstance(creators, str):
@@ -1,6 +1,12 @@
 #!/usr/bin/env python3
 import os, sys, json, asyncio, aiohttp, aiofiles, unicodedata, uuid, shutil, csv
-from typing import Any, Dict, List, Union, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Union, Optional
+import pandas as pd
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 # -------------------- Config --------------------
 BASE = "https://acervoonline.mp.usp.br/wp-json/tainacan/v2/items/"
@@ -17,9 +23,15 @@ TOTAL_PAGES = 312
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 OUT_DIR = os.path.join(SCRIPT_DIR, "pages")
-COMBINED_FILTERED = os.path.join(SCRIPT_DIR, "all_items_filtered.json")
+COMBINED_FILTERED = os.path.join(SCRIPT_DIR, "all_items_filtered.jsonl")
+# Single JSON array written by earlier versions of this script
+COMBINED_FILTERED_LEGACY = os.path.join(SCRIPT_DIR, "all_items_filtered.json")
 OUTPUT_SQL = os.path.join(SCRIPT_DIR, "B_Ipiranga.sql")
 OUTPUT_CSV = os.path.join(SCRIPT_DIR, "Ipiranga.csv")
+OUTPUT_TSV = os.path.join(SCRIPT_DIR, "B_Ipiranga.tsv")
+
+sys.path.append(os.path.dirname(SCRIPT_DIR))
+from bulk_load import write_insert_statements, write_bulk_insert
 
 CONCURRENCY = 10
 TIMEOUT = 60
@@ -246,31 +258,72 @@ async def fetch_page(session: aiohttp.ClientSession, p: int, sem: asyncio.Semaph
         raise RuntimeError(f"Failed to download page {p}")
 
 
-async def download_all_pages_and_filter() -> List[Dict[str, Any]]:
+async def download_all_pages_and_filter() -> int:
+    """
+    Download the pages concurrently and process each one as it completes: normalize, prune and
+    append its items to COMBINED_FILTERED (JSONL). Pages that arrive early wait in a small buffer
+    so the file keeps page order. Returns the number of items written.
+    """
     sem = asyncio.Semaphore(CONCURRENCY)
+    tmp_path = f"{COMBINED_FILTERED}.tmp"
+    buffered: Dict[int, List[Dict[str, Any]]] = {}
+    next_page = 1
+    written = 0
+
     async with aiohttp.ClientSession(
         headers={"User-Agent": "dataset-fetch/1.0"}
-    ) as session:
-        tasks = [fetch_page(session, p, sem) for p in range(1, TOTAL_PAGES + 1)]
-        results = await asyncio.gather(*tasks)
-    all_items: List[Dict[str, Any]] = []
-    for data in results:
-        all_items.extend(normalize_items(data))
-
-    filtered: List[Dict[str, Any]] = []
-    for it in all_items:
-        pit = prune_struct(it)
-        if pit is not _SENTINEL:
-            filtered.append(pit)
-    await write_json(COMBINED_FILTERED, filtered)
-    return filtered
+    ) as session, aiofiles.open(tmp_path, "w", encoding="utf-8") as out:
+
+        async def fetch_numbered(p: int):
+            return p, await fetch_page(session, p, sem)
+
+        tasks = [fetch_numbered(p) for p in range(1, TOTAL_PAGES + 1)]
+        for done, task in enumerate(asyncio.as_completed(tasks), 1):
+            p, data = await task
+            filtered: List[Dict[str, Any]] = []
+            for it in normalize_items(data):
+                pit = prune_struct(it)
+                if pit is not _SENTINEL:
+                    filtered.append(pit)
+            buffered[p] = filtered
+
+            while next_page in buffered:
+                items = buffered.pop(next_page)
+                if items:
+                    await out.write(
+                        "".join(json.dumps(it, ensure_ascii=False) + "\n" for it in items)
+                    )
+                written += len(items)
+                next_page += 1
+            if done % 25 == 0 or done == TOTAL_PAGES:
+                print(f"Processed {done}/{TOTAL_PAGES} pages, {written} items written")
+
+    os.replace(tmp_path, COMBINED_FILTERED)
+    return written
 
 
 # -------------------- Persistence helpers --------------------
-async def write_json(path: str, data: Any):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    async with aiofiles.open(path, "w", encoding="utf-8") as f:
-        await f.write(json.dumps(data, ensure_ascii=False))
+def read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """Items of a JSONL file, one at a time"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_json_items(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Items of a JSON array file (COMBINED_FILTERED_LEGACY). Parsed incrementally with ijson when
+    it is installed; otherwise the whole file is loaded.
+    """
+    if ijson is not None:
+        # Same shape as normalize_items: non-dict elements are wrapped as {"value": ...}
+        with open(path, "rb") as f:
+            for it in ijson.items(f, "item", use_float=True):
+                yield it if isinstance(it, dict) else {"value": it}
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        yield from normalize_items(json.load(f))
 
 
 # -------------------- Scalar coercion --------------------
@@ -359,16 +412,7 @@ def extract_flat_row(item: Dict[str, Any]) -> Dict[str, Optional[str]]:
     return row
 
 
-def escape_sql_string(value):
-    """Escape single quotes and backslashes for SQL INSERT statements"""
-    if value is None or value == "":
-        return "NULL"
-    value = str(value)
-    value = value.replace("\\", "\\\\").replace("'", "''")
-    return f"'{value}'"
-
-
-def generate_sql_inserts(raw_items: List[Dict[str, Any]]):
+def generate_sql_inserts(raw_items: Iterable[Dict[str, Any]]):
     """Generate SQL INSERT statements directly from filtered items"""
     print("Generating SQL INSERT statements for Ipiranga...")
 
@@ -397,61 +441,50 @@ def generate_sql_inserts(raw_items: List[Dict[str, Any]]):
         print("No items to export!")
         return
 
+    # Columns matching the SQL schema; empty strings are stored as NULL
+    cols = [
+        "id",
+        "external_id",
+        "image_file",
+        "inventory_code",
+        "title",
+        "description",
+        "type",
+        "artist_name",
+        "location",
+        "date",
+        "period",
+        "technique",
+        "height",
+        "width",
+        "color",
+        "history",
+        "collection_alt_name",
+        "description_generated",
+    ]
+    df = pd.DataFrame(filtered_rows, columns=cols, dtype=object)
+    df = df.mask(df == "", None)
+    df["description_generated"] = None
+
     with open(OUTPUT_SQL, "w", encoding="utf-8") as f:
         # Write table creation statement matching your schema
         f.write("-- Ipiranga Dataset SQL Import\n")
         f.write("-- Generated automatically from download_and_filter.py\n")
-        f.write(f"-- Total records: {len(filtered_rows)}\n\n")
+        f.write(f"-- Total records: {len(df)}\n\n")
 
         # Write INSERT statements in batches
-        batch_size = 100
-        total_rows = len(filtered_rows)
+        total_statements = write_insert_statements(f, df, "Ipiranga", cols, batch_size=100)
 
-        for i in range(0, total_rows, batch_size):
-            batch = filtered_rows[i : i + batch_size]
+    print(f"SQL file generated: {OUTPUT_SQL}")
+    print(f"Total INSERT statements: {total_statements} batches")
+    print(f"Total records: {len(df)}")
+
+    # Same rows for LOAD DATA LOCAL INFILE
+    load_sql = write_bulk_insert(df, "Ipiranga", cols, OUTPUT_TSV)
+    print(f"Bulk load files generated: {OUTPUT_TSV}, {load_sql}")
 
-            f.write(
-                "INSERT INTO Ipiranga (id, external_id, image_file, inventory_code, title, description, type, artist_name, location, date, period, technique, height, width, color, history, collection_alt_name, description_generated) VALUES\n"
-            )
 
-            values = []
-            for row_dict in batch:
-                # Map fields to match schema
-                id_val = escape_sql_string(row_dict.get("id"))
-                external_id = escape_sql_string(row_dict.get("external_id"))
-                image_file = escape_sql_string(row_dict.get("image_file"))
-                inventory_code = escape_sql_string(row_dict.get("inventory_code"))
-                title = escape_sql_string(row_dict.get("title"))
-                description = escape_sql_string(row_dict.get("description"))
-                type_val = escape_sql_string(row_dict.get("type"))
-                artist_name = escape_sql_string(row_dict.get("artist_name"))
-                location = escape_sql_string(row_dict.get("location"))
-                date_val = escape_sql_string(row_dict.get("date"))
-                period = escape_sql_string(row_dict.get("period"))
-                technique = escape_sql_string(row_dict.get("technique"))
-                height = escape_sql_string(row_dict.get("height"))
-                width = escape_sql_string(row_dict.get("width"))
-                color = escape_sql_string(row_dict.get("color"))
-                history = escape_sql_string(row_dict.get("history"))
-                collection_alt_name = escape_sql_string(
-                    row_dict.get("collection_alt_name")
-                )
-                description_generated = "NULL"
-
-                values.append(
-                    f"    ({id_val}, {external_id}, {image_file}, {inventory_code}, {title}, {description}, {type_val}, {artist_name}, {location}, {date_val}, {period}, {technique}, {height}, {width}, {color}, {history}, {collection_alt_name}, {description_generated})"
-                )
-            f.write(",\n".join(values))
-            f.write(";\n\n")
-
-        print(f"SQL file generated: {OUTPUT_SQL}")
-        print(
-            f"Total INSERT statements: {(total_rows + batch_size - 1) // batch_size} batches"
-        )
-        print(f"Total records: {total_rows}")
-
-
-def generate_csv(raw_items: List[Dict[str, Any]]):
+def generate_csv(raw_items: Iterable[Dict[str, Any]]):
     """Generate CSV file from filtered items with all columns matching SQL schema"""
     print("Generating CSV file for Ipiranga...")
 
@@ -511,26 +544,26 @@ def generate_csv(raw_items: List[Dict[str, Any]]):
 
 
 async def main():
-    # 1) If COMBINED_FILTERED exists, skip downloading; otherwise download all pages and filter them.
+    # 1) If the filtered items exist, skip downloading; otherwise stream all pages into COMBINED_FILTERED.
     if os.path.exists(COMBINED_FILTERED):
         print(f"{COMBINED_FILTERED} already exists — skipping download.")
-        async with aiofiles.open(COMBINED_FILTERED, "r", encoding="utf-8") as f:
-            all_items = json.loads(await f.read())
-        if not isinstance(all_items, list):
-            all_items = normalize_items(all_items)
+        read_items = lambda: read_jsonl(COMBINED_FILTERED)
+    elif os.path.exists(COMBINED_FILTERED_LEGACY):
+        print(f"{COMBINED_FILTERED_LEGACY} already exists — skipping download.")
+        read_items = lambda: read_json_items(COMBINED_FILTERED_LEGACY)
     else:
         print("Downloading pages…")
-        all_items = await download_all_pages_and_filter()
-        await write_json(COMBINED_FILTERED, all_items)
-        print(f"Combined saved to {COMBINED_FILTERED} with {len(all_items)} items")
+        total = await download_all_pages_and_filter()
+        print(f"Combined saved to {COMBINED_FILTERED} with {total} items")
+        read_items = lambda: read_jsonl(COMBINED_FILTERED)
 
     # 2) Generate SQL INSERT statements directly (with filtering)
     print("Generating SQL INSERT file with filtering...")
-    generate_sql_inserts(all_items)
+    generate_sql_inserts(read_items())
 
     # 3) Generate CSV file (with same filtering)
     print("Generating CSV file with filtering...")
-    generate_csv(all_items)
+    generate_csv(read_items())
 
     # 4) Clean up: delete the pages folder if it exists
     if os.path.exists(OUT_DIR):
@@ -4,6 +4,7 @@ import zipfile
 import pandas as pd
 import shutil
 import uuid
+import sys
 
 # --- Constants ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -17,6 +18,11 @@ IMG_DIR_NEW = os.path.join(SCRIPT_DIR, "Images")
 EXPORT_DIR = os.path.join(SCRIPT_DIR, "semart_info")
 OUTPUT_SQL = os.path.join(SCRIPT_DIR, "B_SemArt.sql")
 OUTPUT_CSV = os.path.join(SCRIPT_DIR, "SemArt.csv")
+OUTPUT_TSV = os.path.join(SCRIPT_DIR, "B_SemArt.tsv")
+
+sys.path.append(os.path.dirname(SCRIPT_DIR))
+from bulk_load import write_insert_statements, write_bulk_insert
+from parallel_fs import scan_files, find_duplicate_files, remove_files, move_files
 
 
 # --- Download and extract dataset ---
@@ -118,35 +124,50 @@ def create_semart_subsets():
 
 
 def clean_unused_images(used_files):
-    for img_name in os.listdir(IMG_DIR_OLD):
-        if img_name not in used_files:
-            try:
-                os.remove(os.path.join(IMG_DIR_OLD, img_name))
-            except Exception as e:
-                print(f"Error deleting {img_name}: {e}")
-    print("Unused images removed.")
+    files = scan_files(IMG_DIR_OLD)
+    unused = [os.path.join(IMG_DIR_OLD, name) for name in files if "/" not in name and name not in used_files]
+    removed = remove_files(unused, "Removing unused images")
+    print(f"Unused images removed: {removed}.")
 
 
 def move_images_and_cleanup():
     os.makedirs(IMG_DIR_NEW, exist_ok=True)
 
-    for img_name in os.listdir(IMG_DIR_OLD):
-        src = os.path.join(IMG_DIR_OLD, img_name)
-        dst = os.path.join(IMG_DIR_NEW, img_name)
-        if os.path.isfile(src):
-            shutil.move(src, dst)
+    files = scan_files(IMG_DIR_OLD)
+    move_files(
+        [(os.path.join(IMG_DIR_OLD, name), os.path.join(IMG_DIR_NEW, name)) for name in files if "/" not in name],
+        "Moving images",
+    )
 
     shutil.rmtree(SEM_ART_DIR)
     print("Images moved to root Images/ folder. SemArt/ folder removed.")
 
 
-def escape_sql_string(value):
-    """Escape single quotes and backslashes for SQL INSERT statements"""
-    if pd.isna(value) or value is None:
-        return "NULL"
-    value = str(value)
-    value = value.replace("\\", "\\\\").replace("'", "''")
-    return f"'{value}'"
+def remove_duplicate_images():
+    """
+    Drop SemArt15000 rows whose image has the same content as an earlier row's image, and delete
+    those files unless SemArt500 / SemArt2000 use them (the benchmark subsets stay as sampled)
+    """
+    path_15000 = os.path.join(EXPORT_DIR, "SemArt15000.csv")
+    df = pd.read_csv(path_15000)
+    files = scan_files(IMG_DIR_NEW)
+
+    paths = df["IMAGE_FILE"].map(lambda f: os.path.join(IMG_DIR_NEW, f))
+    duplicates = set(
+        find_duplicate_files(
+            paths, sizes={os.path.join(IMG_DIR_NEW, name): size for name, size in files.items()}
+        )
+    )
+    df[~paths.isin(duplicates)].to_csv(path_15000, index=False)
+
+    subset_files = set()
+    for subset in ["SemArt500.csv", "SemArt2000.csv"]:
+        subset_files |= set(pd.read_csv(os.path.join(EXPORT_DIR, subset))["IMAGE_FILE"])
+    removed = remove_files(
+        [path for path in duplicates if os.path.basename(path) not in subset_files],
+        "Removing duplicate images",
+    )
+    print(f"Duplicate images: {len(duplicates)} rows dropped from SemArt15000, {removed} files removed.")
 
 
 def generate_sql_inserts():
@@ -202,43 +223,15 @@ def generate_sql_inserts():
         f.write(f"-- Total records: {len(df)}\n\n")
 
         # Write INSERT statements in batches
-        batch_size = 100
-        total_rows = len(df)
-
-        for i in range(0, total_rows, batch_size):
-            batch = df.iloc[i : i + batch_size]
-
-            f.write(
-                "INSERT INTO SemArt (id, image_file, description, artist_name, title, technique, date, type, art_school, description_generated) VALUES\n"
-            )
-
-            values = []
-            for _, row in batch.iterrows():
-                id_val = escape_sql_string(row.get("id"))
-                image_file = escape_sql_string(row.get("image_file"))
-                description = escape_sql_string(row.get("description", ""))
-                artist_name = escape_sql_string(row.get("artist_name", ""))
-                title = escape_sql_string(row.get("title", ""))
-                technique = escape_sql_string(row.get("technique", ""))
-                date = escape_sql_string(row.get("date", ""))
-                type_val = escape_sql_string(row.get("type", ""))
-                art_school = escape_sql_string(row.get("art_school", ""))
-                description_generated = escape_sql_string(
-                    row.get("description_generated", "")
-                )
-
-                values.append(
-                    f"    ({id_val}, {image_file}, {description}, {artist_name}, {title}, {technique}, {date}, {type_val}, {art_school}, {description_generated})"
-                )
-
-            f.write(",\n".join(values))
-            f.write(";\n\n")
-
-        print(f"SQL file generated: {OUTPUT_SQL}")
-        print(
-            f"Total INSERT statements: {(total_rows + batch_size - 1) // batch_size} batches"
-        )
-        print(f"Total records: {total_rows}")
+        total_statements = write_insert_statements(f, df, "SemArt", cols, batch_size=100)
+
+    print(f"SQL file generated: {OUTPUT_SQL}")
+    print(f"Total INSERT statements: {total_statements} batches")
+    print(f"Total records: {len(df)}")
+
+    # Same rows for LOAD DATA LOCAL INFILE
+    load_sql = write_bulk_insert(df, "SemArt", cols, OUTPUT_TSV)
+    print(f"Bulk load files generated: {OUTPUT_TSV}, {load_sql}")
 
 
 # --- Main Execution ---
@@ -250,4 +243,5 @@ if __name__ == "__main__":
     all_used_images = create_semart_subsets()
     clean_unused_images(all_used_images)
     move_images_and_cleanup()
+    remove_duplicate_images()
     generate_sql_inserts()
@@ -3,11 +3,17 @@ import pandas as pd
 import kagglehub
 import shutil
 import uuid
+import sys
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PATH_DATASET = os.path.join(SCRIPT_DIR, "Images")
 INPUT_CSV = os.path.join(SCRIPT_DIR, "WikiArt.csv")
 OUTPUT_SQL = os.path.join(SCRIPT_DIR, "B_WikiArt.sql")
+OUTPUT_TSV = os.path.join(SCRIPT_DIR, "B_WikiArt.tsv")
+
+sys.path.append(os.path.dirname(SCRIPT_DIR))
+from bulk_load import write_insert_statements, write_bulk_insert
+from parallel_fs import scan_files, find_duplicate_files, remove_files, run_parallel
 
 WIKIART_RENAME = {
     "id": "id",
@@ -56,12 +62,13 @@ def download_and_unzip():
 
 
 def remove_unwanted_files():
-    for item in os.listdir(PATH_DATASET):
-        item_path = os.path.join(PATH_DATASET, item)
-
-        if os.path.isdir(item_path) and item not in genres_selected:
-            print(f"Deleting unwanted genre folder: {item_path}")
-            shutil.rmtree(item_path)
+    with os.scandir(PATH_DATASET) as entries:
+        unwanted = [
+            entry.path for entry in entries if entry.is_dir() and entry.name not in genres_selected
+        ]
+    for item_path in unwanted:
+        print(f"Deleting unwanted genre folder: {item_path}")
+    run_parallel(shutil.rmtree, unwanted, "Deleting unwanted genre folders")
 
     os.remove(os.path.join(PATH_DATASET, "wclasses.csv"))
     shutil.move(
@@ -75,21 +82,26 @@ def filter_dataset():
 
     df1 = df1[df1["filename"].apply(lambda f: any(g in f for g in genres_selected))]
 
-    df1["file_exists"] = df1["filename"].apply(
-        lambda f: os.path.exists(os.path.join(PATH_DATASET, f))
-    )
-    df1 = df1[df1["file_exists"]]
+    # One parallel scan of the image folders instead of an exists() call per row
+    files = scan_files(PATH_DATASET)
+    df1 = df1[df1["filename"].isin(files.keys())]
 
-    df1["basename"] = df1["filename"].apply(lambda x: x.split("/")[-1])
+    df1["basename"] = df1["filename"].str.split("/").str[-1]
     df_keep = df1.drop_duplicates(subset="basename", keep="first")
     df_duplicates = df1[~df1.index.isin(df_keep.index)]
 
-    deleted_count = 0
-    for _, row in df_duplicates.iterrows():
-        full_path = os.path.join(PATH_DATASET, row["filename"])
-        if os.path.exists(full_path):
-            os.remove(full_path)
-            deleted_count += 1
+    # Identical images under different names
+    paths = df_keep["filename"].map(lambda f: os.path.join(PATH_DATASET, f))
+    content_duplicates = set(
+        find_duplicate_files(paths, sizes={os.path.join(PATH_DATASET, f): files[f] for f in df_keep["filename"]})
+    )
+    df_content_duplicates = df_keep[paths.isin(content_duplicates)]
+    df_keep = df_keep[~paths.isin(content_duplicates)]
+
+    deleted_count = remove_files(
+        [os.path.join(PATH_DATASET, f) for f in pd.concat([df_duplicates, df_content_duplicates])["filename"]],
+        "Deleting duplicated files",
+    )
 
     df_keep.drop(columns=["file_exists", "basename"], errors="ignore").drop(
         columns=["subset", "genre_count"], errors="ignore"
@@ -98,38 +110,28 @@ def filter_dataset():
     os.remove(os.path.join(SCRIPT_DIR, "classes.csv"))
 
     print(f"Final dataset size: {len(df_keep)}")
-    print(f"Deleted {deleted_count} duplicated files.")
-
-
-def escape_sql_string(value):
-    """Escape single quotes and backslashes for SQL INSERT statements"""
-    if pd.isna(value) or value is None:
-        return "NULL"
-    value = str(value)
-    value = value.replace("\\", "\\\\").replace("'", "''")
-    return f"'{value}'"
+    print(
+        f"Deleted {deleted_count} duplicated files "
+        f"({len(df_duplicates)} by file name, {len(df_content_duplicates)} by content)."
+    )
 
 
 def process_type(type_value):
     """Convert type array to semicolon-separated string"""
+    if isinstance(type_value, list):
+        return ";".join(str(g) for g in type_value)
+
     if pd.isna(type_value) or type_value is None:
-        return "NULL"
+        return None
 
     # If it's already a string representation of an array like "['Baroque']"
     if isinstance(type_value, str):
         # Remove brackets and quotes, then split by comma
         type_value = type_value.strip("[]").replace("'", "").replace('"', "")
         types = [g.strip() for g in type_value.split(",") if g.strip()]
-        result = ";".join(types)
-        return f"'{result}'"
-
-    # If it's a list
-    if isinstance(type_value, list):
-        result = ";".join(str(g) for g in type_value)
-        return f"'{result}'"
+        return ";".join(types)
 
-    # Otherwise just escape as string
-    return escape_sql_string(type_value)
+    return type_value
 
 
 def generate_sql_inserts():
@@ -164,6 +166,13 @@ def generate_sql_inserts():
     # Save updated CSV with id
     df.to_csv(INPUT_CSV, index=False)
 
+    # SQL values: semicolon-separated types, integer sizes
+    df_sql = df.assign(
+        type=df["type"].map(process_type),
+        width=pd.to_numeric(df["width"]).astype("Int64"),
+        height=pd.to_numeric(df["height"]).astype("Int64"),
+    )
+
     with open(OUTPUT_SQL, "w", encoding="utf-8") as f:
         # Write table creation statement
         f.write("-- WikiArt Dataset SQL Import\n")
@@ -171,43 +180,17 @@ def generate_sql_inserts():
         f.write(f"-- Total records: {len(df)}\n\n")
 
         # Write INSERT statements in batches
-        batch_size = 100
-        total_rows = len(df)
-
-        for i in range(0, total_rows, batch_size):
-            batch = df.iloc[i : i + batch_size]
-
-            f.write(
-                "INSERT INTO WikiArt (id, image_file, artist_name, type, description, width, height, description_generated) VALUES\n"
-            )
-
-            values = []
-            for _, row in batch.iterrows():
-                id_val = escape_sql_string(row.get("id"))
-                image_file = escape_sql_string(row.get("image_file"))
-                artist_name = escape_sql_string(row.get("artist_name"))
-                type = process_type(row.get("type"))
-                description = escape_sql_string(row.get("description", ""))
-                width = int(row.get("width")) if pd.notna(row.get("width")) else "NULL"
-                height = (
-                    int(row.get("height")) if pd.notna(row.get("height")) else "NULL"
-                )
-                description_generated = escape_sql_string(
-                    row.get("description_generated", "")
-                )
-
-                values.append(
-                    f"    ({id_val}, {image_file}, {artist_name}, {type}, {description}, {width}, {height}, {description_generated})"
-                )
-
-            f.write(",\n".join(values))
-            f.write(";\n\n")
-
-        print(f"SQL file generated: {OUTPUT_SQL}")
-        print(
-            f"Total INSERT statements: {(total_rows + batch_size - 1) // batch_size} batches"
+        total_statements = write_insert_statements(
+            f, df_sql, "WikiArt", cols, batch_size=100, unquoted=("width", "height")
         )
-        print(f"Total records: {total_rows}")
+
+    print(f"SQL file generated: {OUTPUT_SQL}")
+    print(f"Total INSERT statements: {total_statements} batches")
+    print(f"Total records: {len(df)}")
+
+    # Same rows for LOAD DATA LOCAL INFILE
+    load_sql = write_bulk_insert(df_sql, "WikiArt", cols, OUTPUT_TSV)
+    print(f"Bulk load files generated: {OUTPUT_TSV}, {load_sql}")
 
 
 if __name__ == "__main__":
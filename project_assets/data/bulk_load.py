@@ -0,0 +1,118 @@
+"""
+Vectorized SQL export of the catalog tables, shared by the download scripts and
+scripts/generateDescriptions.py.
+
+Next to the usual .sql file of INSERT/UPDATE statements, every export writes
+
+    <name>.tsv        one row per line, tab separated, MySQL escapes (\\t, \\n, \\\\), NULL as \\N
+    <name>.load.sql   LOAD DATA LOCAL INFILE '<name>.tsv' INTO TABLE ...
+
+Updates are loaded into a temporary staging table and applied with a single UPDATE ... JOIN.
+Run the .load.sql from the folder holding the .tsv, with local infile enabled on both sides
+(webapp/data/db/conf/my.cnf enables it on the server):
+
+    mysql --local-infile=1 -u root -p artevoke < B_SemArt.load.sql
+"""
+import os
+
+import pandas as pd
+
+# MySQL LOAD DATA escapes (backslash first)
+LOAD_DATA_ESCAPES = [("\\", "\\\\"), ("\t", "\\t"), ("\n", "\\n"), ("\r", "\\r"), ("\0", "\\0")]
+LOAD_DATA_NULL = "\\N"
+
+
+def sql_literals(series, quote=True):
+    """SQL literal of every value: 'text' with backslashes and quotes escaped, NULL for missing values"""
+    null = series.isna()
+    text = series.astype(str)
+    if quote:
+        text = "'" + text.str.replace("\\", "\\\\", regex=False).str.replace("'", "''", regex=False) + "'"
+    return text.mask(null, "NULL")
+
+
+def load_data_fields(series):
+    """Values as LOAD DATA fields: MySQL escapes, \\N for missing values"""
+    null = series.isna()
+    text = series.astype(str)
+    for raw, escaped in LOAD_DATA_ESCAPES:
+        text = text.str.replace(raw, escaped, regex=False)
+    return text.mask(null, LOAD_DATA_NULL)
+
+
+def join_columns(columns, sep):
+    """Row-wise concatenation of equally indexed string Series"""
+    return columns[0].str.cat(columns[1:], sep=sep) if len(columns) > 1 else columns[0]
+
+
+def write_insert_statements(f, df, table, columns, batch_size=100, unquoted=()):
+    """Multi-row INSERT statements of df[columns], batch_size rows each; returns the number of statements"""
+    if df.empty:
+        return 0
+    literals = [sql_literals(df[column], quote=column not in unquoted) for column in columns]
+    values = ("    (" + join_columns(literals, ", ") + ")").tolist()
+
+    header = f"INSERT INTO {table} ({', '.join(columns)}) VALUES\n"
+    for start in range(0, len(values), batch_size):
+        f.write(header)
+        f.write(",\n".join(values[start : start + batch_size]))
+        f.write(";\n\n")
+    return (len(values) + batch_size - 1) // batch_size
+
+
+def write_tsv(df, columns, tsv_path):
+    """df[columns] as a LOAD DATA file (tab separated, newline terminated, no header)"""
+    with open(tsv_path, "w", encoding="utf-8", newline="\n") as f:
+        if not df.empty:
+            lines = join_columns([load_data_fields(df[column]) for column in columns], "\t")
+            f.write("\n".join(lines.tolist()))
+            f.write("\n")
+
+
+def load_data_statement(table, columns, tsv_name):
+    return (
+        f"LOAD DATA LOCAL INFILE '{tsv_name}'\n"
+        f"INTO TABLE {table}\n"
+        "CHARACTER SET utf8mb4\n"
+        "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'\n"
+        "LINES TERMINATED BY '\\n'\n"
+        f"({', '.join(columns)});\n"
+    )
+
+
+def load_sql_path(tsv_path):
+    return os.path.splitext(tsv_path)[0] + ".load.sql"
+
+
+def write_bulk_insert(df, table, columns, tsv_path):
+    """Write df[columns] to tsv_path and the LOAD DATA script inserting it into table; returns the script path"""
+    write_tsv(df, columns, tsv_path)
+    sql_path = load_sql_path(tsv_path)
+    with open(sql_path, "w", encoding="utf-8") as f:
+        f.write(f"-- {table} bulk import ({len(df)} rows), run from the folder holding {os.path.basename(tsv_path)}\n")
+        f.write(load_data_statement(table, columns, os.path.basename(tsv_path)))
+    return sql_path
+
+
+def write_bulk_update(df, table, key, columns, tsv_path):
+    """
+    Write df[[key] + columns] to tsv_path and a script that loads it into a temporary staging
+    table and updates table with one join on key; returns the script path
+    """
+    write_tsv(df, [key] + columns, tsv_path)
+    staging = f"{table}_staging"
+    sql_path = load_sql_path(tsv_path)
+    with open(sql_path, "w", encoding="utf-8") as f:
+        f.write(f"-- {table} bulk update ({len(df)} rows), run from the folder holding {os.path.basename(tsv_path)}\n")
+        # Same column types as the target table, keyed for the join
+        f.write(
+            f"CREATE TEMPORARY TABLE {staging} (PRIMARY KEY ({key}))\n"
+            f"SELECT {', '.join([key] + columns)} FROM {table} LIMIT 0;\n\n"
+        )
+        f.write(load_data_statement(staging, [key] + columns, os.path.basename(tsv_path)))
+        f.write(
+            f"\nUPDATE {table} t\nJOIN {staging} s ON t.{key} = s.{key}\n"
+            f"SET {', '.join(f't.{column} = s.{column}' for column in columns)};\n\n"
+        )
+        f.write(f"DROP TEMPORARY TABLE {staging};\n")
+    return sql_path
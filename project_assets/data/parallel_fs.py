@@ -0,0 +1,145 @@
+"""
+Thread-pool filesystem helpers for the download scripts: directory listing with os.scandir,
+parallel delete/move, and content-hash (SHA-256) duplicate detection. Every stage prints
+its progress and how long it took.
+"""
+import hashlib
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+FS_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+PROGRESS_STEPS = 10  # progress lines per stage
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def run_parallel(fn, items, label, workers=FS_WORKERS):
+    """
+    fn(item) for every item on a thread pool, printing progress and timing.
+    Returns {item: result}; an item whose call raised maps to the exception.
+    """
+    items = list(items)
+    results = {}
+    if not items:
+        return results
+
+    start = time.perf_counter()
+    step = max(1, len(items) // PROGRESS_STEPS)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fn, item): item for item in items}
+        for done, future in enumerate(as_completed(futures), 1):
+            item = futures[future]
+            try:
+                results[item] = future.result()
+            except Exception as e:
+                results[item] = e
+            if done % step == 0 and done < len(items):
+                print(f"{label}: {done}/{len(items)} ({done * 100 // len(items)}%)")
+
+    errors = sum(isinstance(result, Exception) for result in results.values())
+    print(f"{label}: {len(items)} done in {time.perf_counter() - start:.1f}s" + (f", {errors} errors" if errors else ""))
+    return results
+
+
+def _scan(directory, prefix):
+    """{relative path: size} of the files under directory (one os.scandir per folder)"""
+    files = {}
+    pending = [(directory, prefix)]
+    while pending:
+        current, current_prefix = pending.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                name = f"{current_prefix}{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append((entry.path, f"{name}/"))
+                elif entry.is_file():
+                    files[name] = entry.stat().st_size
+    return files
+
+
+def scan_files(root, workers=FS_WORKERS):
+    """
+    {path relative to root ("Genre/file.jpg"): size in bytes} of every file under root.
+    Top-level folders are scanned in parallel.
+    """
+    start = time.perf_counter()
+    files = {}
+    subdirectories = []
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append(entry)
+            elif entry.is_file():
+                files[entry.name] = entry.stat().st_size
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for subdirectory_files in executor.map(lambda entry: _scan(entry.path, f"{entry.name}/"), subdirectories):
+            files.update(subdirectory_files)
+
+    print(f"Scanned {root}: {len(files)} files in {time.perf_counter() - start:.1f}s")
+    return files
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_duplicate_files(paths, sizes=None, workers=FS_WORKERS):
+    """
+    Paths whose content is identical to an earlier path in the list (the first one is kept).
+    Only files sharing their size with another file are hashed; sizes ({path: size}) saves the stats.
+    """
+    paths = list(dict.fromkeys(paths))
+    if sizes is None:
+        sizes = run_parallel(os.path.getsize, paths, "Reading file sizes", workers)
+    by_size = {}
+    for path in paths:
+        size = sizes.get(path)
+        if size is not None and not isinstance(size, Exception):
+            by_size.setdefault(size, []).append(path)
+    candidates = [path for group in by_size.values() if len(group) > 1 for path in group]
+
+    hashes = run_parallel(file_sha256, candidates, "Hashing same-size files", workers)
+    seen = set()
+    duplicates = []
+    for path in paths:
+        digest = hashes.get(path)
+        if digest is None or isinstance(digest, Exception):
+            continue
+        if digest in seen:
+            duplicates.append(path)
+        else:
+            seen.add(digest)
+    print(f"Found {len(duplicates)} duplicate files by content")
+    return duplicates
+
+
+def remove_files(paths, label="Removing files", workers=FS_WORKERS):
+    """Delete paths in parallel, ignoring the ones already gone; returns the number removed"""
+
+    def remove(path):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    results = run_parallel(remove, paths, label, workers)
+    for path, result in results.items():
+        if isinstance(result, Exception):
+            print(f"Error deleting {path}: {result}")
+    return sum(result is True for result in results.values())
+
+
+def move_files(moves, label="Moving files", workers=FS_WORKERS):
+    """shutil.move every (src, dst) pair in parallel; returns the number moved"""
+    results = run_parallel(lambda move: shutil.move(*move), moves, label, workers)
+    for (src, _), result in results.items():
+        if isinstance(result, Exception):
+            print(f"Error moving {src}: {result}")
+    return sum(not isinstance(result, Exception) for result in results.values())
@@ -0,0 +1,123 @@
+"""
+Content-addressed embedding store shared by the offline scripts and benchmarks.
+
+Embeddings are keyed by sha256 of the text, per model:
+
+    outputs/embeddings/<model>/
+        index.parquet       text sha -> (shard, row)
+        <shard sha>.npy     float32 matrix of the vectors added by one encode call
+        .lock
+
+Vectors are always L2-normalized (every caller encodes with normalize_embeddings=True).
+Set EMBEDDING_CACHE=off to bypass the store (e.g. to time the encoding itself) and
+EMBEDDING_CACHE_DIR to share one store between checkouts.
+
+Usage:
+
+    from embeddingCache import cached_encode
+    embeddings = cached_encode(model, texts, "thenlper/gte-large")
+"""
+import fcntl
+import hashlib
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", os.path.join(SCRIPT_DIR, "outputs", "embeddings"))
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE", "on").lower() != "off"
+
+
+def text_key(text):
+    return hashlib.sha256(str(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, model_name, root=EMBEDDING_CACHE_DIR):
+        self.model_name = model_name
+        self.directory = os.path.join(root, re.sub(r"[^\w.-]+", "__", model_name))
+        self.index_path = os.path.join(self.directory, "index.parquet")
+        os.makedirs(self.directory, exist_ok=True)
+        self._index = {}
+        self._index_mtime = None
+        self._shards = {}
+
+    def _read_index(self):
+        if not os.path.exists(self.index_path):
+            return pd.DataFrame({"key": [], "shard": [], "row": []})
+        return pd.read_parquet(self.index_path)
+
+    def _load_index(self):
+        """Index as {key: (shard, row)}, re-read only when another process changed it"""
+        mtime = os.path.getmtime(self.index_path) if os.path.exists(self.index_path) else None
+        if mtime != self._index_mtime:
+            index = self._read_index()
+            self._index = dict(zip(index["key"], zip(index["shard"], index["row"].astype(int))))
+            self._index_mtime = mtime
+        return self._index
+
+    def _shard(self, shard):
+        if shard not in self._shards:
+            self._shards[shard] = np.load(os.path.join(self.directory, f"{shard}.npy"), mmap_mode="r")
+        return self._shards[shard]
+
+    def _add(self, keys, vectors):
+        """Write the new vectors as one shard and append them to the index under a file lock"""
+        shard = hashlib.sha256("".join(keys).encode("utf-8")).hexdigest()
+        shard_path = os.path.join(self.directory, f"{shard}.npy")
+        np.save(f"{shard_path}.tmp.npy", np.ascontiguousarray(vectors, dtype=np.float32))
+        os.replace(f"{shard_path}.tmp.npy", shard_path)
+
+        with open(os.path.join(self.directory, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            index = self._read_index()
+            new_rows = pd.DataFrame({"key": keys, "shard": shard, "row": np.arange(len(keys), dtype=np.int32)})
+            index = pd.concat([index, new_rows[~new_rows["key"].isin(index["key"])]], ignore_index=True)
+            index.to_parquet(f"{self.index_path}.tmp", index=False)
+            os.replace(f"{self.index_path}.tmp", self.index_path)
+
+    def encode(self, model, texts, **encode_kwargs):
+        """
+        model.encode(texts, normalize_embeddings=True) as a float32 matrix, encoding only
+        the texts that are not in the store yet (each distinct text once).
+        """
+        texts = [str(text) for text in texts]
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        keys = [text_key(text) for text in texts]
+        index = self._load_index()
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in index and key not in missing:
+                missing[key] = text
+        if missing:
+            print(f"Embedding cache ({self.model_name}): {len(texts) - len(missing)} cached, encoding {len(missing)}")
+            vectors = np.asarray(
+                model.encode(list(missing.values()), normalize_embeddings=True, **encode_kwargs), dtype=np.float32
+            )
+            self._add(list(missing), vectors)
+            self._index_mtime = None  # force a re-read, mtimes can be too coarse to notice our own write
+            index = self._load_index()
+
+        shards = np.array([index[key][0] for key in keys])
+        rows = np.array([index[key][1] for key in keys], dtype=np.int64)
+        embeddings = np.empty((len(keys), self._shard(shards[0]).shape[1]), dtype=np.float32)
+        for shard in np.unique(shards):
+            mask = shards == shard
+            embeddings[mask] = self._shard(shard)[rows[mask]]
+        return embeddings
+
+
+_caches = {}
+
+
+def cached_encode(model, texts, model_name, **encode_kwargs):
+    """Normalized float32 embeddings of texts, through the shared store of model_name"""
+    if not EMBEDDING_CACHE_ENABLED:
+        return np.asarray(model.encode(list(texts), normalize_embeddings=True, **encode_kwargs), dtype=np.float32)
+    if model_name not in _caches:
+        _caches[model_name] = EmbeddingCache(model_name)
+    return _caches[model_name].encode(model, texts, **encode_kwargs)
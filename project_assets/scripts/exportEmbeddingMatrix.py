@@ -0,0 +1,134 @@
+import os
+import argparse
+import numpy as np
+from qdrant_client import QdrantClient
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+OUTPUT_PATH = os.path.join(SCRIPT_DIR, "outputs", "vector_index")
+
+EMBEDDING_FULL_DIM = 2560
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Export Qdrant collections built by generateQdrantCollection.py as memory-mappable "
+                    ".npy embedding matrices for the backend's NumPy (VECTOR_BACKEND=numpy) search"
+    )
+    parser.add_argument(
+        "--qdrant-host",
+        default="localhost",
+        help="Qdrant host (default: localhost)"
+    )
+    parser.add_argument(
+        "--qdrant-port",
+        type=int,
+        default=6333,
+        help="Qdrant port (default: 6333)"
+    )
+    parser.add_argument(
+        "--datasets",
+        nargs="+",
+        choices=["semart", "wikiart", "ipiranga"],
+        default=["semart", "wikiart", "ipiranga"],
+        help="Datasets to export (default: all)"
+    )
+    parser.add_argument(
+        "--embedding-dim",
+        type=int,
+        choices=[256, 512, 1024, 2560],
+        default=EMBEDDING_FULL_DIM,
+        help="Embedding dimension the collections were built with (default: 2560)"
+    )
+    parser.add_argument(
+        "--dtype",
+        choices=["float32", "float16"],
+        default="float32",
+        help="Matrix dtype; float16 halves the file and page-cache size (default: float32)"
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=OUTPUT_PATH,
+        help=f"Where to write <collection>_embeddings.npy and <collection>_embeddings_ids.npy (default: {OUTPUT_PATH})"
+    )
+    return parser.parse_args()
+
+
+def get_collection_name(dataset_name, embedding_dim):
+    """Same naming as generateQdrantCollection.py and the backend"""
+    if embedding_dim == EMBEDDING_FULL_DIM:
+        return dataset_name
+    return f"{dataset_name}_dim{embedding_dim}"
+
+
+def export_collection(client, collection_name, output_dir, dtype):
+    """Scroll every point of a collection into a normalized .npy matrix plus an id array"""
+    info = client.get_collection(collection_name)
+    n_points = info.points_count
+    vector_size = info.config.params.vectors.size
+
+    matrix_path = os.path.join(output_dir, f"{collection_name}_embeddings.npy")
+    ids_path = os.path.join(output_dir, f"{collection_name}_embeddings_ids.npy")
+
+    # Written through a memmap so the full matrix never has to fit in RAM twice
+    matrix = np.lib.format.open_memmap(matrix_path, mode="w+", dtype=dtype, shape=(n_points, vector_size))
+    ids = []
+
+    offset = None
+    row = 0
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=1000,
+            offset=offset,
+            with_payload=["id"],
+            with_vectors=True,
+        )
+        if not points:
+            break
+
+        vectors = np.array([point.vector for point in points], dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        matrix[row:row + len(points)] = vectors.astype(dtype)
+        ids.extend(str(point.payload["id"]) for point in points)
+        row += len(points)
+        print(f"Exported {row}/{n_points} points from {collection_name}")
+
+        if offset is None:
+            break
+
+    matrix.flush()
+    del matrix
+
+    if row != n_points:
+        # Collection changed while scrolling: rewrite with the rows actually read
+        exported = np.load(matrix_path, mmap_mode="r")[:row].copy()
+        np.save(matrix_path, exported)
+
+    np.save(ids_path, np.array(ids, dtype="U"))
+
+    size_mb = os.path.getsize(matrix_path) / (1024 * 1024)
+    print(f"✅ {collection_name}: {row} x {vector_size} {dtype} matrix ({size_mb:.1f} MB) -> {matrix_path}")
+
+
+def main():
+    args = parse_args()
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    print(f"Connecting to Qdrant at {args.qdrant_host}:{args.qdrant_port}")
+    client = QdrantClient(host=args.qdrant_host, port=args.qdrant_port, timeout=120)
+
+    available = [c.name for c in client.get_collections().collections]
+
+    for name in args.datasets:
+        collection_name = get_collection_name(name, args.embedding_dim)
+        if collection_name not in available:
+            print(f"Collection not found: {collection_name}")
+            continue
+        export_collection(client, collection_name, args.output_dir, args.dtype)
+
+    print("Export complete! Copy the .npy files to webapp/data/vector_index/ and set VECTOR_BACKEND=numpy")
+
+
+if __name__ == "__main__":
+    main()
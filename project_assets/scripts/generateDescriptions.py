@@ -1,9 +1,17 @@
 import os
 import sys
+import json
+import time
+import argparse
+import queue
+import threading
 import torch
 import pandas as pd
 import random
 import multiprocessing as mp
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.managers import BaseManager
 from tqdm import tqdm
 from transformers import Qwen2_5_VLForConditionalGeneration, AutoProcessor
 from qwen_vl_utils import process_vision_info
@@ -30,10 +38,25 @@ os.makedirs(DESCRIPTION_PATH, exist_ok=True)
 
 SQL_OUTPUT_PATH = os.path.join(SCRIPT_DIR, "outputs", "sql_inserts")
 
+sys.path.append(DATA_PATH)
+from bulk_load import sql_literals, write_bulk_update
+
 MUESUEM_DATA_PATH = "/DATA/public/siamese/dataset_mrbab/art-foto"
 
 MAX_PIXELS = 512 * 512
-DESC_COL_BASE = "description_Qwen2_5"
+MAX_NEW_TOKENS = 1000
+# Items per generate call, and how many batches' worth of records a worker leases (and groups
+# by image size) at a time
+BATCH_SIZE = 8
+BATCH_WINDOW = 8
+# Results are appended to the JSONL logs and fsynced every FLUSH_EVERY items
+FLUSH_EVERY = 32
+# A leased group of records goes back to the queue if its worker hasn't completed it in time
+LEASE_TIMEOUT_S = 30 * 60
+LEASE_POLL_S = 2
+# Threads loading and decoding images ahead of the model, and how many prepared leases may wait
+PREFETCH_WORKERS = 8
+PREFETCH_LEASES = 2
 
 
 BASE_QUERY = """
@@ -172,21 +195,6 @@ def get_info(dataset, row) -> str:
     return ""
 
 
-def escape_sql_string(value):
-    """Escape single quotes and backslashes for SQL UPDATE statements"""
-    if value is None or (isinstance(value, str) and value.strip() == ""):
-        return "NULL"
-    if pd.isna(value):
-        return "NULL"
-
-    value = str(value)
-    # Replace backslashes first, then single quotes
-    value = value.replace("\\", "\\\\").replace("'", "''")
-    # Remove newlines and normalize whitespace
-    value = " ".join(value.split())
-    return f"'{value}'"
-
-
 def generate_update_sql(dataset, merged_csv):
     """Generate SQL UPDATE file for a specific dataset after descriptions are generated"""
 
@@ -218,31 +226,36 @@ def generate_update_sql(dataset, merged_csv):
         return False
 
     output_sql = os.path.join(SQL_OUTPUT_PATH, f"C_{table_name}.sql")
+    output_tsv = os.path.join(SQL_OUTPUT_PATH, f"C_{table_name}.tsv")
 
     os.makedirs(SQL_OUTPUT_PATH, exist_ok=True)
 
+    # Newlines and repeated whitespace collapsed, blank descriptions stored as NULL
+    descriptions = df_valid["description"].astype(str).str.split().str.join(" ")
+    df_updates = pd.DataFrame(
+        {
+            "id": df_valid["id"].astype(str),
+            "description_generated": descriptions.mask(descriptions == "", None),
+        }
+    )
+
     # Generate SQL UPDATE statements
+    statements = (
+        f"UPDATE {table_name} SET description_generated = "
+        + sql_literals(df_updates["description_generated"])
+        + " WHERE id = '"
+        + df_updates["id"]
+        + "';"
+    ).tolist()
     with open(output_sql, "w", encoding="utf-8") as f:
         batch_size = 100
         total_batches = (valid_rows + batch_size - 1) // batch_size
 
         for batch_num in range(total_batches):
             start_idx = batch_num * batch_size
-            end_idx = min(start_idx + batch_size, valid_rows)
-            batch = df_valid.iloc[start_idx:end_idx]
-
             f.write(f"-- Batch {batch_num + 1}/{total_batches}\n")
-
-            for idx, row in batch.iterrows():
-                row_id = str(row["id"])
-                description = escape_sql_string(row["description"])
-
-                f.write(
-                    f"UPDATE {table_name} SET description_generated = {description} "
-                    f"WHERE id = '{row_id}';\n"
-                )
-
-            f.write("\n")
+            f.write("\n".join(statements[start_idx : start_idx + batch_size]))
+            f.write("\n\n")
 
         # Add verification query at the end
         f.write("-- Verification: Check how many descriptions were updated\n")
@@ -253,6 +266,10 @@ def generate_update_sql(dataset, merged_csv):
     print(f"✅ SQL file generated: {output_sql}")
     print(f"   Total UPDATE statements: {valid_rows}")
 
+    # Same updates through a staging table and a single UPDATE ... JOIN
+    load_sql = write_bulk_update(df_updates, table_name, "id", ["description_generated"], output_tsv)
+    print(f"✅ Bulk update files generated: {output_tsv}, {load_sql}")
+
     return True
 
 
@@ -269,161 +286,501 @@ def extract_first_style(type_str):
         return type_str
 
 
-def process_partition(dataset, data_items, gpu_id, output_file, desc_col_base):
-    torch.cuda.set_device(gpu_id)
-    desc_col = f"{desc_col_base}_gpu{gpu_id}"
-
-    if os.path.exists(output_file):
-        df_saved = pd.read_csv(output_file)
-        df_saved[desc_col] = df_saved[desc_col].astype("string")
-        print(
-            f"[GPU {gpu_id}] Resuming from {output_file} with {df_saved[desc_col].notna().sum()} done"
-        )
-    else:
-        df_saved = pd.DataFrame(data_items)
-        df_saved[desc_col] = pd.NA
-        # For WikiArt, extract the first style from the type column and rename it
-        if dataset == "wikiart" and "type" in df_saved.columns:
-            df_saved["type"] = df_saved["type"].apply(extract_first_style)
-        print(f"[GPU {gpu_id}] Starting fresh with {len(df_saved)} items")
-
+# Columns kept in the merged CSV, besides the description
+OUTPUT_COLUMNS = {
+    "ipiranga": ["id", "inventory_code", "type"],
+    "semart": ["id", "image_file", "type"],
+    "wikiart": ["id", "image_file", "type"],
+}
+
+
+class ResultLog:
+    """
+    Append-only JSONL log of generated descriptions ({"id": ..., "description": ...} per line).
+    Lines are buffered and flushed every flush_every items, so a crash loses at most that many.
+    """
+
+    def __init__(self, path, flush_every=FLUSH_EVERY):
+        self.path = path
+        self.flush_every = flush_every
+        self._buffer = []
+        self._file = open(path, "a", encoding="utf-8")
+
+    @staticmethod
+    def read(path):
+        """{str(id): description} of a previous run; a torn last line is ignored"""
+        results = {}
+        if not os.path.exists(path):
+            return results
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                results[str(entry["id"])] = entry["description"]
+        return results
+
+    def write(self, item_id, description):
+        self._buffer.append(json.dumps({"id": item_id, "description": description}, ensure_ascii=False, default=str))
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write("\n".join(self._buffer) + "\n")
+            self._buffer = []
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def load_model(device, model_name=MODEL_NAME):
+    """Qwen2.5-VL in bfloat16 on GPU, float32 on CPU (smoke tests); left padding for batched generation"""
+    dtype = torch.bfloat16 if device.startswith("cuda") else torch.float32
     model = Qwen2_5_VLForConditionalGeneration.from_pretrained(
-        MODEL_NAME, 
-        dtype=torch.bfloat16, 
-        device_map={"": f"cuda:{gpu_id}"},
+        model_name, 
+        dtype=dtype, 
+        device_map={"": device},
         cache_dir=LOCAL_CACHE_DIR
     )
     processor = AutoProcessor.from_pretrained(
-        MODEL_NAME, 
+        model_name, 
         use_fast=True,
         cache_dir=LOCAL_CACHE_DIR
     )
+    processor.tokenizer.padding_side = "left"
+    return model, processor
 
-    for idx, row in tqdm(
-        df_saved.iterrows(), total=len(df_saved), desc=f"GPU {gpu_id}", position=gpu_id
-    ):
-        desc_val = row.get(desc_col)
 
-        if pd.notna(desc_val):
-            continue
+def prepare_item(dataset, row, processor):
+    """
+    Chat prompt and decoded, resized image for one record.
+    Returns (item, None) or (None, status) when the image is missing or can't be loaded.
+    """
+    image = get_image_path(dataset, row)
+    if not image.startswith("http") and not os.path.exists(image):
+        return None, "Image not found"
 
-        image = get_image_path(dataset, row)
-        if not image.startswith("http") and not os.path.exists(image):
-            df_saved.at[idx, desc_col] = "Image not found"
+    try:
+        prompt = build_prompt(dataset, get_info(dataset, row))
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image",
+                        "image": image,
+                        "max_pixels": MAX_PIXELS,
+                    },
+                    {"type": "text", "text": prompt},
+                ],
+            }
+        ]
+        text = processor.apply_chat_template(messages, add_generation_prompt=True)
+        image_inputs, _ = process_vision_info(messages)
+    except Exception as e:
+        return None, f"Error: {str(e)}"
+
+    return {"id": row["id"], "text": text, "image": image_inputs[0]}, None
+
+
+def size_grouped_batches(items, batch_size):
+    """
+    Sort items by resized image area (= number of visual tokens), then prompt length, and
+    cut them into batches, so the items of a batch need little padding.
+    """
+    items = sorted(items, key=lambda item: (item["image"].width * item["image"].height, len(item["text"])))
+    return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+
+def generate_batch(model, processor, items, device):
+    """One generate call for a batch of prepared items; returns one description per item"""
+    if isinstance(model, StubModel):
+        return model.describe(items)
+
+    inputs = processor(
+        text=[item["text"] for item in items],
+        images=[item["image"] for item in items],
+        padding=True,
+        return_tensors="pt",
+    ).to(device)
+
+    with torch.inference_mode():
+        output_ids = model.generate(**inputs, max_new_tokens=MAX_NEW_TOKENS)
+
+    # With left padding every prompt ends at the same position: keep only the new tokens
+    generated_ids = output_ids[:, inputs["input_ids"].shape[1]:]
+    output_texts = processor.batch_decode(generated_ids, skip_special_tokens=True)
+    return [" ".join(text.strip().split("\n")) for text in output_texts]
+
+
+def write_output_csv(dataset, data_items, results, desc_col, output_file):
+    """Write the records' output columns plus their description (data_items order)"""
+    df = pd.DataFrame(data_items)
+    columns = [column for column in OUTPUT_COLUMNS.get(dataset, df.columns) if column in df.columns]
+    df = df[columns].copy()
+    df[desc_col] = df["id"].astype(str).map(results)
+    df.to_csv(output_file, index=False)
+
+
+def read_results(dataset, desc_col_base):
+    """
+    {str(id): description} already generated for dataset: every worker's JSONL log plus the
+    partition CSVs written before the logs existed ({dataset}_output_gpuN.csv)
+    """
+    results = {}
+    prefix = f"{dataset}_output_"
+    for name in sorted(os.listdir(DESCRIPTION_PATH)):
+        if not name.startswith(prefix):
             continue
-
+        path = os.path.join(DESCRIPTION_PATH, name)
+        if name.endswith(".jsonl"):
+            for item_id, description in ResultLog.read(path).items():
+                results.setdefault(item_id, description)
+        elif name.endswith(".csv"):
+            df_saved = pd.read_csv(path)
+            desc_col = f"{desc_col_base}_{name[len(prefix):-len('.csv')]}"
+            if desc_col in df_saved.columns:
+                done = df_saved[df_saved[desc_col].notna()]
+                for item_id, description in zip(done["id"].astype(str), done[desc_col]):
+                    results.setdefault(item_id, description)
+    return results
+
+
+class TaskBoard:
+    """
+    Shared queue of the records left to describe, served to the workers by a manager process.
+    Workers lease a few records at a time and complete the lease once the results are flushed
+    to their log; after every batch they renew all their leases. A lease that is neither renewed
+    nor completed within lease_timeout (stalled worker), or whose worker died, goes back to the
+    queue, so whichever worker is free picks it up.
+    """
+
+    def __init__(self, records, lease_timeout=LEASE_TIMEOUT_S):
+        self.lease_timeout = lease_timeout
+        self._pending = deque(records)
+        self._leases = {}  # lease id -> (worker, records, expiry)
+        self._done = set()
+        self._next_lease = 0
+        self._lock = threading.Lock()
+
+    def _requeue(self, lease_ids):
+        for lease_id in lease_ids:
+            _, rows, _ = self._leases.pop(lease_id)
+            self._pending.extendleft(reversed(rows))
+
+    def lease(self, worker, size):
+        """
+        (lease id, records) to describe; (None, []) when nothing is free right now but leases
+        are still out (poll again); None once every record is done.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._requeue([lease_id for lease_id, (_, _, expiry) in self._leases.items() if expiry < now])
+
+            rows = []
+            while self._pending and len(rows) < size:
+                row = self._pending.popleft()
+                if str(row["id"]) not in self._done:
+                    rows.append(row)
+            if not rows:
+                return (None, []) if self._leases else None
+
+            lease_id = self._next_lease
+            self._next_lease += 1
+            self._leases[lease_id] = (worker, rows, now + self.lease_timeout)
+            return lease_id, rows
+
+    def complete(self, lease_id, item_ids):
+        with self._lock:
+            self._done.update(str(item_id) for item_id in item_ids)
+            # Unknown when the lease expired and was handed out again: the other copy is skipped or deduplicated
+            self._leases.pop(lease_id, None)
+
+    def renew(self, worker):
+        """
+        Heartbeat: push back the expiry of every lease the worker holds, including the ones still
+        waiting in its prefetch queue. Returns the number of leases renewed.
+        """
+        with self._lock:
+            expiry = time.monotonic() + self.lease_timeout
+            leases = [lease_id for lease_id, (owner, _, _) in self._leases.items() if owner == worker]
+            for lease_id in leases:
+                owner, rows, _ = self._leases[lease_id]
+                self._leases[lease_id] = (owner, rows, expiry)
+            return len(leases)
+
+    def release(self, worker):
+        """Put the leases of a worker that exited back in the queue"""
+        with self._lock:
+            self._requeue([lease_id for lease_id, (owner, _, _) in self._leases.items() if owner == worker])
+
+    def done_count(self):
+        with self._lock:
+            return len(self._done)
+
+
+class TaskBoardManager(BaseManager):
+    pass
+
+
+TaskBoardManager.register("TaskBoard", TaskBoard)
+
+
+class StubModel:
+    """
+    Stands in for Qwen2.5-VL (--stub): images are still loaded and resized, but the description
+    is a deterministic summary of the model inputs, to test the scheduling, resume and merge locally.
+    """
+
+    def describe(self, items):
+        return [
+            f"Stub description of item {item['id']}: {item['image'].width}x{item['image'].height} image, "
+            f"{len(item['text'])} character prompt."
+            for item in items
+        ]
+
+
+class StubProcessor:
+    """Chat template of the stub model: the plain prompt"""
+
+    def apply_chat_template(self, messages, add_generation_prompt=True):
+        return messages[0]["content"][-1]["text"]
+
+
+def prefetch_leases(board, worker, dataset, processor, lease_size, prefetch_workers=PREFETCH_WORKERS):
+    """
+    Yield (lease id, rows, [prepare_item(row)]) for each lease of the worker. A background thread
+    leases the next records and loads/decodes their images (local files or Ipiranga URLs) on a
+    thread pool while the model works on the current lease; at most PREFETCH_LEASES prepared
+    leases wait in the queue.
+    """
+    ready = queue.Queue(maxsize=PREFETCH_LEASES)
+
+    def produce():
         try:
-            prompt = build_prompt(dataset, get_info(dataset, row))
-
-            messages = [
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image",
-                            "image": image,
-                            "max_pixels": MAX_PIXELS,
-                        },
-                        {"type": "text", "text": prompt},
-                    ],
-                }
-            ]
-
-            text = processor.apply_chat_template(messages, add_generation_prompt=True)
-            image_inputs, _ = process_vision_info(messages)
-            inputs = processor(
-                text=[text], images=image_inputs, padding=True, return_tensors="pt"
-            ).to(f"cuda:{gpu_id}")
-
-            output_ids = model.generate(**inputs, max_new_tokens=1000)
-            output_text = processor.batch_decode(output_ids, skip_special_tokens=True)[
-                0
-            ]
-
-            if "assistant" in output_text.lower():
-                parts = output_text.rsplit("assistant", 1)
-                description = parts[-1].strip(": \n")
-            else:
-                description = output_text.strip()
-
-            df_saved.at[idx, desc_col] = description.replace("\n", " ")
-
-            # Save intermediate results with relevant columns only
-            if dataset == "ipiranga":
-                df_temp = df_saved[["id", "inventory_code", "type", desc_col]]
-            elif dataset == "semart":
-                df_temp = df_saved[["id", "image_file", "type", desc_col]]
-            elif dataset == "wikiart":
-                df_temp = df_saved[["id", "image_file", "type", desc_col]]
-            else:
-                df_temp = df_saved
-            df_temp.to_csv(output_file, index=False)
-
+            with ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix=f"{worker}-prefetch") as pool:
+                while True:
+                    lease = board.lease(worker, lease_size)
+                    if lease is None:
+                        break
+                    lease_id, rows = lease
+                    if lease_id is None:
+                        time.sleep(LEASE_POLL_S)
+                        continue
+                    prepared = list(pool.map(lambda row: prepare_item(dataset, row, processor), rows))
+                    ready.put((lease_id, rows, prepared))
+            ready.put(None)
         except Exception as e:
-            df_saved.at[idx, desc_col] = f"Error: {str(e)}"
-            if dataset == "ipiranga":
-                df_temp = df_saved[["id", "inventory_code", "type", desc_col]]
-            elif dataset == "semart":
-                df_temp = df_saved[["id", "image_file", "type", desc_col]]
-            elif dataset == "wikiart":
-                df_temp = df_saved[["id", "image_file", "type", desc_col]]
-            else:
-                df_temp = df_saved
-            df_temp.to_csv(output_file, index=False)
-            continue
-
-    # Save final results with relevant columns only
-    if dataset == "ipiranga":
-        df_saved = df_saved[["id", "inventory_code", "type", desc_col]]
-    elif dataset == "semart":
-        df_saved = df_saved[["id", "image_file", "type", desc_col]]
-    elif dataset == "wikiart":
-        df_saved = df_saved[["id", "image_file", "type", desc_col]]
-    df_saved.to_csv(output_file, index=False)
+            ready.put(e)
+
+    threading.Thread(target=produce, name=f"{worker}-leases", daemon=True).start()
+    while True:
+        entry = ready.get()
+        if entry is None:
+            return
+        if isinstance(entry, Exception):
+            raise entry
+        yield entry
+
+
+def describe_prepared(rows, prepared, model, processor, device, batch_size, record, on_batch=None):
+    """
+    Describe the prepared items of rows, grouped by size into batches, and pass each
+    (id, description) to record; on_batch() is called after every batch.
+    Returns the number of items sent to the model.
+    """
+    items = []
+    for row, (item, status) in zip(rows, prepared):
+        if item is None:
+            record(row["id"], status)
+        else:
+            items.append(item)
+
+    for batch in size_grouped_batches(items, batch_size):
+        try:
+            descriptions = generate_batch(model, processor, batch, device)
+        except Exception as e:
+            # Retry one by one so a single bad item doesn't fail the whole batch
+            descriptions = []
+            for item in batch:
+                try:
+                    descriptions.extend(generate_batch(model, processor, [item], device))
+                except Exception as item_error:
+                    descriptions.append(f"Error: {str(item_error)}")
+        for item, description in zip(batch, descriptions):
+            record(item["id"], description)
+        if on_batch is not None:
+            on_batch()
+    return len(items)
+
+
+def run_worker(
+    dataset,
+    device,
+    worker,
+    board,
+    output_file,
+    batch_size=BATCH_SIZE,
+    flush_every=FLUSH_EVERY,
+    model_name=MODEL_NAME,
+    stub=False,
+    prefetch_workers=PREFETCH_WORKERS,
+):
+    """
+    Worker process on device ("cuda:N" or "cpu"): leases batch_size * BATCH_WINDOW records at
+    a time from the board until none are left, appending the results to its JSONL log.
+    Images of the next leases are prefetched while the model runs.
+    """
+    if device.startswith("cuda"):
+        torch.cuda.set_device(device)
+    if stub:
+        model, processor = StubModel(), StubProcessor()
+    else:
+        model, processor = load_model(device, model_name)
+
+    log = ResultLog(output_file, flush_every)
+    start = time.perf_counter()
+    generated = 0
+    waited = 0.0
+    leases = prefetch_leases(board, worker, dataset, processor, batch_size * BATCH_WINDOW, prefetch_workers)
+    while True:
+        wait_start = time.perf_counter()
+        lease = next(leases, None)
+        waited += time.perf_counter() - wait_start
+        if lease is None:
+            break
+        lease_id, rows, prepared = lease
+
+        # Renew the worker's leases after every batch, so neither this lease nor the prefetched
+        # ones expire while the model is slow (CPU, long generations)
+        board.renew(worker)
+        generated += describe_prepared(
+            rows, prepared, model, processor, device, batch_size, log.write, on_batch=lambda: board.renew(worker)
+        )
+        # Only hand the lease back once its results are on disk
+        log.flush()
+        board.complete(lease_id, [row["id"] for row in rows])
+
+    log.close()
+    elapsed = time.perf_counter() - start
+    print(f"[{worker}] Generated {generated} descriptions in {elapsed:.1f}s "
+          f"({generated / max(elapsed, 1e-9):.2f} items/s, {waited:.1f}s waiting for images or leases)")
+
+
+def default_devices():
+    """One worker per visible GPU, or a single CPU worker"""
+    if torch.cuda.is_available():
+        return [f"cuda:{i}" for i in range(torch.cuda.device_count())]
+    return ["cpu"]
+
+
+def worker_names(devices):
+    """gpu0, gpu1, cpu0, cpu1, ...; a GPU listed twice gets a second worker (gpu0_1)"""
+    names = []
+    for device in devices:
+        if device.startswith("cuda"):
+            name = f"gpu{device.split(':')[1]}"
+        else:
+            name = f"cpu{sum(existing.startswith('cpu') for existing in names)}"
+        candidate, n = name, 1
+        while candidate in names:
+            candidate = f"{name}_{n}"
+            n += 1
+        names.append(candidate)
+    return names
 
 
 if __name__ == "__main__":
     # Set multiprocessing start method to 'spawn' for CUDA compatibility
     mp.set_start_method('spawn', force=True)
-    
-    dataset = sys.argv[1]  # "semart", "wikiart", "museum", or "ipiranga"
-    valid_datasets = {"semart", "wikiart", "ipiranga"}
-    if dataset not in valid_datasets:
-        print(
-            f"❌ Invalid dataset '{dataset}'. Choose one of: {', '.join(valid_datasets)}."
-        )
-        sys.exit(1)
+
+    parser = argparse.ArgumentParser(description="Generate artwork descriptions with Qwen2.5-VL")
+    parser.add_argument("dataset", choices=["semart", "wikiart", "ipiranga"])
+    parser.add_argument("--devices", nargs="+", default=None,
+                        help="One worker per entry, e.g. cuda:0 cuda:1 cpu (default: every visible GPU, else cpu)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Items per generate call")
+    parser.add_argument("--flush-every", type=int, default=FLUSH_EVERY, help="Items between flushes of the JSONL logs")
+    parser.add_argument("--lease-timeout", type=float, default=LEASE_TIMEOUT_S,
+                        help="Seconds before a leased group of records is handed to another worker")
+    parser.add_argument("--prefetch-workers", type=int, default=PREFETCH_WORKERS,
+                        help="Threads per worker loading and decoding images ahead of the model")
+    parser.add_argument("--limit", type=int, default=None, help="Only describe the first N records")
+    parser.add_argument("--model", default=MODEL_NAME, help="e.g. Qwen/Qwen2.5-VL-3B-Instruct for a faster smoke test")
+    parser.add_argument("--stub", action="store_true", help="Use a stub model instead of Qwen2.5-VL (local tests)")
+    args = parser.parse_args()
+    dataset = args.dataset
 
     desc_col_base = f"description_Qwen2_5_{dataset}"
-    output0 = os.path.join(DESCRIPTION_PATH, f"{dataset}_output_gpu0.csv")
-    output1 = os.path.join(DESCRIPTION_PATH, f"{dataset}_output_gpu1.csv")
     output_merged = os.path.join(DESCRIPTION_PATH, f"output_merged_{dataset}.csv")
 
-    records = load_data(dataset)
-
-    mid = len(records) // 2
-    part0, part1 = records[:mid], records[mid:]
-
-    p0 = mp.Process(
-        target=process_partition, args=(dataset, part0, 0, output0, desc_col_base)
-    )
-    p1 = mp.Process(
-        target=process_partition, args=(dataset, part1, 1, output1, desc_col_base)
-    )
-
-    p0.start()
-    p1.start()
-    p0.join()
-    p1.join()
-
-    df0 = pd.read_csv(output0)
-    df1 = pd.read_csv(output1)
-
-    df0 = df0.rename(columns={f"{desc_col_base}_gpu0": "description"})
-    df1 = df1.rename(columns={f"{desc_col_base}_gpu1": "description"})
-
-    merged_df = pd.concat([df0, df1], ignore_index=True)
-    merged_df.to_csv(output_merged, index=False)
+    records = [dict(row) for row in load_data(dataset)]
+    if args.limit is not None:
+        records = records[:args.limit]
+    # For WikiArt, extract the first style from the type column (used in the prompt and the CSV)
+    if dataset == "wikiart":
+        for row in records:
+            if "type" in row:
+                row["type"] = extract_first_style(row["type"])
+
+    # Resume: skip every record already present in a worker log or partition CSV
+    results = read_results(dataset, desc_col_base)
+    pending = [row for row in records if str(row["id"]) not in results]
+    devices = args.devices or default_devices()
+    names = worker_names(devices)
+    print(f"{len(records) - len(pending)} done, {len(pending)} to generate on {len(devices)} workers ({', '.join(devices)})")
+
+    if pending:
+        manager = TaskBoardManager()
+        manager.start()
+        board = manager.TaskBoard(pending, args.lease_timeout)
+
+        processes = {}
+        for device, worker in zip(devices, names):
+            p = mp.Process(
+                target=run_worker,
+                args=(dataset, device, worker, board, os.path.join(DESCRIPTION_PATH, f"{dataset}_output_{worker}.jsonl")),
+                kwargs=dict(
+                    batch_size=args.batch_size,
+                    flush_every=args.flush_every,
+                    model_name=args.model,
+                    stub=args.stub,
+                    prefetch_workers=args.prefetch_workers,
+                ),
+            )
+            p.start()
+            processes[worker] = p
+
+        start = time.perf_counter()
+        progress = tqdm(total=len(pending), desc="descriptions")
+        while processes:
+            for worker, p in list(processes.items()):
+                p.join(timeout=0.5)
+                if p.is_alive():
+                    continue
+                del processes[worker]
+                if p.exitcode != 0:
+                    print(f"❌ Worker {worker} exited with code {p.exitcode}, returning its leases to the queue")
+                    board.release(worker)
+            done = board.done_count()
+            progress.update(done - progress.n)
+            progress.set_postfix(items_per_s=f"{done / (time.perf_counter() - start):.2f}")
+        progress.close()
+
+        done = board.done_count()
+        manager.shutdown()
+        if done < len(pending):
+            print(f"❌ {len(pending) - done} records left undescribed (all workers exited), rerun to resume")
+            sys.exit(1)
+
+        results = read_results(dataset, desc_col_base)
+
+    # Merge: records in dataset order, the same columns as the per-GPU partitions
+    write_output_csv(dataset, records, results, "description", output_merged)
     print(f"✅ Merged output saved to {output_merged}")
 
     # Generate SQL UPDATE file
@@ -5,6 +5,7 @@ import torch
 import numpy as np
 import argparse
 from sentence_transformers import SentenceTransformer
+from embeddingCache import cached_encode
 from concurrent.futures import ThreadPoolExecutor
 from qdrant_client import QdrantClient
 from qdrant_client.models import Distance, VectorParams, PointStruct
@@ -106,11 +107,12 @@ print("Loading model...")
 # Model will be loaded later based on command-line argument
 model0 = None
 model1 = None
+model0_name = None  # Hugging Face id, names the shared embedding cache
 
 
 def load_models(model_name):
     """Load embedding models based on the selected model name"""
-    global model0, model1
+    global model0, model1, model0_name
     
     model_map = {
         "qwen-4b": "Qwen/Qwen3-Embedding-4B",
@@ -145,6 +147,7 @@ def load_models(model_name):
     #     tokenizer_kwargs={"padding_side": "left"},
     # )
     model1 = model0  # Use the same model for both
+    model0_name = model_path
     print(f"Models loaded successfully!")
 
 
@@ -249,7 +252,7 @@ def generate_qdrant_single_vector(client, df, dataset_name, column_description,
     print(f"Encoding {len(descriptions)} descriptions...")
     
     # Encode all descriptions using only model0
-    embeddings = model0.encode(descriptions, normalize_embeddings=True, show_progress_bar=True).astype("float32")
+    embeddings = cached_encode(model0, descriptions, model0_name, show_progress_bar=True)
     
     # Setup collection
     setup_qdrant_collection(client, dataset_name, embeddings.shape[1], use_named_vectors=False)
@@ -304,7 +307,7 @@ def generate_qdrant_with_named_vectors(client, df, dataset_name, column_descript
     
     # Encode full descriptions using only model0
     print(f"Encoding {len(full_descriptions)} full descriptions...")
-    full_embeddings = model0.encode(full_descriptions, normalize_embeddings=True, show_progress_bar=True).astype("float32")
+    full_embeddings = cached_encode(model0, full_descriptions, model0_name, show_progress_bar=True)
     
     # Setup collection with named vectors support
     setup_qdrant_collection(client, dataset_name, full_embeddings.shape[1], use_named_vectors=True)
@@ -392,7 +395,7 @@ def generate_faiss_datasets(df, dataset_name, column_description, column_metadat
     print(f"Encoding {len(descriptions)} descriptions...")
     
     # Encode all descriptions using only model0
-    embeddings = model0.encode(descriptions, normalize_embeddings=True, show_progress_bar=True).astype("float32")
+    embeddings = cached_encode(model0, descriptions, model0_name, show_progress_bar=True)
 
     index_flat = faiss.IndexFlatIP(embeddings.shape[1])
     index_flat.add(embeddings)
@@ -417,6 +420,12 @@ def generate_faiss_datasets(df, dataset_name, column_description, column_metadat
     with open(os.path.join(PATH_OUTPUT, f"{dataset_name}_metadata.pkl"), "wb") as f:
         pickle.dump(metadata, f)
 
+    # Plain id mapping (row -> catalog id) for the backend's in-process FAISS search
+    np.save(
+        os.path.join(PATH_OUTPUT, f"{dataset_name}_ids.npy"),
+        metadata["id"].astype(str).to_numpy().astype("U"),
+    )
+
 
 def main():
     args = parse_args()
@@ -1,4 +1,6 @@
 import faiss, os
+import hashlib
+import json
 import pandas as pd
 import pickle
 import torch
@@ -6,9 +8,29 @@ import numpy as np
 import argparse
 import uuid
 from sentence_transformers import SentenceTransformer
+from embeddingCache import cached_encode
 from concurrent.futures import ThreadPoolExecutor
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client.models import (
+    Distance,
+    VectorParams,
+    PointStruct,
+    PointIdsList,
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    HnswConfigDiff,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    PayloadSchemaType,
+    SparseVectorParams,
+    SparseVector,
+    Modifier,
+)
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -20,6 +42,7 @@ os.environ['TRANSFORMERS_CACHE'] = LOCAL_CACHE_DIR
 os.environ['HF_DATASETS_CACHE'] = LOCAL_CACHE_DIR
 
 DESCRIPTION_PATH = os.path.join(SCRIPT_DIR, "outputs", "descriptions")
+DATA_PATH = os.path.join(SCRIPT_DIR, "..", "data")
 
 OUTPUT_FILES = {
     "semart": "output_merged_semart.csv",
@@ -27,8 +50,41 @@ OUTPUT_FILES = {
     "ipiranga": "output_merged_ipiranga.csv",
 }
 
-# Model will be loaded later based on command-line argument
+MODEL_NAME = "Qwen/Qwen3-Embedding-4B"
+EMBEDDING_FULL_DIM = 2560
+
+# Catalog columns copied into the payload so the API can filter inside the HNSW
+# search (SearchFilters in api_types/common.py). "type" comes with the descriptions,
+# the others are joined from the dataset CSVs.
+FILTER_FIELDS = {
+    "semart": ["art_school"],
+    "wikiart": [],
+    "ipiranga": ["period"],
+}
+DATASET_FILES = {
+    "semart": os.path.join(DATA_PATH, "SemArt", "SemArt.csv"),
+    "wikiart": os.path.join(DATA_PATH, "WikiArt", "WikiArt.csv"),
+    "ipiranga": os.path.join(DATA_PATH, "Ipiranga", "Ipiranga.csv"),
+}
+PAYLOAD_INDEX_FIELDS = ["id", "type", "art_school", "period"]
+
+# Sparse models for --sparse (fastembed). The named sparse vector uses the same key,
+# and the backend must run with the same SPARSE_MODEL / SPARSE_LANGUAGE.
+SPARSE_MODELS = {
+    "bm25": "Qdrant/bm25",
+    "splade": "prithivida/Splade_PP_en_v1",
+}
+
+# Ingest progress per collection, for --resume
+CHECKPOINT_PATH = os.path.join(SCRIPT_DIR, "outputs", "checkpoints")
+# Content hash and point count of every indexed item per collection, for --delta
+MANIFEST_PATH = os.path.join(SCRIPT_DIR, "outputs", "manifests")
+# Fixed namespace for the uuid5 point ids (catalog id + phrase index)
+POINT_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "artevoke/qdrant-points")
+
+# Models will be loaded later based on command-line arguments
 model = None
+sparse_model = None
 
 
 def parse_args():
@@ -56,6 +112,99 @@ def parse_args():
         action="store_true",
         help="Split descriptions into phrases - each phrase becomes a separate point pointing to the same item"
     )
+    parser.add_argument(
+        "--embedding-dim",
+        type=int,
+        choices=[256, 512, 1024, 2560],
+        default=EMBEDDING_FULL_DIM,
+        help="Matryoshka dimension to keep; reduced collections are named <dataset>_dim<N> (default: 2560)"
+    )
+    parser.add_argument(
+        "--quantization",
+        choices=["none", "scalar", "binary"],
+        default="none",
+        help="Vector quantization: int8 scalar or 1-bit binary, original vectors kept for rescoring (default: none)"
+    )
+    parser.add_argument(
+        "--hnsw-m",
+        type=int,
+        default=16,
+        help="HNSW edges per node (default: 16)"
+    )
+    parser.add_argument(
+        "--hnsw-ef-construct",
+        type=int,
+        default=100,
+        help="HNSW neighbours considered while building the graph (default: 100)"
+    )
+    parser.add_argument(
+        "--on-disk",
+        action="store_true",
+        help="Store original vectors and payloads on disk (quantized vectors stay in RAM)"
+    )
+    parser.add_argument(
+        "--sparse",
+        choices=["none", "bm25", "splade"],
+        default="none",
+        help="Also index a sparse vector per point for hybrid (dense + keyword) search (default: none)"
+    )
+    parser.add_argument(
+        "--sparse-language",
+        default="english",
+        help="Stopwords/stemmer language of the BM25 tokenizer (default: english)"
+    )
+    parser.add_argument(
+        "--store-descriptions",
+        action="store_true",
+        help="Also store the full description in each point payload (default: slim payload with only id and type; "
+             "the API reads descriptions from the MySQL catalog)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1000,
+        help="Description rows read, encoded and uploaded at a time (default: 1000)"
+    )
+    parser.add_argument(
+        "--upload-batch-size",
+        type=int,
+        default=256,
+        help="Points per upsert request (default: 256)"
+    )
+    parser.add_argument(
+        "--upload-workers",
+        type=int,
+        default=4,
+        help="Parallel upload threads (default: 4)"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted ingest from its checkpoint in outputs/checkpoints/ instead of recreating the collection"
+    )
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="Update the existing collection in place: embed only new or changed items (by the hashes in "
+             "outputs/manifests/) and delete removed ones. Falls back to a full build without a manifest"
+    )
+    parser.add_argument(
+        "--blue-green",
+        action="store_true",
+        help="Build into a new versioned collection (<collection>_v<N>) and switch the <collection> alias "
+             "to it once complete; with --delta the live version is updated in place"
+    )
+    parser.add_argument(
+        "--keep-versions",
+        type=int,
+        default=2,
+        help="Versions kept after a --blue-green switch, for rollback (default: 2)"
+    )
+    parser.add_argument(
+        "--rollback",
+        action="store_true",
+        help="Point each dataset's alias back at its previous version and exit"
+    )
     return parser.parse_args()
 
 
@@ -63,7 +212,7 @@ def load_model():
     """Load Qwen3-Embedding-4B model on cuda:1"""
     global model
     
-    model_path = "Qwen/Qwen3-Embedding-4B"
+    model_path = MODEL_NAME
     device = "cuda:1"
     
     print(f"Loading model: {model_path}...")
@@ -89,6 +238,21 @@ def load_model():
     print(f"Model loaded successfully on {device}!")
 
 
+def get_collection_name(dataset_name, embedding_dim):
+    """Same naming as the backend: full-size collections keep the dataset name"""
+    if embedding_dim == EMBEDDING_FULL_DIM:
+        return dataset_name
+    return f"{dataset_name}_dim{embedding_dim}"
+
+
+def truncate_embeddings(embeddings, embedding_dim):
+    """Keep the first embedding_dim Matryoshka dimensions and renormalize to unit length"""
+    if embedding_dim >= embeddings.shape[1]:
+        return embeddings
+    truncated = embeddings[:, :embedding_dim]
+    return (truncated / np.linalg.norm(truncated, axis=1, keepdims=True)).astype("float32")
+
+
 def split_description_into_phrases(description):
     """Split a description into phrases by periods, cleaning and filtering empty ones"""
     if pd.isna(description) or description == "":
@@ -100,8 +264,83 @@ def split_description_into_phrases(description):
     return phrases
 
 
-def setup_qdrant_collection(client, collection_name, vector_size):
-    """Create or recreate a Qdrant collection"""
+def build_quantization_config(quantization):
+    """Build the Qdrant quantization config for the --quantization option"""
+    if quantization == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if quantization == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def build_sparse_config(sparse):
+    """Named sparse vector config for the --sparse option; BM25 term weights need the IDF modifier"""
+    if sparse == "none":
+        return None
+    modifier = Modifier.IDF if sparse == "bm25" else None
+    return {sparse: SparseVectorParams(modifier=modifier)}
+
+
+def load_filter_source(dataset_name):
+    """Read the dataset's FILTER_FIELDS (by id) from its source CSV once, or None if unavailable"""
+    fields = FILTER_FIELDS[dataset_name]
+    if not fields:
+        return None
+    
+    source_path = DATASET_FILES[dataset_name]
+    if not os.path.exists(source_path):
+        print(f"Warning: {source_path} not found, payloads will not include {fields}")
+        return None
+    
+    source = pd.read_csv(source_path, usecols=lambda column: column in ["id"] + fields)
+    missing = [field for field in fields if field not in source.columns]
+    if missing:
+        print(f"Warning: {source_path} has no {missing} column")
+    
+    return source.drop_duplicates("id")
+
+
+def add_filter_fields(df, filter_source):
+    """Join the filter fields loaded by load_filter_source onto the descriptions by id"""
+    if filter_source is None:
+        return df
+    columns = ["id"] + [column for column in filter_source.columns if column != "id" and column not in df.columns]
+    if len(columns) == 1:
+        return df
+    return df.merge(filter_source[columns], on="id", how="left")
+
+
+def encode_sparse(texts, sparse, language="english"):
+    """Sparse document vectors with fastembed (BM25 term frequencies or SPLADE weights)"""
+    global sparse_model
+    
+    if sparse_model is None:
+        from fastembed import SparseTextEmbedding
+        
+        model_kwargs = {"language": language} if sparse == "bm25" else {}
+        sparse_model = SparseTextEmbedding(model_name=SPARSE_MODELS[sparse], **model_kwargs)
+    return [
+        SparseVector(indices=embedding.indices.tolist(), values=embedding.values.tolist())
+        for embedding in sparse_model.embed(texts, batch_size=256)
+    ]
+
+
+def setup_qdrant_collection(
+    client,
+    collection_name,
+    vector_size,
+    quantization="none",
+    hnsw_m=16,
+    hnsw_ef_construct=100,
+    on_disk=False,
+    sparse="none",
+):
+    """
+    Create or recreate a Qdrant collection with keyword payload indexes on id and the filter fields.
+    With a sparse model the dense vector stays unnamed and the sparse one is named after the model.
+    """
     try:
         client.delete_collection(collection_name)
         print(f"Deleted existing collection: {collection_name}")
@@ -110,82 +349,369 @@ def setup_qdrant_collection(client, collection_name, vector_size):
     
     client.create_collection(
         collection_name=collection_name,
-        vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE)
+        vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE, on_disk=on_disk),
+        hnsw_config=HnswConfigDiff(m=hnsw_m, ef_construct=hnsw_ef_construct),
+        quantization_config=build_quantization_config(quantization),
+        on_disk_payload=on_disk,
+        sparse_vectors_config=build_sparse_config(sparse),
     )
     
-    print(f"Created collection: {collection_name}")
+    for field_name in PAYLOAD_INDEX_FIELDS:
+        client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=PayloadSchemaType.KEYWORD,
+        )
+    
+    print(f"Created collection: {collection_name} "
+          f"(quantization={quantization}, m={hnsw_m}, ef_construct={hnsw_ef_construct}, on_disk={on_disk}, sparse={sparse})")
 
 
-def generate_qdrant_collection(client, df, dataset_name, split_phrases=False):
-    """Generate and upload data to Qdrant with phrase-level embeddings"""
-    
-    # Filter out rows with missing descriptions
-    df_filtered = df[df['description'].notna()].copy()
-    df_filtered = df_filtered[df_filtered['description'] != ""].copy()
-    
-    print(f"Processing {len(df_filtered)} items (filtered from {len(df)} total)...")
-    
-    points = []
-    all_texts_to_encode = []
-    point_metadata = []
+def point_id(item_id, phrase_index):
+    """Deterministic point id, so re-running or resuming an ingest overwrites instead of duplicating"""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{item_id}:{phrase_index}"))
+
+
+def build_chunk_items(df, split_phrases, filter_fields, store_descriptions):
+    """
+    (item id, texts to encode, payload) for each item of one chunk of descriptions.
+    Rows with missing or empty descriptions are skipped.
+    """
+    df = df[df['description'].notna() & (df['description'] != "")]
+    has_type = 'type' in df.columns
+    items = []
     
-    for idx, row in df_filtered.iterrows():
-        item_id = row['id']
-        item_type = row['type'] if 'type' in row else None
-        full_description = str(row['description'])
+    for row in df.itertuples(index=False):
+        item_id = row.id
+        item_type = row.type if has_type and pd.notna(row.type) else None
+        full_description = str(row.description)
         
         if split_phrases:
-            texts_to_encode = split_description_into_phrases(full_description)
-            if not texts_to_encode:
-                texts_to_encode = [full_description]
+            texts_to_encode = split_description_into_phrases(full_description) or [full_description]
         else:
             texts_to_encode = [full_description]
         
-        for text in texts_to_encode:
-            all_texts_to_encode.append(text)
-            point_metadata.append({
-                'id': item_id,
-                'type': item_type,
-                'description': full_description  # Always store the full original description
-            })
-    
-    print(f"Encoding {len(all_texts_to_encode)} texts...")
-    
-    embeddings = model.encode(all_texts_to_encode, normalize_embeddings=True, show_progress_bar=True).astype("float32")
-    
-    setup_qdrant_collection(client, dataset_name, embeddings.shape[1])
-    
-    for embedding, metadata in zip(embeddings, point_metadata):
-        point = PointStruct(
-            id=str(uuid.uuid4()),  
-            vector=embedding.tolist(),
-            payload={
-                'id': metadata['id'],  
-                'type': metadata['type'],
-                'description': metadata['description']  
-            }
-        )
-        points.append(point)
+        # Slim payload: the full description lives in the catalog, phrase points only point back to it
+        payload = {'id': item_id, 'type': item_type}
+        for field_name in filter_fields:
+            value = getattr(row, field_name, None)
+            if pd.notna(value):
+                payload[field_name] = str(value)
+        if store_descriptions:
+            payload['description'] = full_description
+        
+        items.append((item_id, texts_to_encode, payload))
     
-    batch_size = 100
-    for i in range(0, len(points), batch_size):
-        batch = points[i:i + batch_size]
+    return items
+
+
+def item_hash(texts, payload):
+    """Content hash of what gets indexed for an item: its texts and its payload"""
+    content = json.dumps([texts, payload], sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def load_json(path, settings):
+    """Checkpoint / manifest of a previous run with the same settings, or None"""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        content = json.load(f)
+    if content.get("settings") != settings:
+        print(f"{path} was written with other settings, ignoring it")
+        return None
+    return content
+
+
+def save_json(path, content):
+    """Write atomically so a crash mid-write never leaves a truncated file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(content, f)
+    os.replace(tmp_path, path)
+
+
+def build_index_settings(split_phrases, embedding_dim, sparse, store_descriptions):
+    """What the points depend on besides the item content; a manifest is only reused if these match"""
+    return {
+        "model": MODEL_NAME,
+        "split_phrases": split_phrases,
+        "embedding_dim": embedding_dim,
+        "sparse": sparse,
+        "store_descriptions": store_descriptions,
+    }
+
+
+def has_usable_manifest(collection_name, index_settings):
+    return load_json(os.path.join(MANIFEST_PATH, f"{collection_name}.json"), index_settings) is not None
+
+
+def get_alias_target(client, alias_name):
+    """Collection an alias points to, or None"""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == alias_name:
+            return alias.collection_name
+    return None
+
+
+def list_versions(client, alias_name):
+    """Version numbers of the <alias>_v<N> collections, ascending"""
+    prefix = f"{alias_name}_v"
+    return sorted(
+        int(collection.name[len(prefix):])
+        for collection in client.get_collections().collections
+        if collection.name.startswith(prefix) and collection.name[len(prefix):].isdigit()
+    )
+
+
+def switch_alias(client, alias_name, collection_name):
+    """
+    Point alias_name at collection_name. Deleting the old alias and creating the new one
+    go in one request, which Qdrant applies atomically: searches never see a missing collection.
+    """
+    operations = []
+    if get_alias_target(client, alias_name) is not None:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias_name)))
+    elif client.collection_exists(alias_name):
+        # Collection built before versioning: an alias can't share its name, so it has to go
+        print(f"Warning: deleting unversioned collection {alias_name} to replace it with an alias "
+              f"(searches fail until the alias is created)")
+        client.delete_collection(alias_name)
+    operations.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=collection_name, alias_name=alias_name)))
+    client.update_collection_aliases(change_aliases_operations=operations)
+    print(f"Alias {alias_name} -> {collection_name}")
+
+
+def prune_versions(client, alias_name, keep_versions):
+    """Delete all but the newest keep_versions versions, never the one the alias points to"""
+    target = get_alias_target(client, alias_name)
+    versions = list_versions(client, alias_name)
+    for version in versions[:max(len(versions) - keep_versions, 0)]:
+        collection_name = f"{alias_name}_v{version}"
+        if collection_name == target:
+            continue
+        client.delete_collection(collection_name)
+        for state_dir in (CHECKPOINT_PATH, MANIFEST_PATH):
+            state_path = os.path.join(state_dir, f"{collection_name}.json")
+            if os.path.exists(state_path):
+                os.remove(state_path)
+        print(f"Deleted old version {collection_name}")
+
+
+def rollback_alias(client, alias_name):
+    """Point the alias back at the newest version older than the current one"""
+    target = get_alias_target(client, alias_name)
+    if target is None:
+        print(f"{alias_name} is not an alias, nothing to roll back")
+        return
+    current = int(target.rsplit("_v", 1)[1])
+    older = [version for version in list_versions(client, alias_name) if version < current]
+    if not older:
+        print(f"No version of {alias_name} older than {target} is left")
+        return
+    switch_alias(client, alias_name, f"{alias_name}_v{older[-1]}")
+
+
+def select_build_collection(client, alias_name, index_settings, resume=False, delta=False):
+    """
+    Collection a --blue-green run writes to:
+    - delta: the live version, updated in place (if its manifest is usable)
+    - resume: the newest version if it is not live yet (an interrupted build)
+    - otherwise: a new version after the newest one
+    """
+    target = get_alias_target(client, alias_name)
+    if delta and target is not None and has_usable_manifest(target, index_settings):
+        return target
+    versions = list_versions(client, alias_name)
+    if resume and versions and f"{alias_name}_v{versions[-1]}" != target:
+        return f"{alias_name}_v{versions[-1]}"
+    return f"{alias_name}_v{versions[-1] + 1 if versions else 1}"
+
+
+def generate_qdrant_collection(
+    client,
+    file_path,
+    collection_name,
+    split_phrases=False,
+    embedding_dim=EMBEDDING_FULL_DIM,
+    collection_options=None,
+    store_descriptions=False,
+    sparse="none",
+    sparse_language="english",
+    filter_fields=(),
+    filter_source=None,
+    chunk_size=1000,
+    upload_batch_size=256,
+    upload_workers=4,
+    resume=False,
+    delta=False,
+):
+    """
+    Stream a descriptions CSV into a Qdrant collection with phrase-level embeddings.
+    The CSV is read chunk_size rows at a time; each chunk is encoded and uploaded in
+    batches by upload_workers threads while the next chunk is being encoded, so memory
+    stays bounded by one or two chunks.
+    After every chunk is uploaded, a checkpoint (CHECKPOINT_PATH/<collection>.json) records
+    how many chunks are done; with resume=True a run with the same settings continues
+    after the last completed chunk instead of recreating the collection.
+    The manifest (MANIFEST_PATH/<collection>.json) keeps a content hash and point count per
+    item. With delta=True the existing collection is updated in place: only new or changed
+    items are embedded and upserted, and the points of removed items (or of phrases an
+    item no longer has) are deleted. Without a usable manifest it falls back to a full build.
+    collection_options are forwarded to setup_qdrant_collection (quantization, HNSW, on-disk).
+    Payloads only hold the catalog id, type and the dataset's FILTER_FIELDS unless
+    store_descriptions is set.
+    With sparse != "none" every point also gets a sparse vector of the same text.
+    """
+    os.makedirs(CHECKPOINT_PATH, exist_ok=True)
+    os.makedirs(MANIFEST_PATH, exist_ok=True)
+    checkpoint_path = os.path.join(CHECKPOINT_PATH, f"{collection_name}.json")
+    manifest_path = os.path.join(MANIFEST_PATH, f"{collection_name}.json")
+    index_settings = build_index_settings(split_phrases, embedding_dim, sparse, store_descriptions)
+    settings = {
+        **index_settings,
+        "file": os.path.abspath(file_path),
+        "chunk_size": chunk_size,
+        "collection_options": collection_options or {},
+    }
+    
+    checkpoint = None
+    manifest = None
+    if delta:
+        manifest = load_json(manifest_path, index_settings)
+        if manifest is None or not client.collection_exists(collection_name):
+            print(f"No usable manifest for {collection_name}, doing a full build")
+            delta = False
+        else:
+            print(f"Delta update of {collection_name} against {len(manifest['items'])} indexed items")
+    if not delta:
+        checkpoint = load_json(checkpoint_path, settings) if resume else None
+        if checkpoint is None:
+            vector_size = min(embedding_dim, model.get_sentence_embedding_dimension())
+            setup_qdrant_collection(client, collection_name, vector_size, sparse=sparse, **(collection_options or {}))
+            checkpoint = {"settings": settings, "chunks_done": 0, "items": 0, "points": 0, "complete": False}
+            manifest = {"settings": index_settings, "items": {}}
+            save_json(checkpoint_path, checkpoint)
+            save_json(manifest_path, manifest)
+        elif checkpoint["complete"]:
+            print(f"{collection_name} already complete according to {checkpoint_path}, nothing to do")
+            return
+        else:
+            manifest = load_json(manifest_path, index_settings) or {"settings": index_settings, "items": {}}
+            print(f"Resuming {collection_name} after chunk {checkpoint['chunks_done']} "
+                  f"({checkpoint['items']} items, {checkpoint['points']} points already uploaded)")
+    
+    indexed_items = manifest["items"]  # str(item id) -> {"hash", "points"}
+    seen_items = set()
+    stats = {"indexed": 0, "unchanged": 0, "points": 0, "deleted_points": 0}
+    
+    def upload_batch(ids, vectors, payloads):
         client.upsert(
-            collection_name=dataset_name,
-            points=batch
+            collection_name=collection_name,
+            points=[
+                PointStruct(id=pid, vector=vector, payload=payload)
+                for pid, vector, payload in zip(ids, vectors, payloads)
+            ],
+            wait=True,
         )
-        print(f"Uploaded batch {i//batch_size + 1}/{(len(points) + batch_size - 1)//batch_size} for {dataset_name}")
     
-    print(f"Successfully uploaded {len(points)} points to collection {dataset_name}")
-    print(f"  - {len(df_filtered)} unique items")
-    print(f"  - {len(points)} total points (phrases/descriptions)")
+    def delete_points(ids):
+        client.delete(collection_name=collection_name, points_selector=PointIdsList(points=ids), wait=True)
+    
+    def finish_chunk(chunk_index, futures, updates, points):
+        for future in futures:
+            future.result()  # re-raise upload errors before the chunk is recorded
+        indexed_items.update(updates)
+        save_json(manifest_path, manifest)
+        if checkpoint is not None:
+            checkpoint["chunks_done"] = chunk_index + 1
+            checkpoint["items"] += len(updates)
+            checkpoint["points"] += points
+            save_json(checkpoint_path, checkpoint)
+        print(f"Chunk {chunk_index + 1} done: {stats['indexed']} items indexed, {stats['unchanged']} unchanged")
+    
+    pending = None
+    start_chunk = checkpoint["chunks_done"] if checkpoint is not None else 0
+    with ThreadPoolExecutor(max_workers=upload_workers) as executor:
+        for chunk_index, chunk in enumerate(pd.read_csv(file_path, chunksize=chunk_size)):
+            if chunk_index < start_chunk:
+                seen_items.update(str(item_id) for item_id in chunk['id'])
+                continue
+            
+            chunk = add_filter_fields(chunk, filter_source)
+            texts, point_ids, payloads, stale_ids, updates = [], [], [], [], {}
+            for item_id, item_texts, payload in build_chunk_items(chunk, split_phrases, filter_fields, store_descriptions):
+                key = str(item_id)
+                seen_items.add(key)
+                digest = item_hash(item_texts, payload)
+                previous = indexed_items.get(key)
+                if delta and previous is not None and previous["hash"] == digest:
+                    stats["unchanged"] += 1
+                    continue
+                
+                texts.extend(item_texts)
+                point_ids.extend(point_id(item_id, phrase_index) for phrase_index in range(len(item_texts)))
+                payloads.extend([payload] * len(item_texts))
+                # A changed description may have fewer phrases: drop the points past the new count
+                if previous is not None and previous["points"] > len(item_texts):
+                    stale_ids.extend(point_id(item_id, phrase_index) for phrase_index in range(len(item_texts), previous["points"]))
+                updates[key] = {"hash": digest, "points": len(item_texts)}
+            
+            futures = []
+            if texts:
+                embeddings = cached_encode(model, texts, MODEL_NAME, show_progress_bar=False)
+                embeddings = truncate_embeddings(embeddings, embedding_dim)
+                vectors = embeddings.tolist()
+                if sparse != "none":
+                    vectors = [
+                        {"": vector, sparse: sparse_vector}
+                        for vector, sparse_vector in zip(vectors, encode_sparse(texts, sparse, sparse_language))
+                    ]
+                for start in range(0, len(texts), upload_batch_size):
+                    end = start + upload_batch_size
+                    futures.append(executor.submit(upload_batch, point_ids[start:end], vectors[start:end], payloads[start:end]))
+            if stale_ids:
+                futures.append(executor.submit(delete_points, stale_ids))
+            stats["indexed"] += len(updates)
+            stats["points"] += len(texts)
+            stats["deleted_points"] += len(stale_ids)
+            
+            # Encoding of this chunk overlapped the previous chunk's uploads; wait for those now
+            if pending is not None:
+                finish_chunk(*pending)
+            pending = (chunk_index, futures, updates, len(texts))
+        
+        if pending is not None:
+            finish_chunk(*pending)
+    
+    # Items gone from the CSV (or whose description became empty)
+    removed_items = [key for key in indexed_items if key not in seen_items]
+    removed_ids = [
+        point_id(key, phrase_index)
+        for key in removed_items
+        for phrase_index in range(indexed_items[key]["points"])
+    ]
+    for start in range(0, len(removed_ids), upload_batch_size):
+        delete_points(removed_ids[start:start + upload_batch_size])
+    for key in removed_items:
+        del indexed_items[key]
+    stats["deleted_points"] += len(removed_ids)
+    save_json(manifest_path, manifest)
+    
+    if checkpoint is not None:
+        checkpoint["complete"] = True
+        save_json(checkpoint_path, checkpoint)
+    
+    print(f"Successfully updated collection {collection_name}")
+    print(f"  - {stats['indexed']} items embedded and uploaded ({stats['points']} points)")
+    print(f"  - {stats['unchanged']} items unchanged")
+    print(f"  - {len(removed_items)} items removed, {stats['deleted_points']} points deleted")
+    print(f"  - {len(indexed_items)} items in the collection")
 
 
 def main():
     args = parse_args()
     
-    load_model()
-    
     print(f"Connecting to Qdrant at {args.qdrant_host}:{args.qdrant_port}")
     client = QdrantClient(host=args.qdrant_host, port=args.qdrant_port)
     
@@ -196,6 +722,13 @@ def main():
         print(f"Failed to connect to Qdrant: {e}")
         return
     
+    if args.rollback:
+        for name in args.datasets:
+            rollback_alias(client, get_collection_name(name, args.embedding_dim))
+        return
+    
+    load_model()
+    
     for name in args.datasets:
         if name not in OUTPUT_FILES:
             print(f"Unknown dataset: {name}")
@@ -203,7 +736,7 @@ def main():
             
         file_name = OUTPUT_FILES[name]
         
-        collection_name = f"{name}" if args.split_phrases else name
+        collection_name = get_collection_name(name, args.embedding_dim)
         
         print(f"\n{'='*60}")
         print(f"Processing {name}...")
@@ -211,6 +744,11 @@ def main():
             print("  Mode: Split descriptions into phrases")
         else:
             print("  Mode: Use full descriptions")
+        print(f"  Embedding dim: {args.embedding_dim} -> collection {collection_name}")
+        print(f"  Quantization: {args.quantization}, HNSW m={args.hnsw_m}, ef_construct={args.hnsw_ef_construct}, on-disk={args.on_disk}")
+        payload_fields = ", ".join(["id", "type"] + FILTER_FIELDS[name] + (["description"] if args.store_descriptions else []))
+        print(f"  Payload: {payload_fields}")
+        print(f"  Sparse vectors: {args.sparse}")
         print(f"{'='*60}\n")
         
         # Load the generated descriptions
@@ -219,22 +757,50 @@ def main():
             print(f"File not found: {file_path}")
             continue
             
-        df = pd.read_csv(file_path)
-        
-        # Ensure required columns exist
+        # Ensure required columns exist (header only, the file is streamed in chunks)
+        columns = pd.read_csv(file_path, nrows=0).columns
         required_columns = ['id', 'description']
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        missing_columns = [col for col in required_columns if col not in columns]
         if missing_columns:
             print(f"Warning: Missing required columns {missing_columns} in {file_name}")
             continue
         
+        # Blue/green: the API queries the alias, which only moves once the new version is complete
+        alias_name = None
+        if args.blue_green:
+            alias_name = collection_name
+            index_settings = build_index_settings(args.split_phrases, args.embedding_dim, args.sparse, args.store_descriptions)
+            collection_name = select_build_collection(client, alias_name, index_settings, args.resume, args.delta)
+            print(f"Building {collection_name} (alias {alias_name} -> {get_alias_target(client, alias_name)})")
+        
         # Generate Qdrant collection
         generate_qdrant_collection(
             client, 
-            df, 
+            file_path, 
             collection_name,
-            split_phrases=args.split_phrases
+            split_phrases=args.split_phrases,
+            embedding_dim=args.embedding_dim,
+            collection_options={
+                "quantization": args.quantization,
+                "hnsw_m": args.hnsw_m,
+                "hnsw_ef_construct": args.hnsw_ef_construct,
+                "on_disk": args.on_disk,
+            },
+            store_descriptions=args.store_descriptions,
+            sparse=args.sparse,
+            sparse_language=args.sparse_language,
+            filter_fields=FILTER_FIELDS[name],
+            filter_source=load_filter_source(name),
+            chunk_size=args.chunk_size,
+            upload_batch_size=args.upload_batch_size,
+            upload_workers=args.upload_workers,
+            resume=args.resume,
+            delta=args.delta,
         )
+        
+        if alias_name is not None and get_alias_target(client, alias_name) != collection_name:
+            switch_alias(client, alias_name, collection_name)
+            prune_versions(client, alias_name, args.keep_versions)
     
     print("\n" + "="*60)
     print("Processing complete!")
@@ -4,11 +4,15 @@ import faiss
 import re
 import pickle
 import os
+import sys
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(SCRIPT_DIR, "..", "..", "scripts")
+sys.path.append(SCRIPTS_DIR)
+from embeddingCache import cached_encode
 
 SAVE_DIR = os.path.join(SCRIPT_DIR, "test_text_seg/")
 os.makedirs(SAVE_DIR, exist_ok=True)
@@ -26,7 +30,8 @@ Instead of going straight to the house, I took a walk through the village. The s
 When I got to the house, no one was home yet. I sat on the front step and opened the envelope I had brought. Inside was a postcard from my girlfriend at the time. She was smiling in the photo, standing in a wide field with hills in the background and flowers all around. On the back, she had written, 'Wish you were here. Enjoy your vacations in your uncle house.'
 """
 
-model = SentenceTransformer("thenlper/gte-large", device="cuda:1")
+MODEL_NAME = "thenlper/gte-large"
+model = SentenceTransformer(MODEL_NAME, device="cuda:1")
 res = faiss.StandardGpuResources()
 
 
@@ -37,7 +42,7 @@ def do_faiss_database():
     image_files = df["image_file"].tolist()
 
     print("Generating embeddings...")
-    db_embeddings = model.encode(descriptions, convert_to_numpy=True, normalize_embeddings=True)
+    db_embeddings = cached_encode(model, descriptions, MODEL_NAME)
 
     with open(os.path.join(SAVE_DIR, "image_files.pkl"), "wb") as f:
         pickle.dump(image_files, f)
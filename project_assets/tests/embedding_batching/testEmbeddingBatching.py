@@ -0,0 +1,111 @@
+import time, os, sys
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(SCRIPT_DIR, "..", "..", "..", "webapp", "FastAPI")
+sys.path.append(BACKEND_DIR)
+from clients.embedding_batcher import EmbeddingBatcher
+from utils import metrics
+
+# Configuration
+N_REQUESTS = 400
+TEXTS_PER_REQUEST = [1, 8]  # /search-images sends 1 text, /select-images-per-section up to 8
+CONCURRENCY_LEVELS = [1, 8, 32]
+MAX_WAIT_MS = [0, 2, 5, 10]
+MAX_BATCH_SIZE = 32
+DIMENSION = 2560
+
+# Simulated provider: fixed per-call overhead plus a small per-text cost
+CALL_LATENCY_MS = 40
+PER_TEXT_LATENCY_MS = 0.5
+
+calls = []
+
+
+def simulated_encode(texts):
+    calls.append(len(texts))
+    time.sleep((CALL_LATENCY_MS + PER_TEXT_LATENCY_MS * len(texts)) / 1000)
+    return np.ones((len(texts), DIMENSION), dtype=np.float32)
+
+
+def deepinfra_encode(texts):
+    from clients.embedding_client import _encode_remote
+    calls.append(len(texts))
+    return _encode_remote(texts)
+
+
+def run(encode, texts_per_request, concurrency, max_wait_ms):
+    """Fire N_REQUESTS encode requests from `concurrency` threads, with and without batching."""
+    texts = [f"Memória número {i}" for i in range(texts_per_request)]
+
+    if max_wait_ms is None:
+        def one(_):
+            start = time.perf_counter()
+            encode(texts)
+            return time.perf_counter() - start
+    else:
+        batcher = EmbeddingBatcher(encode, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=max_wait_ms,
+                                   max_concurrency=4, name=f"bench_{texts_per_request}_{concurrency}_{max_wait_ms}")
+
+        def one(_):
+            start = time.perf_counter()
+            batcher.encode(texts)
+            return time.perf_counter() - start
+
+    calls.clear()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = np.array(list(executor.map(one, range(N_REQUESTS))))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "Texts/request": texts_per_request,
+        "Concurrency": concurrency,
+        "Max wait (ms)": "no batching" if max_wait_ms is None else max_wait_ms,
+        "API calls": len(calls),
+        "Mean texts/call": round(float(np.mean(calls)), 2),
+        "Throughput (req/s)": round(N_REQUESTS / elapsed, 1),
+        "p50 (ms)": round(float(np.percentile(latencies, 50)) * 1000, 2),
+        "p95 (ms)": round(float(np.percentile(latencies, 95)) * 1000, 2),
+    }
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) < 2:
+        print("Usage: python testEmbeddingBatching.py <mode>")
+        print("  mode: 'simulated' (fake provider latency) or 'deepinfra' (real API, needs DEEPINFRA_API_KEY)")
+        sys.exit(1)
+
+    mode = sys.argv[1]
+    if mode == "simulated":
+        encode = simulated_encode
+    elif mode == "deepinfra":
+        encode = deepinfra_encode
+        N_REQUESTS = 100
+    else:
+        print(f"Unknown mode: {mode}")
+        sys.exit(1)
+
+    global_results = []
+    for texts_per_request in TEXTS_PER_REQUEST:
+        for concurrency in CONCURRENCY_LEVELS:
+            for max_wait_ms in [None] + MAX_WAIT_MS:
+                result = run(encode, texts_per_request, concurrency, max_wait_ms)
+                print(result)
+                global_results.append(result)
+
+    df_results = pd.DataFrame(global_results)
+    print("\n" + "=" * 80)
+    print("EMBEDDING BATCHING RESULTS")
+    print("=" * 80)
+    print(df_results)
+
+    print("\nBatch-size histogram (8 texts/request, concurrency 32, max wait 5 ms):")
+    print(metrics.snapshot()["metrics"]["bench_8_32_5_batch_size"]["buckets"])
+
+    output_file = os.path.join(SCRIPT_DIR, f"embedding_batching_results_{mode}.csv")
+    df_results.to_csv(output_file, index=False)
+    print(f"\nResults saved to: {output_file}")
@@ -1,4 +1,5 @@
 import os
+import sys
 import time
 import torch
 import faiss
@@ -15,6 +16,9 @@ K_values = [1, 3, 6, 10]
 
 # Directory and files
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(SCRIPT_DIR, "..", "..", "scripts")
+sys.path.append(SCRIPTS_DIR)
+from embeddingCache import cached_encode
 FAISS_DIR = os.path.join(SCRIPT_DIR, "FAISS")
 
 # Directory of the images
@@ -129,7 +133,13 @@ def load_embedding_model(name):
         return SentenceTransformer(model_names[name])
 
 
-def generate_embeddings(df, model, generate_faiss):
+def cache_name(name):
+    """Shared embedding cache key: the Hugging Face id, or the OpenCLIP architecture + weights"""
+    model_id = model_names[name]
+    return model_id if isinstance(model_id, str) else "-".join(model_id)
+
+
+def generate_embeddings(df, model, generate_faiss, name):
     print("Generating embeddings...")
     original_description = df["original_description"].tolist()
     generated_descriptions = df["generated_description"].tolist()
@@ -137,11 +147,12 @@ def generate_embeddings(df, model, generate_faiss):
     image_paths = df["IMAGE_FILE_FULLPATH"].tolist()
 
     # Step 1: Get unnormalized embeddings
-    original_emb = model.encode(original_description, normalize_embeddings=True)
+    # Cached text embeddings are reused across runs; set EMBEDDING_CACHE=off to time the encoding
+    original_emb = cached_encode(model, original_description, cache_name(name))
     time2 = time.time()
     generated_embs = None
     if generate_faiss:
-        generated_embs = model.encode(generated_descriptions, normalize_embeddings=True)
+        generated_embs = cached_encode(model, generated_descriptions, cache_name(name))
     time3 = time.time()
 
     image_emb = None
@@ -406,7 +417,7 @@ if __name__ == "__main__":
         generate_faiss = True
         model = load_embedding_model(name)
         original_emb, generated_embs, image_emb = generate_embeddings(
-            df, model, generate_faiss
+            df, model, generate_faiss, name
         )
 
         if generate_faiss:
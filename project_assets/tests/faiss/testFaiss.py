@@ -11,6 +11,9 @@ nvmlInit()
 K_values = [1, 3, 6]
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(SCRIPT_DIR, "..", "..", "scripts")
+sys.path.append(SCRIPTS_DIR)
+from embeddingCache import cached_encode
 
 DATA_PATH = os.path.join(SCRIPT_DIR, "..", "..", "scripts", "outputs", "descriptions", "output_merged_semart.csv")
 RETRIEVAL_DIR = os.path.join(SCRIPT_DIR, "retrieval_examples")
@@ -20,7 +23,8 @@ DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..",
 IMAGE_DIR = os.path.join(DATA_DIR, "Images")
 
 print("Loading model...")
-model = SentenceTransformer("thenlper/gte-large")
+MODEL_NAME = "thenlper/gte-large"
+model = SentenceTransformer(MODEL_NAME)
 
 subset_sizes = [1000, 5000, 10000, 15000]
 
@@ -128,8 +132,8 @@ if __name__ == "__main__":
     mode = sys.argv[1]
 
     print("Encondding descriptions...")
-    original_emb_all = model.encode(df["original_description"].tolist(), normalize_embeddings=True).astype("float32")
-    generated_emb_all = model.encode(df["generated_description"].tolist(), normalize_embeddings=True).astype("float32")
+    original_emb_all = cached_encode(model, df["original_description"].tolist(), MODEL_NAME)
+    generated_emb_all = cached_encode(model, df["generated_description"].tolist(), MODEL_NAME)
     
     if mode == "cpu":
         for size in subset_sizes:
@@ -0,0 +1,196 @@
+import time, os, sys
+import pandas as pd
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+from fastembed import SparseTextEmbedding
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams, PointStruct, SparseVectorParams, SparseVector, Modifier
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(SCRIPT_DIR, "..", "..", "..", "webapp", "FastAPI")
+sys.path.append(BACKEND_DIR)
+from clients.vector_backends import SearchHit
+from utils.embeddings import reciprocal_rank_fusion
+
+# Configuration
+K_values = [1, 3, 6]
+K = max(K_values)
+
+DATA_PATH = os.path.join(SCRIPT_DIR, "..", "..", "scripts", "outputs", "descriptions", "output_merged_semart.csv")
+SEMART_PATH = os.path.join(SCRIPT_DIR, "..", "..", "data", "SemArt", "SemArt.csv")
+
+# Set up local cache directory for HuggingFace models
+CACHE_DIR = os.path.join(SCRIPT_DIR, "model_cache")
+os.makedirs(CACHE_DIR, exist_ok=True)
+os.environ['HF_HOME'] = CACHE_DIR
+os.environ['TRANSFORMERS_CACHE'] = CACHE_DIR
+
+# Same models as generateQdrantCollection.py --sparse bm25
+MODEL_NAME = "Qwen/Qwen3-Embedding-4B"
+SPARSE_MODEL_NAME = "Qdrant/bm25"
+SPARSE_NAME = "bm25"
+COLLECTION_NAME = "semart_hybrid"
+subset_size = 5000
+
+# (dense k, sparse k); sparse k = 0 is the dense-only baseline
+configs = [(6, 0), (6, 12), (12, 12), (24, 12), (6, 24)]
+
+
+def compute_recall(top_ids, size):
+    """Query i is a hit at k if item i (its own generated description) is in the top-k"""
+    recalls = {}
+    for k in K_values:
+        correct = sum(str(i) in top_ids[i][:k] for i in range(size))
+        recalls[f"Recall@{k}"] = correct / size
+    return recalls
+
+
+def build_collection(client, dense_emb, sparse_emb):
+    try:
+        client.delete_collection(collection_name=COLLECTION_NAME)
+    except Exception:
+        pass
+
+    client.create_collection(
+        collection_name=COLLECTION_NAME,
+        vectors_config=VectorParams(size=dense_emb.shape[1], distance=Distance.COSINE),
+        sparse_vectors_config={SPARSE_NAME: SparseVectorParams(modifier=Modifier.IDF)},
+    )
+
+    batch_size = 100
+    for batch_start in range(0, len(dense_emb), batch_size):
+        batch_end = min(batch_start + batch_size, len(dense_emb))
+        client.upsert(
+            collection_name=COLLECTION_NAME,
+            points=[
+                PointStruct(
+                    id=i,
+                    vector={"": dense_emb[i].tolist(), SPARSE_NAME: sparse_emb[i]},
+                    payload={"id": str(i)},
+                )
+                for i in range(batch_start, batch_end)
+            ],
+            wait=True,
+        )
+
+
+def run_config(client, sparse_model, dense_queries, query_texts, dense_k, sparse_k):
+    """Same flow as utils/embeddings._search_hits, timed step by step (sequential here)"""
+    top_ids = []
+    total, dense_times, sparse_times, fusion_times = [], [], [], []
+    for i in range(len(dense_queries)):
+        start = time.perf_counter()
+        dense = client.query_points(
+            collection_name=COLLECTION_NAME, query=dense_queries[i].tolist(), limit=max(dense_k, K), with_payload=["id"]
+        ).points
+        dense_hits = [SearchHit(p.payload["id"], p.score) for p in dense]
+        dense_done = time.perf_counter()
+
+        if sparse_k == 0:
+            hits = dense_hits[:K]
+            sparse_done = fusion_done = dense_done
+        else:
+            embedding = next(iter(sparse_model.query_embed(query_texts[i])))
+            sparse = client.query_points(
+                collection_name=COLLECTION_NAME,
+                query=SparseVector(indices=embedding.indices.tolist(), values=embedding.values.tolist()),
+                using=SPARSE_NAME,
+                limit=max(sparse_k, K),
+                with_payload=["id"],
+            ).points
+            sparse_hits = [SearchHit(p.payload["id"], p.score) for p in sparse]
+            sparse_done = time.perf_counter()
+            hits = reciprocal_rank_fusion([dense_hits, sparse_hits], K)
+            fusion_done = time.perf_counter()
+
+        top_ids.append([hit.id for hit in hits])
+        total.append(fusion_done - start)
+        dense_times.append(dense_done - start)
+        sparse_times.append(sparse_done - dense_done)
+        fusion_times.append(fusion_done - sparse_done)
+
+    return {
+        "Mode": "dense" if sparse_k == 0 else "hybrid",
+        "Dense k": dense_k,
+        "Sparse k": sparse_k,
+        "Latency (ms/query)": round(np.mean(total) * 1000, 3),
+        "p95 Latency (ms)": round(np.percentile(total, 95) * 1000, 3),
+        "Dense (ms)": round(np.mean(dense_times) * 1000, 3),
+        "Sparse encode+search (ms)": round(np.mean(sparse_times) * 1000, 3),
+        "Fusion (ms)": round(np.mean(fusion_times) * 1000, 4),
+        **{k: round(v, 3) for k, v in compute_recall(top_ids, len(dense_queries)).items()},
+    }
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) < 2:
+        print("Usage: python testHybrid.py <mode>")
+        print("  mode: 'local' (Docker on localhost:6333) or 'memory' (in-memory mode)")
+        sys.exit(1)
+
+    mode = sys.argv[1]
+
+    if mode == "local":
+        print("Connecting to Qdrant on localhost:6333...")
+        client = QdrantClient(host="localhost", port=6333, timeout=120)
+    elif mode == "memory":
+        print("Using Qdrant in-memory mode...")
+        client = QdrantClient(":memory:")
+    else:
+        print(f"Unknown mode: {mode}")
+        sys.exit(1)
+
+    print("Loading descriptions...")
+    df_gen = pd.read_csv(DATA_PATH)
+    df_orig = pd.read_csv(SEMART_PATH)
+    df = pd.merge(df_gen, df_orig[['id', 'description']], on='id', suffixes=('_gen', '_orig'))
+    df = df.iloc[:subset_size].reset_index(drop=True)
+    print(f"Loaded {len(df)} samples after merge")
+
+    print(f"Loading models {MODEL_NAME} and {SPARSE_MODEL_NAME}...")
+    model = SentenceTransformer(
+        MODEL_NAME,
+        cache_folder=CACHE_DIR,
+        device="cuda" if torch.cuda.is_available() else "cpu",
+        tokenizer_kwargs={"padding_side": "left"},
+    )
+    sparse_model = SparseTextEmbedding(model_name=SPARSE_MODEL_NAME, cache_dir=CACHE_DIR)
+
+    # Generated descriptions are indexed, original SemArt descriptions are the queries
+    print("Encoding descriptions...")
+    generated_texts = df["description_gen"].tolist()
+    query_texts = df["description_orig"].tolist()
+    dense_index = model.encode(generated_texts, normalize_embeddings=True).astype("float32")
+    dense_queries = model.encode(query_texts, normalize_embeddings=True).astype("float32")
+    sparse_index = [
+        SparseVector(indices=e.indices.tolist(), values=e.values.tolist())
+        for e in sparse_model.embed(generated_texts, batch_size=256)
+    ]
+
+    print(f"Uploading {len(df)} dense + sparse points...")
+    build_collection(client, dense_index, sparse_index)
+
+    global_results = []
+    for dense_k, sparse_k in configs:
+        print(f"\nTesting dense k={dense_k}, sparse k={sparse_k}...")
+        result = run_config(client, sparse_model, dense_queries, query_texts, dense_k, sparse_k)
+        result["# Samples"] = len(df)
+        print(result)
+        global_results.append(result)
+
+    try:
+        client.delete_collection(collection_name=COLLECTION_NAME)
+    except Exception:
+        pass
+
+    df_results = pd.DataFrame(global_results)
+    print("\n" + "="*80)
+    print("HYBRID RESULTS - DENSE vs DENSE + BM25 (RRF)")
+    print("="*80)
+    print(df_results)
+
+    output_file = os.path.join(SCRIPT_DIR, f"qdrant_results_{mode}_hybrid.csv")
+    df_results.to_csv(output_file, index=False)
+    print(f"\nResults saved to: {output_file}")
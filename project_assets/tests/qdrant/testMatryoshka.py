@@ -0,0 +1,170 @@
+import time, os, sys
+import pandas as pd
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams, PointStruct, SearchParams
+
+# Configuration
+K_values = [1, 3, 6]
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DATA_PATH = os.path.join(SCRIPT_DIR, "..", "..", "scripts", "outputs", "descriptions", "output_merged_semart.csv")
+SEMART_PATH = os.path.join(SCRIPT_DIR, "..", "..", "data", "SemArt", "SemArt.csv")
+
+# Set up local cache directory for HuggingFace models
+CACHE_DIR = os.path.join(SCRIPT_DIR, "model_cache")
+os.makedirs(CACHE_DIR, exist_ok=True)
+os.environ['HF_HOME'] = CACHE_DIR
+os.environ['TRANSFORMERS_CACHE'] = CACHE_DIR
+
+# Same model and Matryoshka sizes as generateQdrantCollection.py --embedding-dim
+MODEL_NAME = "Qwen/Qwen3-Embedding-4B"
+embedding_dims = [256, 512, 1024, 2560]
+subset_size = 15000
+hnsw_config = {"m": 16, "ef_construct": 100, "ef_search": 64}
+
+
+def truncate_embeddings(embeddings, embedding_dim):
+    """Keep the first embedding_dim dimensions and renormalize (as in generateQdrantCollection.py)"""
+    truncated = embeddings[:, :embedding_dim]
+    return (truncated / np.linalg.norm(truncated, axis=1, keepdims=True)).astype("float32")
+
+
+def compute_recall(search_results, size):
+    """Query i is a hit at k if point i (its own generated description) is in the top-k"""
+    recalls = {}
+    for k in K_values:
+        correct = sum(
+            any(point.id == i for point in search_results[i][:k])
+            for i in range(size)
+        )
+        recalls[f"Recall@{k}"] = correct / size
+    return recalls
+
+
+def test_dimension(client, embedding_dim, original_emb_full, generated_emb_full):
+    original_emb = truncate_embeddings(original_emb_full, embedding_dim)
+    generated_emb = truncate_embeddings(generated_emb_full, embedding_dim)
+    size = len(generated_emb)
+    collection_name = f"semart_matryoshka_dim{embedding_dim}"
+
+    try:
+        client.delete_collection(collection_name=collection_name)
+    except Exception:
+        pass
+
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(size=embedding_dim, distance=Distance.COSINE),
+        hnsw_config={"m": hnsw_config["m"], "ef_construct": hnsw_config["ef_construct"]},
+    )
+
+    print(f"Uploading {size} vectors of dim {embedding_dim}...")
+    upload_start = time.time()
+    batch_size = 100
+    for batch_start in range(0, size, batch_size):
+        batch_end = min(batch_start + batch_size, size)
+        client.upsert(
+            collection_name=collection_name,
+            points=[
+                PointStruct(id=i, vector=generated_emb[i].tolist())
+                for i in range(batch_start, batch_end)
+            ],
+            wait=True,
+        )
+    upload_time = time.time() - upload_start
+
+    print(f"Searching {size} queries...")
+    search_results = []
+    latencies = []
+    for i in range(size):
+        query_start = time.time()
+        results = client.query_points(
+            collection_name=collection_name,
+            query=original_emb[i].tolist(),
+            limit=max(K_values),
+            search_params=SearchParams(hnsw_ef=hnsw_config["ef_search"]),
+        )
+        latencies.append(time.time() - query_start)
+        search_results.append(results.points)
+
+    recall = compute_recall(search_results, size)
+
+    # Vectors + approximate HNSW links (m * 2 links of 4 bytes per vector)
+    vector_memory_mb = generated_emb.nbytes / (1024 * 1024)
+    hnsw_overhead_mb = (hnsw_config["m"] * 2 * 4 * size) / (1024 * 1024)
+
+    try:
+        client.delete_collection(collection_name=collection_name)
+    except Exception:
+        pass
+
+    return {
+        "Dim": embedding_dim,
+        "Latency (ms/query)": round(np.mean(latencies) * 1000, 3),
+        "p95 Latency (ms)": round(np.percentile(latencies, 95) * 1000, 3),
+        "Upload Time (s)": round(upload_time, 2),
+        "Memory (MB)": round(vector_memory_mb + hnsw_overhead_mb, 2),
+        **{k: round(v, 3) for k, v in recall.items()}
+    }
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) < 2:
+        print("Usage: python testMatryoshka.py <mode>")
+        print("  mode: 'local' (Docker on localhost:6333) or 'memory' (in-memory mode)")
+        sys.exit(1)
+
+    mode = sys.argv[1]
+
+    if mode == "local":
+        print("Connecting to Qdrant on localhost:6333...")
+        client = QdrantClient(host="localhost", port=6333, timeout=120)
+    elif mode == "memory":
+        print("Using Qdrant in-memory mode...")
+        client = QdrantClient(":memory:")
+    else:
+        print(f"Unknown mode: {mode}")
+        sys.exit(1)
+
+    print("Loading descriptions...")
+    df_gen = pd.read_csv(DATA_PATH)
+    df_orig = pd.read_csv(SEMART_PATH)
+    df = pd.merge(df_gen, df_orig[['id', 'description']], on='id', suffixes=('_gen', '_orig'))
+    df = df.iloc[:subset_size].reset_index(drop=True)
+    print(f"Loaded {len(df)} samples after merge")
+
+    print(f"Loading model {MODEL_NAME}...")
+    model = SentenceTransformer(
+        MODEL_NAME,
+        cache_folder=CACHE_DIR,
+        device="cuda" if torch.cuda.is_available() else "cpu",
+        tokenizer_kwargs={"padding_side": "left"},
+    )
+
+    # Encode once at full size, every smaller dimension is a truncation of it
+    print("Encoding descriptions...")
+    original_emb_full = model.encode(df["description_orig"].tolist(), normalize_embeddings=True).astype("float32")
+    generated_emb_full = model.encode(df["description_gen"].tolist(), normalize_embeddings=True).astype("float32")
+
+    global_results = []
+    for embedding_dim in embedding_dims:
+        print(f"\n{'='*80}")
+        print(f"Testing embedding dim {embedding_dim}")
+        print(f"{'='*80}")
+        result = test_dimension(client, embedding_dim, original_emb_full, generated_emb_full)
+        result["# Samples"] = len(df)
+        global_results.append(result)
+
+    df_results = pd.DataFrame(global_results)
+    print("\n" + "="*80)
+    print("MATRYOSHKA RESULTS - RECALL vs MEMORY vs LATENCY")
+    print("="*80)
+    print(df_results[["Dim", "# Samples", "Latency (ms/query)", "p95 Latency (ms)", "Memory (MB)", "Recall@1", "Recall@3", "Recall@6"]])
+
+    output_file = os.path.join(SCRIPT_DIR, f"qdrant_results_{mode}_matryoshka.csv")
+    df_results.to_csv(output_file, index=False)
+    print(f"\nResults saved to: {output_file}")
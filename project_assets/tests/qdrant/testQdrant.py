@@ -5,11 +5,25 @@ import numpy as np
 from PIL import Image
 from sentence_transformers import SentenceTransformer
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, SearchParams
+from qdrant_client.models import (
+    Distance,
+    VectorParams,
+    PointStruct,
+    SearchParams,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+)
 
 # Configuration
 K_values = [1, 3, 6]
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(SCRIPT_DIR, "..", "..", "scripts")
+sys.path.append(SCRIPTS_DIR)
+from embeddingCache import cached_encode
 
 DATA_PATH = os.path.join(SCRIPT_DIR, "..", "..","scripts", "outputs", "descriptions", "output_merged_semart.csv")
 RETRIEVAL_DIR = os.path.join(SCRIPT_DIR, "retrieval_examples")
@@ -26,15 +40,24 @@ os.environ['TRANSFORMERS_CACHE'] = CACHE_DIR
 
 print("Loading model...")
 print(f"Using cache directory: {CACHE_DIR}")
-model = SentenceTransformer("thenlper/gte-large", cache_folder=CACHE_DIR)
+MODEL_NAME = "thenlper/gte-large"
+model = SentenceTransformer(MODEL_NAME, cache_folder=CACHE_DIR)
 
 subset_sizes = [1000, 5000, 10000, 15000]
 
 # Multiple HNSW configurations to test (like different FAISS indices)
 # Each configuration trades off speed vs accuracy
+# Quantized configurations keep the original vectors (optionally on disk) and rescore
+# the oversampled candidates with them, mirroring generateQdrantCollection.py --quantization
 hnsw_configs = [
     {"name": "HNSW-High-Recall", "m": 32, "ef_construct": 200, "ef_search": 128, "color": "blue"},
     {"name": "HNSW-Balanced", "m": 16, "ef_construct": 100, "ef_search": 64, "color": "red"},
+    {"name": "HNSW-Scalar-Int8", "m": 16, "ef_construct": 100, "ef_search": 64, "color": "green",
+     "quantization": "scalar", "oversampling": 2.0},
+    {"name": "HNSW-Scalar-Int8-OnDisk", "m": 16, "ef_construct": 100, "ef_search": 64, "color": "orange",
+     "quantization": "scalar", "oversampling": 2.0, "on_disk": True},
+    {"name": "HNSW-Binary", "m": 16, "ef_construct": 100, "ef_search": 64, "color": "violet",
+     "quantization": "binary", "oversampling": 3.0},
 ]
 
 print_results_of = {
@@ -71,6 +94,29 @@ def compute_recall(search_results, df_subset, size):
     return recalls
 
 
+def build_quantization_config(quantization):
+    """Same quantization settings as generateQdrantCollection.py"""
+    if quantization == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if quantization == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def estimate_vector_memory_mb(embeddings, quantization, on_disk):
+    """RAM taken by vectors: quantized copy (if any) plus originals unless they live on disk"""
+    size, dimension = embeddings.shape
+    quantized_bytes = 0
+    if quantization == "scalar":
+        quantized_bytes = size * dimension  # 1 byte per dimension
+    elif quantization == "binary":
+        quantized_bytes = size * ((dimension + 7) // 8)  # 1 bit per dimension
+    original_bytes = 0 if on_disk else embeddings.nbytes
+    return (quantized_bytes + original_bytes) / (1024 * 1024)
+
+
 def test_qdrant_config(client, collection_name, original_emb, generated_emb, df_subset, config, save_examples=False):
     """
     Test Qdrant with specific HNSW configuration.
@@ -82,8 +128,12 @@ def test_qdrant_config(client, collection_name, original_emb, generated_emb, df_
     ef_construct = config["ef_construct"]
     ef_search = config["ef_search"]
     config_name = config["name"]
+    quantization = config.get("quantization", "none")
+    oversampling = config.get("oversampling")
+    on_disk = config.get("on_disk", False)
     
-    print(f"Creating collection '{collection_name}' with {config_name} (m={m}, ef_construct={ef_construct})...")
+    print(f"Creating collection '{collection_name}' with {config_name} "
+          f"(m={m}, ef_construct={ef_construct}, quantization={quantization}, on_disk={on_disk})...")
     
     # Delete collection if it exists
     try:
@@ -96,12 +146,14 @@ def test_qdrant_config(client, collection_name, original_emb, generated_emb, df_
         collection_name=collection_name,
         vectors_config=VectorParams(
             size=dimension,
-            distance=Distance.COSINE
+            distance=Distance.COSINE,
+            on_disk=on_disk
         ),
         hnsw_config={
             "m": m,
             "ef_construct": ef_construct
-        }
+        },
+        quantization_config=build_quantization_config(quantization)
     )
     
     # Prepare and upload points in batches to avoid timeout
@@ -145,7 +197,11 @@ def test_qdrant_config(client, collection_name, original_emb, generated_emb, df_
             query=original_emb[i].tolist(),
             limit=max(K_values),
             search_params=SearchParams(
-                hnsw_ef=ef_search  # Search-time parameter
+                hnsw_ef=ef_search,  # Search-time parameter
+                quantization=QuantizationSearchParams(
+                    rescore=True,
+                    oversampling=oversampling
+                ) if quantization != "none" else None
             )
         )
         query_time = time.time() - query_start
@@ -160,7 +216,7 @@ def test_qdrant_config(client, collection_name, original_emb, generated_emb, df_
     # Estimate memory: vectors + HNSW overhead
     # HNSW memory overhead depends on m parameter
     # Formula: base_vectors + (m * 2 * 4 bytes per connection * num_vectors)
-    vector_memory_mb = (generated_emb.nbytes / (1024 * 1024))
+    vector_memory_mb = estimate_vector_memory_mb(generated_emb, quantization, on_disk)
     hnsw_overhead_mb = (m * 2 * 4 * size) / (1024 * 1024)  # Approximate
     estimated_total_mb = vector_memory_mb + hnsw_overhead_mb
     
@@ -226,8 +282,8 @@ if __name__ == "__main__":
     print(f"Loaded {len(df)} samples after merge")
 
     print("Encoding descriptions...")
-    original_emb_all = model.encode(df["original_description"].tolist(), normalize_embeddings=True).astype("float32")
-    generated_emb_all = model.encode(df["generated_description"].tolist(), normalize_embeddings=True).astype("float32")
+    original_emb_all = cached_encode(model, df["original_description"].tolist(), MODEL_NAME)
+    generated_emb_all = cached_encode(model, df["generated_description"].tolist(), MODEL_NAME)
     
     global_results = []
     
@@ -259,6 +315,9 @@ if __name__ == "__main__":
             result["m"] = config["m"]
             result["ef_construct"] = config["ef_construct"]
             result["ef_search"] = config["ef_search"]
+            result["quantization"] = config.get("quantization", "none")
+            result["oversampling"] = config.get("oversampling")
+            result["on_disk"] = config.get("on_disk", False)
             result["TikZ_color"] = config["color"]
             
             global_results.append(result)
@@ -273,7 +332,7 @@ if __name__ == "__main__":
     print("\n" + "="*80)
     print("QDRANT RESULTS - MULTIPLE CONFIGURATIONS")
     print("="*80)
-    print(df_results[["Config", "# Samples", "Latency (ms/query)", "Memory (MB)", "Recall@1", "Recall@3", "Recall@6"]])
+    print(df_results[["Config", "# Samples", "quantization", "Latency (ms/query)", "Memory (MB)", "Recall@1", "Recall@3", "Recall@6"]])
     
     # Save results to CSV
     output_file = os.path.join(SCRIPT_DIR, f"qdrant_results_{mode}_multi_config.csv")
@@ -0,0 +1,137 @@
+import itertools, os, sys, time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from qdrant_client.models import Distance, VectorParams, PointStruct, QueryRequest
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(SCRIPT_DIR, "..", "..", "..", "webapp", "FastAPI")
+sys.path.append(BACKEND_DIR)
+os.environ.setdefault("QDRANT_HOST", "localhost")
+import clients.qdrant_client as qdrant_module
+
+# Configuration
+COLLECTION_NAME = "transport_test"
+N_VECTORS = 5000
+DIMENSION = 2560  # Qwen3-Embedding-4B, the size the API searches with
+K = 6
+N_QUERIES = 200
+BATCH_SIZE = 8  # sections of /select-images-per-section
+THREADS = 16
+CHANNEL_COUNTS = [1, 2, 4]
+
+rng = np.random.default_rng(42)
+
+
+def normalize(vectors):
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype("float32")
+
+
+def build_collection(client, vectors):
+    try:
+        client.delete_collection(COLLECTION_NAME)
+    except Exception:
+        pass
+    client.create_collection(
+        collection_name=COLLECTION_NAME,
+        vectors_config=VectorParams(size=DIMENSION, distance=Distance.COSINE),
+    )
+    for start in range(0, len(vectors), 200):
+        client.upsert(
+            collection_name=COLLECTION_NAME,
+            points=[
+                PointStruct(id=i, vector=vectors[i].tolist(), payload={"id": f"item-{i:05d}"})
+                for i in range(start, min(start + 200, len(vectors)))
+            ],
+            wait=True,
+        )
+
+
+def single_query(client, query):
+    return client.query_points(
+        collection_name=COLLECTION_NAME, query=query.tolist(), limit=K, with_payload=["id"]
+    ).points
+
+
+def batch_query(client, queries):
+    return client.query_batch_points(
+        collection_name=COLLECTION_NAME,
+        requests=[QueryRequest(query=query.tolist(), limit=K, with_payload=["id"]) for query in queries],
+    )
+
+
+def measure(call, items):
+    """Wall-clock latency per call (ms) and client CPU per call (ms) for sequential calls"""
+    for item in items[:10]:  # warm-up: connection setup, HNSW pages
+        call(item)
+    latencies = []
+    cpu_start = time.process_time()
+    for item in items:
+        start = time.perf_counter()
+        call(item)
+        latencies.append((time.perf_counter() - start) * 1000)
+    cpu_ms = (time.process_time() - cpu_start) * 1000 / len(items)
+    return np.percentile(latencies, 50), np.percentile(latencies, 95), cpu_ms
+
+
+def measure_concurrent(clients, queries):
+    """THREADS threads sharing the client pool round-robin, like the API's threadpool"""
+    counter = itertools.count()
+
+    def run(query):
+        return single_query(clients[next(counter) % len(clients)], query)
+
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        list(executor.map(run, queries[:THREADS]))
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        list(executor.map(run, queries))
+        elapsed = time.perf_counter() - start
+    return len(queries) / elapsed, (time.process_time() - cpu_start) * 1000 / len(queries)
+
+
+if __name__ == "__main__":
+
+    vectors = normalize(rng.standard_normal((N_VECTORS, DIMENSION)))
+    queries = normalize(rng.standard_normal((N_QUERIES, DIMENSION)))
+    batches = [queries[i : i + BATCH_SIZE] for i in range(0, N_QUERIES, BATCH_SIZE)]
+
+    rest_client = qdrant_module.create_qdrant_client(prefer_grpc=False)
+    grpc_client = qdrant_module.create_qdrant_client(prefer_grpc=True)
+    print(f"Building {COLLECTION_NAME} ({N_VECTORS} x {DIMENSION}) on {qdrant_module.QDRANT_HOST}")
+    build_collection(grpc_client, vectors)
+
+    # Both transports must return the same results
+    for query in queries[:20]:
+        rest_ids = [point.payload["id"] for point in single_query(rest_client, query)]
+        grpc_ids = [point.payload["id"] for point in single_query(grpc_client, query)]
+        assert rest_ids == grpc_ids, f"REST and gRPC disagree: {rest_ids} vs {grpc_ids}"
+    print("✅ REST and gRPC return the same hits")
+
+    results = []
+    for transport, client in [("rest", rest_client), ("grpc", grpc_client)]:
+        p50, p95, cpu = measure(lambda query: single_query(client, query), queries)
+        results.append({"transport": transport, "mode": "single", "p50_ms": p50, "p95_ms": p95, "cpu_ms_per_call": cpu})
+        p50, p95, cpu = measure(lambda batch: batch_query(client, batch), batches)
+        results.append({"transport": transport, "mode": f"batch of {BATCH_SIZE}", "p50_ms": p50, "p95_ms": p95, "cpu_ms_per_call": cpu})
+
+    # Concurrent single queries: REST client vs gRPC pools of 1..N channels
+    concurrent_results = []
+    qps, cpu = measure_concurrent([rest_client], queries)
+    concurrent_results.append({"transport": "rest", "channels": 1, "queries_per_s": qps, "cpu_ms_per_query": cpu})
+    for channels in CHANNEL_COUNTS:
+        pool = [qdrant_module.create_qdrant_client(prefer_grpc=True) for _ in range(channels)]
+        qps, cpu = measure_concurrent(pool, queries)
+        concurrent_results.append({"transport": "grpc", "channels": channels, "queries_per_s": qps, "cpu_ms_per_query": cpu})
+
+    df = pd.DataFrame(results).round(3)
+    concurrent_df = pd.DataFrame(concurrent_results).round(2)
+    print("\nSequential calls")
+    print(df.to_string(index=False))
+    print(f"\nConcurrent single queries ({THREADS} threads)")
+    print(concurrent_df.to_string(index=False))
+
+    df.to_csv("qdrant_transport_results.csv", index=False)
+    concurrent_df.to_csv("qdrant_transport_concurrent_results.csv", index=False)
+
+    grpc_client.delete_collection(COLLECTION_NAME)
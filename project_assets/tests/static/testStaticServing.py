@@ -0,0 +1,123 @@
+import time, os, sys, threading, asyncio
+import numpy as np
+import pandas as pd
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(SCRIPT_DIR, "..", "..", "..", "webapp", "FastAPI")
+sys.path.append(BACKEND_DIR)
+from utils.static_images import ImageFiles, FileDescriptorCache
+
+# Configuration
+IMAGE_DIR = os.path.join(SCRIPT_DIR, "..", "..", "data", "SemArt", "Images")
+HOST = "127.0.0.1"
+PORT = 8765
+N_IMAGES = 200
+N_REQUESTS = 2000
+CONCURRENCY_LEVELS = [1, 16, 64]
+RANGE_BYTES = 64 * 1024
+
+mounts = {
+    "StaticFiles": lambda: StaticFiles(directory=IMAGE_DIR),
+    "ImageFiles": lambda: ImageFiles(directory=IMAGE_DIR, fd_cache=FileDescriptorCache(max_open_files=N_IMAGES)),
+}
+
+scenarios = ["full", "range", "conditional"]
+
+
+def start_server():
+    app = Starlette(routes=[Mount(f"/{name}", factory()) for name, factory in mounts.items()])
+    server = uvicorn.Server(uvicorn.Config(app, host=HOST, port=PORT, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+async def run_scenario(client, mount, scenario, files, etags, concurrency):
+    """Fire N_REQUESTS requests at the given mount and return per-request latencies and bytes."""
+    latencies = []
+    total_bytes = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        nonlocal total_bytes
+        file_name = files[i % len(files)]
+        headers = {}
+        if scenario == "range":
+            headers["Range"] = f"bytes=0-{RANGE_BYTES - 1}"
+        elif scenario == "conditional":
+            headers["If-None-Match"] = etags[file_name]
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(f"/{mount}/{file_name}", headers=headers)
+            latencies.append(time.perf_counter() - start)
+            total_bytes += len(response.content)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(N_REQUESTS)])
+    elapsed = time.perf_counter() - start
+    return np.array(latencies), total_bytes, elapsed
+
+
+async def benchmark(files):
+    limits = httpx.Limits(max_connections=max(CONCURRENCY_LEVELS), max_keepalive_connections=max(CONCURRENCY_LEVELS))
+    async with httpx.AsyncClient(base_url=f"http://{HOST}:{PORT}", limits=limits, timeout=60) as client:
+        etags = {}
+        for file_name in files:
+            response = await client.head(f"/StaticFiles/{file_name}")
+            etags[file_name] = response.headers["etag"]
+
+        results = []
+        for scenario in scenarios:
+            for concurrency in CONCURRENCY_LEVELS:
+                for mount in mounts:
+                    # Warm-up pass so both mounts see a hot page cache
+                    await run_scenario(client, mount, scenario, files, etags, concurrency)
+                    latencies, total_bytes, elapsed = await run_scenario(client, mount, scenario, files, etags, concurrency)
+                    results.append({
+                        "Mount": mount,
+                        "Scenario": scenario,
+                        "Concurrency": concurrency,
+                        "Throughput (req/s)": round(N_REQUESTS / elapsed, 1),
+                        "Throughput (MB/s)": round(total_bytes / elapsed / (1024 * 1024), 2),
+                        "p50 (ms)": round(np.percentile(latencies, 50) * 1000, 3),
+                        "p95 (ms)": round(np.percentile(latencies, 95) * 1000, 3),
+                    })
+                    print(results[-1])
+        return results
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) > 1:
+        IMAGE_DIR = sys.argv[1]
+
+    files = sorted(f for f in os.listdir(IMAGE_DIR) if os.path.isfile(os.path.join(IMAGE_DIR, f)))[:N_IMAGES]
+    if not files:
+        print(f"No images found in {IMAGE_DIR}")
+        sys.exit(1)
+    sizes = [os.path.getsize(os.path.join(IMAGE_DIR, f)) for f in files]
+    print(f"Serving {len(files)} images from {IMAGE_DIR} (mean size {np.mean(sizes) / 1024:.1f} KB)")
+
+    server, thread = start_server()
+    try:
+        global_results = asyncio.run(benchmark(files))
+    finally:
+        server.should_exit = True
+        thread.join()
+
+    df_results = pd.DataFrame(global_results)
+    print("\n" + "=" * 80)
+    print("STATIC IMAGE SERVING RESULTS")
+    print("=" * 80)
+    print(df_results)
+
+    output_file = os.path.join(SCRIPT_DIR, "static_serving_results.csv")
+    df_results.to_csv(output_file, index=False)
+    print(f"\nResults saved to: {output_file}")
@@ -0,0 +1,202 @@
+import os, sys, tempfile, time
+import numpy as np
+import faiss
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams, PointStruct
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(SCRIPT_DIR, "..", "..", "..", "webapp", "FastAPI")
+sys.path.append(BACKEND_DIR)
+import clients.qdrant_client as qdrant_module
+from clients.vector_backends import QdrantBackend, FaissBackend, NumpyBackend
+
+# Configuration
+COLLECTION_NAME = "contract_test"
+PHRASE_COLLECTION_NAME = "contract_test_phrases"
+N_VECTORS = 2000
+PHRASES_PER_ITEM = 3
+DIMENSION = 256
+K = 6
+N_QUERIES = 50
+
+rng = np.random.default_rng(42)
+
+
+def normalize(vectors):
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype("float32")
+
+
+def build_qdrant(client, vectors, ids, collection_name=COLLECTION_NAME):
+    try:
+        client.delete_collection(collection_name)
+    except Exception:
+        pass
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=VectorParams(size=vectors.shape[1], distance=Distance.COSINE),
+    )
+    client.create_payload_index(collection_name=collection_name, field_name="id", field_schema="keyword")
+    batch_size = 100
+    for start in range(0, len(vectors), batch_size):
+        client.upsert(
+            collection_name=collection_name,
+            points=[
+                PointStruct(id=i, vector=vectors[i].tolist(), payload={"id": ids[i]})
+                for i in range(start, min(start + batch_size, len(vectors)))
+            ],
+            wait=True,
+        )
+
+
+def build_faiss(index_dir, vectors, ids, collection_name=COLLECTION_NAME):
+    index = faiss.IndexFlatIP(vectors.shape[1])
+    index.add(vectors)
+    faiss.write_index(index, os.path.join(index_dir, f"{collection_name}_index.faiss"))
+    np.save(os.path.join(index_dir, f"{collection_name}_ids.npy"), np.array(ids, dtype="U"))
+
+
+def build_numpy(index_dir, vectors, ids, collection_name=COLLECTION_NAME):
+    """Same layout as scripts/exportEmbeddingMatrix.py"""
+    np.save(os.path.join(index_dir, f"{collection_name}_embeddings.npy"), vectors)
+    np.save(os.path.join(index_dir, f"{collection_name}_embeddings_ids.npy"), np.array(ids, dtype="U"))
+
+
+def phrase_split(vectors, ids):
+    """Several noisy 'phrase' points per item, all sharing the item's catalog id"""
+    phrase_vectors = normalize(
+        np.repeat(vectors, PHRASES_PER_ITEM, axis=0) + 0.3 * rng.standard_normal((len(vectors) * PHRASES_PER_ITEM, vectors.shape[1]))
+    )
+    return phrase_vectors, [item_id for item_id in ids for _ in range(PHRASES_PER_ITEM)]
+
+
+def check_contract(backend, vectors, ids, queries):
+    """Search contract every backend must satisfy. Returns top-k ids per query."""
+    assert COLLECTION_NAME in backend.collections(), "collection not listed"
+
+    # Self-queries: each stored vector is its own nearest neighbour
+    for i in rng.choice(len(vectors), size=10, replace=False):
+        hits = backend.search(COLLECTION_NAME, vectors[i], K)
+        assert hits[0].id == ids[i], f"self-query {i} returned {hits[0].id}"
+        assert abs(hits[0].score - 1.0) < 1e-3, f"self-query score {hits[0].score}"
+
+    batch_hits = backend.search_batch(COLLECTION_NAME, queries, K)
+    assert len(batch_hits) == len(queries), "one result list per query"
+    for query, hits in zip(queries, batch_hits):
+        assert len(hits) == K, f"expected {K} hits, got {len(hits)}"
+        assert all(isinstance(hit.id, str) for hit in hits), "ids must be catalog id strings"
+        scores = [hit.score for hit in hits]
+        assert scores == sorted(scores, reverse=True), "hits must be sorted best first"
+        single = backend.search(COLLECTION_NAME, query, K)
+        assert [hit.id for hit in single] == [hit.id for hit in hits], "search and search_batch disagree"
+
+    try:
+        backend.search(COLLECTION_NAME + "_missing", queries[0], K)
+    except Exception:
+        pass
+    else:
+        raise AssertionError("unknown collection must raise")
+
+    return [[hit.id for hit in hits] for hits in batch_hits]
+
+
+def check_grouped_contract(backend, phrase_vectors, phrase_ids, queries):
+    """Phrase-split collections: k distinct artworks per query, scored by their best phrase"""
+    assert PHRASE_COLLECTION_NAME in backend.collections(), "phrase collection not listed"
+
+    for i in rng.choice(len(phrase_vectors), size=10, replace=False):
+        hits = backend.search(PHRASE_COLLECTION_NAME, phrase_vectors[i], K)
+        assert hits[0].id == phrase_ids[i], f"phrase self-query {i} returned {hits[0].id}"
+
+    batch_hits = backend.search_batch(PHRASE_COLLECTION_NAME, queries, K)
+    for hits in batch_hits:
+        hit_ids = [hit.id for hit in hits]
+        assert len(hit_ids) == K, f"expected {K} artworks, got {len(hit_ids)}"
+        assert len(set(hit_ids)) == K, f"duplicate artworks in {hit_ids}"
+
+    return [[hit.id for hit in hits] for hits in batch_hits]
+
+
+def report_overlap(backends, top_ids):
+    reference = top_ids[backends[0].name]
+    for backend in backends[1:]:
+        overlap = np.mean([
+            len(set(a) & set(b)) / K for a, b in zip(reference, top_ids[backend.name])
+        ])
+        print(f"Top-{K} overlap {backends[0].name} vs {backend.name}: {overlap:.3f}")
+
+
+def time_backend(backend, queries):
+    start = time.perf_counter()
+    for query in queries:
+        backend.search(COLLECTION_NAME, query, K)
+    single_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+    start = time.perf_counter()
+    backend.search_batch(COLLECTION_NAME, queries, K)
+    batch_ms = (time.perf_counter() - start) * 1000
+    return round(single_ms, 3), round(batch_ms, 3)
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) < 2:
+        print("Usage: python testVectorBackends.py <mode>")
+        print("  mode: 'local' (Docker on localhost:6333) or 'memory' (in-memory mode)")
+        sys.exit(1)
+
+    mode = sys.argv[1]
+    if mode == "local":
+        qdrant_module._qdrant_clients = [QdrantClient(host="localhost", port=6333, timeout=120)]
+    elif mode == "memory":
+        qdrant_module._qdrant_clients = [QdrantClient(":memory:")]
+    else:
+        print(f"Unknown mode: {mode}")
+        sys.exit(1)
+
+    vectors = normalize(rng.standard_normal((N_VECTORS, DIMENSION)))
+    ids = [f"item-{i:05d}" for i in range(N_VECTORS)]
+    queries = normalize(vectors[:N_QUERIES] + 0.5 * rng.standard_normal((N_QUERIES, DIMENSION)))
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        build_qdrant(qdrant_module.get_qdrant_client(), vectors, ids)
+        build_faiss(index_dir, vectors, ids)
+        build_numpy(index_dir, vectors, ids)
+
+        backends = [QdrantBackend(), FaissBackend(index_dir), NumpyBackend(index_dir)]
+        top_ids = {}
+        for backend in backends:
+            backend.load()
+            top_ids[backend.name] = check_contract(backend, vectors, ids, queries)
+            single_ms, batch_ms = time_backend(backend, queries)
+            print(f"✅ {backend.name}: contract OK | {single_ms} ms/query | {batch_ms} ms per batch of {N_QUERIES}")
+
+        report_overlap(backends, top_ids)
+
+    # Phrase-split layout (generateQdrantCollection.py --split-phrases, PHRASE_SPLIT_COLLECTIONS=true)
+    phrase_vectors, phrase_ids = phrase_split(vectors, ids)
+    with tempfile.TemporaryDirectory() as index_dir:
+        build_qdrant(qdrant_module.get_qdrant_client(), phrase_vectors, phrase_ids, PHRASE_COLLECTION_NAME)
+        build_faiss(index_dir, phrase_vectors, phrase_ids, PHRASE_COLLECTION_NAME)
+        build_numpy(index_dir, phrase_vectors, phrase_ids, PHRASE_COLLECTION_NAME)
+
+        backends = [
+            QdrantBackend(group_by_id=True),
+            FaissBackend(index_dir, group_by_id=True),
+            NumpyBackend(index_dir, group_by_id=True),
+        ]
+        top_ids = {}
+        for backend in backends:
+            backend.load()
+            top_ids[backend.name] = check_grouped_contract(backend, phrase_vectors, phrase_ids, queries)
+            start = time.perf_counter()
+            backend.search_batch(PHRASE_COLLECTION_NAME, queries, K)
+            batch_ms = round((time.perf_counter() - start) * 1000, 3)
+            print(f"✅ {backend.name} (grouped by id): contract OK | {batch_ms} ms per batch of {N_QUERIES}")
+
+        report_overlap(backends, top_ids)
+
+    for collection_name in [COLLECTION_NAME, PHRASE_COLLECTION_NAME]:
+        try:
+            qdrant_module.get_qdrant_client().delete_collection(collection_name)
+        except Exception:
+            pass
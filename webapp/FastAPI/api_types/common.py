@@ -63,10 +63,32 @@ class GenerateStoryResponse(BaseModel):
     emotion: str
 
 
+class SearchFilters(BaseModel):
+    """Catalog metadata filters; any listed value matches, all given fields must match."""
+    type: Optional[List[str]] = None
+    art_school: Optional[List[str]] = None  # SemArt
+    period: Optional[List[str]] = None  # Ipiranga
+
+    def to_payload_filters(self) -> Dict[str, List[str]]:
+        return {field: values for field, values in self.model_dump(exclude_none=True).items() if values}
+
+
 class SearchImagesRequestDTO(BaseModel):
     story: str
     language: Language
     dataset: Dataset
+    filters: Optional[SearchFilters] = None
+
+
+class FederatedSearchImagesRequestDTO(BaseModel):
+    story: str
+    language: Language
+    datasets: List[Dataset] = Field(default_factory=lambda: list(Dataset), min_length=1)
+    k: int = Field(default=6, ge=1, le=50)
+    # Max images per dataset; datasets without a quota get ceil(k / len(datasets)).
+    # Slots a dataset can't fill go to the best remaining hits of the others.
+    quotas: Optional[Dict[Dataset, int]] = None
+    filters: Optional[SearchFilters] = None
 
 
 class SelectImagesPerSectionRequestDTO(BaseModel):
@@ -75,6 +97,7 @@ class SelectImagesPerSectionRequestDTO(BaseModel):
     segmentation: str
     dataset: Dataset
     k: int
+    filters: Optional[SearchFilters] = None
 
 
 class GenerateStoryRequestDTO(BaseModel):
@@ -2,16 +2,25 @@
 Client modules for different services
 """
 
-from .embedding_client import encode_text
+from .embedding_client import encode_text, warm_up_embeddings
 from .database_client import get_database_client, get_database_engine
-from .qdrant_client import get_qdrant_client, get_available_collections
+from .qdrant_client import get_qdrant_client, get_available_collections, get_search_params, get_collection_name, build_payload_filter, stop_metadata_refresh
 from .maritaca_client import get_maritaca_client
+from .vector_backends import get_vector_backend, get_filter_backend, initialize_vector_backend
 
 __all__ = [
     "encode_text",
+    "warm_up_embeddings",
     "get_database_client",
     "get_database_engine",
     "get_qdrant_client",
     "get_available_collections",
-    "get_maritaca_client"
+    "get_search_params",
+    "get_collection_name",
+    "build_payload_filter",
+    "stop_metadata_refresh",
+    "get_maritaca_client",
+    "get_vector_backend",
+    "get_filter_backend",
+    "initialize_vector_backend"
 ]
\ No newline at end of file
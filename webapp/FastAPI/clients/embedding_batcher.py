@@ -0,0 +1,98 @@
+"""
+Cross-request micro-batching for embedding calls.
+
+Request handlers run in FastAPI's threadpool, so several searches can ask for
+embeddings at the same moment. EmbeddingBatcher queues their texts, waits up to
+max_wait_ms (or until max_batch_size texts are queued) and encodes everything
+in one call, then hands each caller back its own rows.
+
+Each batcher records <name>_batch_size (texts per call), <name>_batch_requests
+(callers merged per call), <name>_queue_wait_ms and <name>_encode_ms
+histograms in utils.metrics.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from utils import metrics
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128]
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class EmbeddingBatcher:
+    def __init__(self, encode_batch, max_batch_size: int = 32, max_wait_ms: float = 5.0,
+                 max_concurrency: int = 1, name: str = "embeddings"):
+        """
+        encode_batch: callable taking a list of texts and returning an (n, dim) array
+        max_concurrency: batches encoded at the same time (1 for a local CPU model)
+        """
+        self.encode_batch = encode_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+
+        self._batch_size = metrics.histogram(f"{name}_batch_size", BATCH_SIZE_BUCKETS, "Texts per encode call")
+        self._batch_requests = metrics.histogram(f"{name}_batch_requests", BATCH_SIZE_BUCKETS, "Callers merged per encode call")
+        self._queue_wait = metrics.histogram(f"{name}_queue_wait_ms", LATENCY_BUCKETS_MS, "Time from submit to batch start")
+        self._encode_time = metrics.histogram(f"{name}_encode_ms", LATENCY_BUCKETS_MS, "Encode call duration")
+        self._errors = metrics.counter(f"{name}_errors", "Failed encode calls")
+
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f"{name}-encode")
+        self._thread = threading.Thread(target=self._collect, name=f"{name}-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: list[str]) -> Future:
+        """Queue texts for the next batch; the future resolves to their (len(texts), dim) embeddings."""
+        future = Future()
+        self._queue.put((list(texts), future, time.monotonic()))
+        return future
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Blocking helper for request handlers."""
+        return self.submit(texts).result()
+
+    def _collect(self):
+        while True:
+            pending = [self._queue.get()]
+            size = len(pending[0][0])
+            deadline = time.monotonic() + self.max_wait
+
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    # Past the deadline, still take whatever is already queued
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            self._executor.submit(self._run_batch, pending)
+
+    def _run_batch(self, pending):
+        start = time.monotonic()
+        texts = [text for item_texts, _, _ in pending for text in item_texts]
+        self._batch_size.observe(len(texts))
+        self._batch_requests.observe(len(pending))
+        for _, _, submitted in pending:
+            self._queue_wait.observe((start - submitted) * 1000)
+
+        try:
+            embeddings = self.encode_batch(texts)
+        except Exception as e:
+            self._errors.inc()
+            for _, future, _ in pending:
+                future.set_exception(e)
+            return
+        finally:
+            self._encode_time.observe((time.monotonic() - start) * 1000)
+
+        offset = 0
+        for item_texts, future, _ in pending:
+            future.set_result(embeddings[offset : offset + len(item_texts)])
+            offset += len(item_texts)
@@ -1,47 +1,310 @@
 import numpy as np
 from openai import OpenAI
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils import metrics
+from .embedding_batcher import EmbeddingBatcher
+from .embedding_resilience import LatencyTracker, CircuitBreaker, QueryEmbeddingCache
 
 # Global variables
 _openai_client = None
+_local_model = None
+_batcher = None
+_remote_executor = None
+
+EMBEDDING_MODEL = "Qwen/Qwen3-Embedding-4B"
+EMBEDDING_FULL_DIM = 2560
+
+# Matryoshka truncation: Qwen3-Embedding vectors can be cut to their first N
+# dimensions. Must match the --embedding-dim the Qdrant collections were built with.
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", str(EMBEDDING_FULL_DIM)))
+
+# Local CPU inference instead of the DeepInfra API. The model must be the one the
+# collections were indexed with, otherwise query and catalog vectors do not match.
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "false").lower() == "true"
+LOCAL_EMBEDDING_MODEL_NAME = os.getenv("LOCAL_EMBEDDING_MODEL_NAME", EMBEDDING_MODEL)
+LOCAL_EMBEDDING_RUNTIME = os.getenv("LOCAL_EMBEDDING_RUNTIME", "torch")  # torch | onnx
+LOCAL_EMBEDDING_THREADS = int(os.getenv("LOCAL_EMBEDDING_THREADS", "0"))  # 0 = runtime default
+
+# Cross-request batching: texts from concurrent requests are sent in one call after
+# waiting at most EMBEDDING_BATCH_MAX_WAIT_MS, or as soon as EMBEDDING_BATCH_MAX_SIZE
+# texts are queued. EMBEDDING_BATCH_CONCURRENCY bounds in-flight DeepInfra calls.
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+EMBEDDING_BATCH_CONCURRENCY = int(os.getenv("EMBEDDING_BATCH_CONCURRENCY", "4"))
+
+# DeepInfra resilience. If a call has not answered after the rolling p95 latency, a
+# second (hedged) call is sent and the first response wins. After
+# EMBEDDING_BREAKER_FAILURES failed calls in a row the circuit opens: queries are
+# served by EMBEDDING_FALLBACK ("local" model and/or "cache" of recent queries, in
+# order) and one probe call is tried every EMBEDDING_BREAKER_RESET_S seconds.
+EMBEDDING_TIMEOUT_S = float(os.getenv("EMBEDDING_TIMEOUT_S", "10"))
+EMBEDDING_HEDGE = os.getenv("EMBEDDING_HEDGE", "true").lower() == "true"
+EMBEDDING_HEDGE_DEFAULT_DELAY_MS = float(os.getenv("EMBEDDING_HEDGE_DEFAULT_DELAY_MS", "500"))
+EMBEDDING_BREAKER_FAILURES = int(os.getenv("EMBEDDING_BREAKER_FAILURES", "5"))
+EMBEDDING_BREAKER_RESET_S = float(os.getenv("EMBEDDING_BREAKER_RESET_S", "30"))
+EMBEDDING_FALLBACK = [s.strip() for s in os.getenv("EMBEDDING_FALLBACK", "cache").split(",") if s.strip()]
+EMBEDDING_QUERY_CACHE_SIZE = int(os.getenv("EMBEDDING_QUERY_CACHE_SIZE", "1024"))
+
+_latency = LatencyTracker(default_ms=EMBEDDING_HEDGE_DEFAULT_DELAY_MS)
+_breaker = CircuitBreaker(failure_threshold=EMBEDDING_BREAKER_FAILURES, reset_timeout_s=EMBEDDING_BREAKER_RESET_S)
+_query_cache = QueryEmbeddingCache(max_size=EMBEDDING_QUERY_CACHE_SIZE)
+
+_remote_calls = metrics.counter("remote_embeddings_calls", "Remote embedding requests (excluding hedges)")
+_hedges_fired = metrics.counter("remote_embeddings_hedges_fired", "Hedged second requests sent")
+_hedge_wins = metrics.counter("remote_embeddings_hedge_wins", "Hedged requests that answered first")
+_query_cache_hits = metrics.counter("embedding_query_cache_hits", "Texts served from the exact-match query cache")
+_fallbacks = {
+    "local": metrics.counter("embedding_fallback_local", "Texts embedded by the local model while the remote was unhealthy"),
+    "cache": metrics.counter("embedding_fallback_cache", "Texts served from the nearest cached query while the remote was unhealthy"),
+}
+_fallback_failures = metrics.counter("embedding_fallback_failures", "Batches no fallback could serve")
+metrics.gauge("remote_embeddings_hedge_rate", lambda: round(_hedges_fired.value / _remote_calls.value, 4) if _remote_calls.value else 0.0,
+              "Share of remote requests that needed a hedge")
+metrics.gauge("remote_embeddings_hedge_delay_ms", lambda: round(_latency.p95_ms(), 1), "Current hedge delay (rolling p95)")
+metrics.gauge("embedding_breaker_state", _breaker.state_code, "0 = closed, 1 = half open, 2 = open")
+metrics.gauge("embedding_breaker_opens", lambda: _breaker.opens, "Times the breaker opened")
 
 def get_openai_client():
     """Get DeepInfra OpenAI client for API-based embeddings"""
     global _openai_client
-    
+
     if _openai_client is None:
         api_key = os.getenv('DEEPINFRA_API_KEY')
         if not api_key:
             raise ValueError("DEEPINFRA_API_KEY environment variable is required")
-        
+
         _openai_client = OpenAI(
             api_key=api_key,
             base_url="https://api.deepinfra.com/v1/openai",
+            timeout=EMBEDDING_TIMEOUT_S,
+            max_retries=0,  # hedging and the circuit breaker handle slow or failed calls
         )
         print("✅ DeepInfra OpenAI client initialized")
-    
+
     return _openai_client
 
-def encode_text(texts, convert_to_numpy=True):
-    """Encode text(s) to embeddings using DeepInfra API"""
-    if isinstance(texts, str):
-        texts = [texts]
-    
-    # Use DeepInfra API
+def get_local_model():
+    """Load the sentence-transformers model on CPU (torch or ONNX Runtime)"""
+    global _local_model
+
+    if _local_model is None:
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise RuntimeError(
+                "LOCAL_EMBEDDING_MODEL=true requires the 'local' extra (uv sync --extra local)"
+            )
+
+        if LOCAL_EMBEDDING_THREADS and LOCAL_EMBEDDING_RUNTIME == "torch":
+            import torch
+            torch.set_num_threads(LOCAL_EMBEDDING_THREADS)
+
+        print(f"Loading local embedding model {LOCAL_EMBEDDING_MODEL_NAME} ({LOCAL_EMBEDDING_RUNTIME})...")
+        _local_model = SentenceTransformer(
+            LOCAL_EMBEDDING_MODEL_NAME,
+            device="cpu",
+            backend=LOCAL_EMBEDDING_RUNTIME,
+            tokenizer_kwargs={"padding_side": "left"},
+        )
+        print("✅ Local embedding model loaded")
+
+    return _local_model
+
+def _encode_local(texts):
+    """Same encoding as the indexing scripts: normalize_embeddings=True at full size"""
+    return get_local_model().encode(
+        texts,
+        batch_size=EMBEDDING_BATCH_MAX_SIZE,
+        normalize_embeddings=True,
+        convert_to_numpy=True,
+    ).astype(np.float32)
+
+def _encode_remote(texts):
     client = get_openai_client()
-    
+
     response = client.embeddings.create(
-        model="Qwen/Qwen3-Embedding-4B",
+        model=EMBEDDING_MODEL,
         input=texts,
         encoding_format="float"
     )
-    
+
     if len(texts) == 1:
-        embeddings = np.array([response.data[0].embedding], dtype=np.float32)
-    else:
-        embeddings = np.array([item.embedding for item in response.data], dtype=np.float32)
-    
+        return np.array([response.data[0].embedding], dtype=np.float32)
+    return np.array([item.embedding for item in response.data], dtype=np.float32)
+
+def _get_remote_executor():
+    global _remote_executor
+    if _remote_executor is None:
+        # Room for every batch in flight plus its hedge
+        _remote_executor = ThreadPoolExecutor(max_workers=EMBEDDING_BATCH_CONCURRENCY * 2, thread_name_prefix="deepinfra")
+    return _remote_executor
+
+def _timed_remote(texts):
+    """
+    _encode_remote, recording its duration for the hedge delay. Failed and timed-out calls
+    count too (capped at the timeout), otherwise a slow, erroring API would leave only the
+    fast successes in the window and pull the p95 down.
+    """
+    start = time.monotonic()
+    try:
+        return _encode_remote(texts)
+    finally:
+        _latency.record(min(time.monotonic() - start, EMBEDDING_TIMEOUT_S) * 1000)
+
+def _encode_remote_hedged(texts):
+    """First successful response wins; a hedge is sent if the first call outlives the p95 delay"""
+    executor = _get_remote_executor()
+    _remote_calls.inc()
+    primary = executor.submit(_timed_remote, texts)
+    if not EMBEDDING_HEDGE:
+        return primary.result(timeout=EMBEDDING_TIMEOUT_S)
+
+    deadline = time.monotonic() + EMBEDDING_TIMEOUT_S
+    done, _ = wait([primary], timeout=_latency.p95_ms() / 1000)
+    if done:
+        return primary.result()
+
+    _hedges_fired.inc()
+    hedge = executor.submit(_timed_remote, texts)
+    pending = {primary, hedge}
+    error = None
+    while pending:
+        done, pending = wait(pending, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            if future.exception() is None:
+                if future is hedge:
+                    _hedge_wins.inc()
+                return future.result()
+            error = future.exception()
+    raise error or TimeoutError(f"Embedding request timed out after {EMBEDDING_TIMEOUT_S}s")
+
+def _encode_fallback(texts, error):
+    """Serve texts from EMBEDDING_FALLBACK sources in order, re-raising `error` if none can"""
+    for source in EMBEDDING_FALLBACK:
+        try:
+            if source == "local":
+                embeddings = _encode_local(texts)
+                _query_cache.put(texts, embeddings)
+            elif source == "cache":
+                cached = [_query_cache.nearest(text) for text in texts]
+                if any(embedding is None for embedding in cached):
+                    continue
+                embeddings = np.stack(cached)
+            else:
+                continue
+        except Exception as e:
+            print(f"❌ Embedding fallback '{source}' failed: {e}")
+            continue
+        _fallbacks[source].inc(len(texts))
+        return embeddings
+
+    _fallback_failures.inc()
+    raise error
+
+def _encode_remote_guarded(texts):
+    """Remote call behind the circuit breaker, with fallback when it fails or is open"""
+    if not _breaker.allow_request():
+        return _encode_fallback(texts, RuntimeError("Embedding circuit breaker is open"))
+
+    try:
+        embeddings = _encode_remote_hedged(texts)
+    except Exception as e:
+        _breaker.record_failure()
+        print(f"❌ DeepInfra embedding request failed: {e!r}")
+        return _encode_fallback(texts, e)
+
+    _breaker.record_success()
+    _query_cache.put(texts, embeddings)
     return embeddings
 
+def _encode_remote_resilient(texts):
+    """Batch encode function for the DeepInfra backend: repeated queries come from the cache"""
+    embeddings = [_query_cache.get(text) for text in texts]
+    misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    _query_cache_hits.inc(len(texts) - len(misses))
+
+    if misses:
+        encoded = _encode_remote_guarded([texts[i] for i in misses])
+        for i, embedding in zip(misses, encoded):
+            embeddings[i] = embedding
+
+    return np.stack(embeddings)
+
+def get_embedding_batcher():
+    """
+    Batcher shared by all requests of this worker: one embeddings.create call
+    (or one local forward pass) per batch of concurrent requests
+    """
+    global _batcher
+
+    if _batcher is None:
+        if LOCAL_EMBEDDING_MODEL:
+            _batcher = EmbeddingBatcher(
+                _encode_local,
+                max_batch_size=EMBEDDING_BATCH_MAX_SIZE,
+                max_wait_ms=EMBEDDING_BATCH_MAX_WAIT_MS,
+                max_concurrency=1,  # the model already uses every CPU thread
+                name="local_embeddings",
+            )
+        else:
+            _batcher = EmbeddingBatcher(
+                _encode_remote_resilient,
+                max_batch_size=EMBEDDING_BATCH_MAX_SIZE,
+                max_wait_ms=EMBEDDING_BATCH_MAX_WAIT_MS,
+                max_concurrency=EMBEDDING_BATCH_CONCURRENCY,
+                name="remote_embeddings",
+            )
+
+    return _batcher
+
+def encode_text(texts, convert_to_numpy=True, dimensions=EMBEDDING_DIM):
+    """
+    Encode text(s) to embeddings using the local model or the DeepInfra API.
+    Vectors are truncated to `dimensions` but not normalized; callers renormalize.
+    """
+    if isinstance(texts, str):
+        texts = [texts]
+
+    embeddings = get_embedding_batcher().encode(texts)
+
+    if dimensions and dimensions < embeddings.shape[1]:
+        embeddings = embeddings[:, :dimensions]
+
+    return embeddings
+
+def warm_up_embeddings():
+    """
+    Load the model and run one encode at startup so the first search is not slow.
+    The DeepInfra client is only built when queries go to the remote API, so a local-only
+    deployment needs no DEEPINFRA_API_KEY; the local model is warmed when it encodes
+    queries or serves as the "local" fallback.
+    """
+    get_embedding_batcher()
+    uses_local = LOCAL_EMBEDDING_MODEL or "local" in EMBEDDING_FALLBACK
+    if not LOCAL_EMBEDDING_MODEL:
+        try:
+            get_openai_client()
+        except ValueError as e:
+            if not uses_local:
+                raise
+            print(f"❌ {e}, queries will be served by the local fallback model")
+    if not uses_local:
+        return
+
+    embeddings = _encode_local(["warm-up"])
+    if embeddings.shape[1] < EMBEDDING_DIM:
+        raise ValueError(
+            f"{LOCAL_EMBEDDING_MODEL_NAME} produces {embeddings.shape[1]}-dim vectors, "
+            f"smaller than EMBEDDING_DIM={EMBEDDING_DIM}"
+        )
+    role = "" if LOCAL_EMBEDDING_MODEL else "fallback "
+    print(f"✅ Local {role}embedding model warmed up ({embeddings.shape[1]} dims)")
 
-print("🌐 Using DeepInfra API for embeddings")
\ No newline at end of file
+if LOCAL_EMBEDDING_MODEL:
+    print(f"💻 Using local model {LOCAL_EMBEDDING_MODEL_NAME} for embeddings")
+else:
+    print("🌐 Using DeepInfra API for embeddings")
@@ -0,0 +1,131 @@
+"""
+Building blocks that keep query embedding fast when DeepInfra is slow or down:
+
+- LatencyTracker: rolling p95 of remote call durations, used as the hedge delay
+- CircuitBreaker: stops calling the remote after repeated failures and lets a
+  single probe through once the reset timeout has passed
+- QueryEmbeddingCache: recent query embeddings, looked up by exact text or, as a
+  last resort, by the most similar cached query (token overlap)
+"""
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 200, min_samples: int = 20, default_ms: float = 500, min_ms: float = 50):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.min_samples = min_samples
+        self.default_ms = default_ms
+        self.min_ms = min_ms
+
+    def record(self, duration_ms: float):
+        with self._lock:
+            self._samples.append(duration_ms)
+
+    def p95_ms(self) -> float:
+        """p95 of recent calls, or default_ms until enough calls were seen"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return self.default_ms
+            return max(float(np.percentile(self._samples, 95)), self.min_ms)
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_s: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opens = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout_s:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opens += 1
+                    print(f"❌ Embedding circuit breaker opened after {self.failures} failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def state_code(self) -> int:
+        """0 = closed, 1 = half open, 2 = open (for the metrics gauge)"""
+        return {self.CLOSED: 0, self.HALF_OPEN: 1, self.OPEN: 2}[self.state]
+
+
+def _tokens(text: str) -> frozenset:
+    return frozenset(re.findall(r"\w+", text.lower()))
+
+
+class QueryEmbeddingCache:
+    def __init__(self, max_size: int = 1024, min_similarity: float = 0.5):
+        self.max_size = max_size
+        self.min_similarity = min_similarity
+        self._entries = OrderedDict()  # normalized text -> (tokens, embedding)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def put(self, texts: list[str], embeddings: np.ndarray):
+        with self._lock:
+            for text, embedding in zip(texts, embeddings):
+                key = self._key(text)
+                self._entries[key] = (_tokens(text), embedding)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, text: str):
+        """Embedding of exactly this query (ignoring case and spacing), or None"""
+        key = self._key(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def nearest(self, text: str):
+        """Embedding of the cached query with the highest token Jaccard similarity, or None"""
+        tokens = _tokens(text)
+        if not tokens:
+            return None
+        best_embedding, best_similarity = None, self.min_similarity
+        with self._lock:
+            for cached_tokens, embedding in self._entries.values():
+                similarity = len(tokens & cached_tokens) / len(tokens | cached_tokens)
+                if similarity >= best_similarity:
+                    best_embedding, best_similarity = embedding, similarity
+        return best_embedding
@@ -1,38 +1,252 @@
 from qdrant_client import QdrantClient
+from qdrant_client.models import SearchParams, QuantizationSearchParams, Filter, FieldCondition, MatchAny
+import itertools
+import os
+import threading
 import time
+import numpy as np
 from api_types.common import Dataset
+from .embedding_client import EMBEDDING_DIM, EMBEDDING_FULL_DIM
 
 # Global variables
-_qdrant_client = None
+_qdrant_clients = []  # one client per gRPC channel (a single client over REST)
+_clients_lock = threading.Lock()
+_next_client = itertools.count()
+_collection_names = None  # collection and alias names, refreshed in the background
+_collection_aliases = {}  # alias name -> collection name
+_vector_sizes = {}  # collection name -> dense vector size, fetched on first use
+_last_miss_refresh = float("-inf")  # time.monotonic() of the last refresh triggered by a cache miss
+_metadata_lock = threading.Lock()
+_refresh_thread = None
+_refresh_stop = threading.Event()
 
 AVAILABLE_DATASETS = [Dataset.wikiart, Dataset.semart, Dataset.ipiranga]
 
+# Search-time tuning. Quantization params only apply to collections built with
+# generateQdrantCollection.py --quantization; Qdrant ignores them otherwise.
+QDRANT_HNSW_EF = int(os.getenv("QDRANT_HNSW_EF", "0")) or None
+QDRANT_OVERSAMPLING = float(os.getenv("QDRANT_OVERSAMPLING", "2.0"))
+
+QDRANT_HOST = os.getenv("QDRANT_HOST", "qdrant")
+QDRANT_PORT = int(os.getenv("QDRANT_PORT", "6333"))
+# gRPC sends vectors as packed floats instead of JSON text. Each channel is one HTTP/2
+# connection multiplexing concurrent requests; requests are spread over the channels.
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "true").lower() == "true"
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+QDRANT_GRPC_CHANNELS = int(os.getenv("QDRANT_GRPC_CHANNELS", "2"))
+# Collection list / vector sizes refresh period, and the random queries run per
+# collection at startup to page the HNSW graph and vectors into memory
+QDRANT_METADATA_REFRESH_S = float(os.getenv("QDRANT_METADATA_REFRESH_S", "60"))
+QDRANT_WARMUP_QUERIES = int(os.getenv("QDRANT_WARMUP_QUERIES", "8"))
+
+
+def create_qdrant_client(prefer_grpc: bool = QDRANT_PREFER_GRPC) -> QdrantClient:
+    """
+    New Qdrant client over gRPC or REST. A local subchannel pool gives every gRPC client
+    its own connection instead of sharing grpcio's process-wide one.
+    """
+    grpc_options = {
+        "grpc.use_local_subchannel_pool": 1,
+        "grpc.keepalive_time_ms": 30000,
+        "grpc.keepalive_permit_without_calls": 1,
+    }
+    return QdrantClient(
+        host=QDRANT_HOST,
+        port=QDRANT_PORT,
+        grpc_port=QDRANT_GRPC_PORT,
+        prefer_grpc=prefer_grpc,
+        grpc_options=grpc_options if prefer_grpc else None,
+    )
+
 
 def get_qdrant_client():
-    """Initialize Qdrant client with retries and host fallback"""
-    global _qdrant_client
-    
-    if _qdrant_client is None:
-        for attempt in range(3): 
-            try:
-                print(f"Attempting to connect to Qdrant at qdrant:6333 (attempt {attempt + 1})")
-                _qdrant_client = QdrantClient(host="qdrant", port=6333)
-                print("✅ Connected to Qdrant successfully")
-                break  # Success, exit the loop
-            except Exception as e:
-                print(f"❌ Failed to connect to qdrant:6333 (attempt {attempt + 1}): {e}")
-                if attempt < 2:  # Don't sleep on the last attempt
-                    time.sleep(1)
-        else:
-            # Loop completed without breaking (all attempts failed)
-            raise ConnectionError("Failed to connect to Qdrant after 3 attempts")
-    
-    return _qdrant_client
+    """
+    Return a pooled Qdrant client (round-robin over QDRANT_GRPC_CHANNELS channels with gRPC).
+    Construction does no network I/O, so requests never wait on connection retries:
+    warm_up_qdrant checks the connection at startup and the background metadata
+    refresh keeps retrying until Qdrant answers.
+    """
+    global _qdrant_clients
+
+    if not _qdrant_clients:
+        with _clients_lock:
+            if not _qdrant_clients:
+                pool_size = max(QDRANT_GRPC_CHANNELS, 1) if QDRANT_PREFER_GRPC else 1
+                _qdrant_clients = [create_qdrant_client() for _ in range(pool_size)]
+                transport = f"gRPC :{QDRANT_GRPC_PORT}, {pool_size} channels" if QDRANT_PREFER_GRPC else f"REST :{QDRANT_PORT}"
+                print(f"✅ Qdrant client for {QDRANT_HOST} ({transport})")
+
+    clients = _qdrant_clients
+    return clients[next(_next_client) % len(clients)]
+
+
+def get_search_params() -> SearchParams:
+    """HNSW ef and quantized-search rescoring parameters shared by all searches"""
+    return SearchParams(
+        hnsw_ef=QDRANT_HNSW_EF,
+        quantization=QuantizationSearchParams(rescore=True, oversampling=QDRANT_OVERSAMPLING),
+    )
+
+def build_payload_filter(filters: dict | None) -> Filter | None:
+    """
+    {"type": ["landscape"], "art_school": ["Italian", "Flemish"]} -> Qdrant filter.
+    Values of one field are OR-ed, fields are AND-ed. The fields have keyword payload
+    indexes (generateQdrantCollection.py), so Qdrant filters during the HNSW search.
+    """
+    conditions = [
+        FieldCondition(key=field_name, match=MatchAny(any=list(values)))
+        for field_name, values in (filters or {}).items()
+        if values
+    ]
+    return Filter(must=conditions) if conditions else None
+
+def get_collection_name(dataset: Dataset) -> str:
+    """
+    Collection for a dataset at the configured embedding dimension.
+    Full-size collections keep the plain dataset name, truncated ones are suffixed (e.g. semart_dim512).
+    """
+    if EMBEDDING_DIM == EMBEDDING_FULL_DIM:
+        return dataset.value
+    return f"{dataset.value}_dim{EMBEDDING_DIM}"
+
+def _dense_vector_size(vectors_config) -> int | None:
+    """Size of the unnamed dense vector (plain VectorParams, or {"": VectorParams} next to sparse vectors)"""
+    if isinstance(vectors_config, dict):
+        vectors_config = vectors_config.get("")
+    return getattr(vectors_config, "size", None)
+
+
+def refresh_collection_metadata() -> set:
+    """
+    Fetch the collection list and aliases from Qdrant (two calls) and replace the cache.
+    Aliases (generateQdrantCollection.py --blue-green) are listed under their own name;
+    Qdrant resolves them in every search, so an alias swap takes effect on the next query.
+    Vector sizes are only fetched for the collections that need one (get_vector_size) and
+    kept while the collection exists.
+    """
+    global _collection_names, _collection_aliases
+    client = get_qdrant_client()
+    collections = {collection.name for collection in client.get_collections().collections}
+    aliases = {alias.alias_name: alias.collection_name for alias in client.get_aliases().aliases}
+    names = collections | set(aliases)
+    with _metadata_lock:
+        _collection_names = names
+        _collection_aliases = aliases
+        for collection_name in set(_vector_sizes) - collections:
+            del _vector_sizes[collection_name]
+    return names
+
+
+def resolve_collection(collection_name: str) -> str:
+    """Collection an alias currently points to (cached), or the name itself"""
+    with _metadata_lock:
+        aliases = _collection_aliases
+    return aliases.get(collection_name, collection_name)
+
+
+def get_collection_names() -> set:
+    """Cached collection and alias names; fetched once if no refresh has succeeded yet"""
+    with _metadata_lock:
+        names = _collection_names
+    if names is None:
+        names = refresh_collection_metadata()
+    return set(names)
+
+
+def get_vector_size(collection_name: str) -> int | None:
+    """Dense vector size of a collection or alias, fetched from Qdrant the first time it's needed"""
+    target = resolve_collection(collection_name)
+    with _metadata_lock:
+        size = _vector_sizes.get(target)
+    if size is None:
+        size = _dense_vector_size(get_qdrant_client().get_collection(target).config.params.vectors)
+        with _metadata_lock:
+            _vector_sizes[target] = size
+    return size
+
 
 def get_available_collections():
-    collections = get_qdrant_client().get_collections()
-    available_collections = [c.name for c in collections.collections]
-    return available_collections
+    return sorted(get_collection_names())
+
+
+def collection_exists(collection_name: str) -> bool:
+    """
+    Check the cache. A miss re-fetches the list so freshly built collections are seen right
+    away, at most once per QDRANT_METADATA_REFRESH_S: other misses in that window return False
+    from the cache instead of hitting Qdrant on every request for a missing collection.
+    """
+    global _last_miss_refresh
+    if collection_name in get_collection_names():
+        return True
+    now = time.monotonic()
+    with _metadata_lock:
+        if now - _last_miss_refresh < QDRANT_METADATA_REFRESH_S:
+            return False
+        _last_miss_refresh = now
+    return collection_name in refresh_collection_metadata()
+
+
+def _metadata_refresh_loop():
+    backoff = 1.0
+    while not _refresh_stop.is_set():
+        try:
+            refresh_collection_metadata()
+            backoff, wait = 1.0, QDRANT_METADATA_REFRESH_S
+        except Exception as e:
+            # Retry after 1s, 2s, 4s... until Qdrant is reachable, without blocking any request
+            print(f"❌ Failed to refresh Qdrant collections at {QDRANT_HOST}: {e}")
+            backoff, wait = min(backoff * 2, QDRANT_METADATA_REFRESH_S), backoff
+        _refresh_stop.wait(wait)
+
+
+def start_metadata_refresh():
+    """Start the background thread that keeps the collection cache fresh (once per process)"""
+    global _refresh_thread
+    if _refresh_thread is None or not _refresh_thread.is_alive():
+        _refresh_stop.clear()
+        _refresh_thread = threading.Thread(target=_metadata_refresh_loop, name="qdrant-metadata", daemon=True)
+        _refresh_thread.start()
+
+
+def stop_metadata_refresh():
+    _refresh_stop.set()
+
+
+def warm_up_qdrant(collection_names: list[str]):
+    """
+    Connect to Qdrant, cache the collection metadata and run a few random queries on each
+    collection so the first user searches don't pay for loading the HNSW graph from disk.
+    Never raises: if Qdrant is not up yet, the background refresh keeps retrying.
+    """
+    try:
+        names = refresh_collection_metadata()
+        print(f"✅ Connected to Qdrant at {QDRANT_HOST} ({len(names)} collections)")
+
+        rng = np.random.default_rng()
+        for collection_name in collection_names:
+            if collection_name not in names:
+                print(f"❌ Collection {collection_name} not found in Qdrant, skipping warm-up")
+                continue
+            size = get_vector_size(collection_name)
+            if not size:
+                print(f"❌ Collection {collection_name} has no dense vector, skipping warm-up")
+                continue
+            for _ in range(QDRANT_WARMUP_QUERIES):
+                vector = rng.standard_normal(size).astype(np.float32)
+                get_qdrant_client().query_points(
+                    collection_name=collection_name,
+                    query=(vector / np.linalg.norm(vector)).tolist(),
+                    limit=10,
+                    search_params=get_search_params(),
+                    with_payload=False,
+                )
+            target = resolve_collection(collection_name)
+            alias_info = f" (alias of {target})" if target != collection_name else ""
+            print(f"✅ Warmed up Qdrant collection {collection_name}{alias_info}")
+    except Exception as e:
+        print(f"❌ Qdrant warm-up failed, retrying in the background: {e}")
+    finally:
+        start_metadata_refresh()
 
 
 def search_similar_vectors(text: str, dataset: Dataset, k: int = 3) -> list:
@@ -45,9 +259,9 @@ def search_similar_vectors(text: str, dataset: Dataset, k: int = 3) -> list:
     from utils.embeddings import get_embedding
     query_embedding = get_embedding(text)
     
-    collection_name = dataset.value
+    collection_name = get_collection_name(dataset)
     
-    if collection_name not in get_available_collections():
+    if not collection_exists(collection_name):
         raise ValueError(f"Collection {collection_name} not found in Qdrant")
     
     try:
@@ -55,7 +269,8 @@ def search_similar_vectors(text: str, dataset: Dataset, k: int = 3) -> list:
             collection_name=collection_name,
             query_vector=query_embedding[0].tolist(),
             limit=k,
-            with_payload=True
+            with_payload=["id"],
+            search_params=get_search_params()
         )
         return search_results
     except Exception as e:
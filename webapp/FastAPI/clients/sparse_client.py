@@ -0,0 +1,64 @@
+"""
+Sparse (keyword) query vectors for hybrid search.
+
+Collections built with generateQdrantCollection.py --sparse bm25|splade carry a
+named sparse vector next to the dense one. SPARSE_MODEL and SPARSE_LANGUAGE must
+match the --sparse / --sparse-language used at build time.
+"""
+import os
+
+from qdrant_client.models import QueryRequest, SparseVector
+
+from .qdrant_client import get_qdrant_client, build_payload_filter
+from .vector_backends import SearchHit
+
+SPARSE_MODELS = {
+    "bm25": "Qdrant/bm25",
+    "splade": "prithivida/Splade_PP_en_v1",
+}
+SPARSE_MODEL = os.getenv("SPARSE_MODEL", "bm25")
+SPARSE_LANGUAGE = os.getenv("SPARSE_LANGUAGE", "english")
+
+# Global variables
+_sparse_model = None
+
+
+def get_sparse_model():
+    """Load the fastembed sparse model (BM25 is a tokenizer + stemmer, SPLADE a small ONNX model)"""
+    global _sparse_model
+
+    if _sparse_model is None:
+        if SPARSE_MODEL not in SPARSE_MODELS:
+            raise ValueError(f"Unknown SPARSE_MODEL '{SPARSE_MODEL}'. Available: {list(SPARSE_MODELS)}")
+        from fastembed import SparseTextEmbedding
+
+        model_kwargs = {"language": SPARSE_LANGUAGE} if SPARSE_MODEL == "bm25" else {}
+        _sparse_model = SparseTextEmbedding(model_name=SPARSE_MODELS[SPARSE_MODEL], **model_kwargs)
+        print(f"✅ Sparse model {SPARSE_MODELS[SPARSE_MODEL]} loaded")
+
+    return _sparse_model
+
+
+def encode_sparse_queries(texts: list[str]) -> list[SparseVector]:
+    """Query-side sparse vectors (BM25 queries weight each term 1, IDF is applied by Qdrant)"""
+    return [
+        SparseVector(indices=embedding.indices.tolist(), values=embedding.values.tolist())
+        for embedding in get_sparse_model().query_embed(texts)
+    ]
+
+
+def search_sparse_batch(collection_name: str, sparse_vectors: list[SparseVector], k: int,
+                        filters: dict | None = None) -> list[list[SearchHit]]:
+    """Keyword search on the named sparse vector, one request for the whole batch"""
+    query_filter = build_payload_filter(filters)
+    responses = get_qdrant_client().query_batch_points(
+        collection_name=collection_name,
+        requests=[
+            QueryRequest(query=vector, using=SPARSE_MODEL, limit=k, filter=query_filter, with_payload=["id"])
+            for vector in sparse_vectors
+        ],
+    )
+    return [
+        [SearchHit(point.payload["id"], point.score) for point in response.points if point.payload.get("id")]
+        for response in responses
+    ]
@@ -0,0 +1,348 @@
+"""
+Vector search backends.
+
+All backends share one contract: given a collection name and L2-normalized
+query vectors, return the top-k catalog ids by cosine similarity, best first.
+
+- qdrant: searches the Qdrant server over HTTP (default)
+- faiss: loads the indexes built by generateFAISSDatabases.py into the worker
+  at startup, so a search is an in-memory call with no network hop
+- numpy: exact brute-force search over a memory-mapped embedding matrix
+  written by exportEmbeddingMatrix.py (small catalogs)
+
+Select with VECTOR_BACKEND=qdrant|faiss|numpy.
+
+Phrase-split collections (generateQdrantCollection.py --split-phrases) hold one
+point per sentence, so several points share a catalog id. With
+PHRASE_SPLIT_COLLECTIONS=true results are grouped by id and scored by the best
+matching phrase (max-sim): Qdrant groups server-side, the in-process backends
+over-fetch PHRASE_OVERFETCH x k rows and keep each id once.
+
+Payload filters (type, art_school, period) only exist in Qdrant. Filtered
+searches on an in-process backend go to Qdrant instead (get_filter_backend).
+So do FAISS searches on a collection without a loaded index, e.g. an index
+whose dimension doesn't match EMBEDDING_DIM.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+from qdrant_client.models import QueryRequest
+
+from .embedding_client import EMBEDDING_DIM
+from .qdrant_client import (
+    get_qdrant_client, get_available_collections, get_search_params, build_payload_filter,
+    get_collection_name, warm_up_qdrant, AVAILABLE_DATASETS,
+)
+
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant")
+VECTOR_INDEX_DIR = os.getenv(
+    "VECTOR_INDEX_DIR", os.path.join(os.getenv("DATA_DIR", "../data"), "vector_index")
+)
+PHRASE_SPLIT_COLLECTIONS = os.getenv("PHRASE_SPLIT_COLLECTIONS", "false").lower() == "true"
+PHRASE_OVERFETCH = int(os.getenv("PHRASE_OVERFETCH", "4"))
+
+# Global variables
+_vector_backend = None
+_filter_backend = None
+
+
+class SearchHit(NamedTuple):
+    id: str  # catalog id of the source artwork (SemArt/WikiArt/Ipiranga id)
+    score: float
+
+
+class VectorBackend:
+    """Base class for vector search backends."""
+
+    name = "base"
+    supports_filters = False
+
+    def __init__(self, group_by_id: bool = PHRASE_SPLIT_COLLECTIONS):
+        self.group_by_id = group_by_id
+
+    def load(self):
+        """Prepare the backend at startup (open connections, load indexes)."""
+
+    def collections(self) -> list[str]:
+        raise NotImplementedError
+
+    def search_batch(self, collection_name: str, vectors: np.ndarray, k: int,
+                     filters: dict | None = None) -> list[list[SearchHit]]:
+        """
+        Search several query vectors (shape (n, dim)) in one call.
+        filters: {payload field: [accepted values]}, see build_payload_filter.
+        """
+        raise NotImplementedError
+
+    def search(self, collection_name: str, vector: np.ndarray, k: int, filters: dict | None = None) -> list[SearchHit]:
+        return self.search_batch(collection_name, np.asarray(vector, dtype=np.float32)[None, :], k, filters)[0]
+
+    def _check_filters(self, filters):
+        if filters and not self.supports_filters:
+            raise ValueError(f"The {self.name} backend has no payloads to filter on")
+
+    def _fetch_size(self, k: int) -> int:
+        return k * PHRASE_OVERFETCH if self.group_by_id else k
+
+    def _top_k_unique(self, hits: list[SearchHit], k: int) -> list[SearchHit]:
+        """Keep the first (best) hit of each id; hits must be sorted best first"""
+        if not self.group_by_id:
+            return hits[:k]
+        seen = set()
+        unique = []
+        for hit in hits:
+            if hit.id not in seen:
+                seen.add(hit.id)
+                unique.append(hit)
+                if len(unique) == k:
+                    break
+        return unique
+
+
+class QdrantBackend(VectorBackend):
+    """
+    Searches the Qdrant server; all queries of a batch go in one request.
+    Only the `id` payload field is returned, metadata comes from the catalog.
+    Phrase-split collections use query_points_groups on `id`, which returns
+    exactly k distinct artworks; the Python client has no batch form of it, so
+    the queries of a batch run concurrently instead.
+    load() warms the collections up and starts the background collection cache
+    refresh, so collections() does no request of its own.
+    """
+
+    name = "qdrant"
+    supports_filters = True
+
+    def __init__(self, group_by_id: bool = PHRASE_SPLIT_COLLECTIONS):
+        super().__init__(group_by_id)
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="qdrant-groups")
+
+    def load(self):
+        warm_up_qdrant([get_collection_name(dataset) for dataset in AVAILABLE_DATASETS])
+
+    def collections(self) -> list[str]:
+        return get_available_collections()
+
+    def _search_groups(self, collection_name, vector, k, search_params, query_filter):
+        response = get_qdrant_client().query_points_groups(
+            collection_name=collection_name,
+            query=vector.tolist(),
+            group_by="id",
+            group_size=1,
+            limit=k,
+            query_filter=query_filter,
+            search_params=search_params,
+            with_payload=False,
+        )
+        return [SearchHit(str(group.id), group.hits[0].score) for group in response.groups if group.hits]
+
+    def search_batch(self, collection_name, vectors, k, filters=None):
+        search_params = get_search_params()
+        query_filter = build_payload_filter(filters)
+        if self.group_by_id:
+            return list(self._executor.map(
+                lambda vector: self._search_groups(collection_name, vector, k, search_params, query_filter), vectors
+            ))
+
+        responses = get_qdrant_client().query_batch_points(
+            collection_name=collection_name,
+            requests=[
+                QueryRequest(query=vector.tolist(), limit=k, params=search_params, filter=query_filter, with_payload=["id"])
+                for vector in vectors
+            ],
+        )
+        return [
+            [SearchHit(point.payload["id"], point.score) for point in response.points if point.payload.get("id")]
+            for response in responses
+        ]
+
+
+class FaissBackend(VectorBackend):
+    """
+    In-process FAISS search. Expects, for each collection, the files written by
+    generateFAISSDatabases.py in VECTOR_INDEX_DIR:
+        <collection>_index.faiss   inner-product index over normalized vectors
+        <collection>_ids.npy       catalog id of each index row
+    Indexes whose dimension differs from EMBEDDING_DIM are skipped at load time;
+    searches on collections without an index go to Qdrant.
+    """
+
+    name = "faiss"
+
+    def __init__(self, index_dir: str = VECTOR_INDEX_DIR, group_by_id: bool = PHRASE_SPLIT_COLLECTIONS):
+        super().__init__(group_by_id)
+        self.index_dir = index_dir
+        self._indexes = {}
+
+    def load(self):
+        try:
+            import faiss
+        except ImportError:
+            raise RuntimeError("VECTOR_BACKEND=faiss requires the faiss-cpu package")
+
+        suffix = "_index.faiss"
+        skipped = 0
+        for file_name in sorted(os.listdir(self.index_dir)):
+            if not file_name.endswith(suffix):
+                continue
+            collection_name = file_name[: -len(suffix)]
+            index = faiss.read_index(os.path.join(self.index_dir, file_name))
+            if index.d != EMBEDDING_DIM:
+                print(
+                    f"❌ FAISS index {file_name} has dim {index.d} but EMBEDDING_DIM={EMBEDDING_DIM}, "
+                    f"searches on {collection_name} will use Qdrant"
+                )
+                skipped += 1
+                continue
+            ids = np.load(os.path.join(self.index_dir, f"{collection_name}_ids.npy"), allow_pickle=False)
+            if len(ids) != index.ntotal:
+                raise ValueError(
+                    f"FAISS index {file_name} has {index.ntotal} vectors but {len(ids)} ids"
+                )
+            self._indexes[collection_name] = (index, ids)
+            print(f"✅ Loaded FAISS index {collection_name} ({index.ntotal} vectors, dim {index.d})")
+
+        if not self._indexes and not skipped:
+            raise RuntimeError(f"No FAISS indexes found in {self.index_dir}")
+
+    def collections(self) -> list[str]:
+        return list(self._indexes)
+
+    def search_batch(self, collection_name, vectors, k, filters=None):
+        self._check_filters(filters)
+        if collection_name not in self._indexes:
+            return get_qdrant_fallback(self.group_by_id).search_batch(collection_name, vectors, k, filters)
+
+        index, ids = self._indexes[collection_name]
+        if vectors.shape[1] != index.d:
+            raise ValueError(
+                f"Query vectors have dim {vectors.shape[1]} but FAISS index {collection_name} has dim {index.d}"
+            )
+        scores, rows = index.search(np.ascontiguousarray(vectors, dtype=np.float32), self._fetch_size(k))
+        return [
+            self._top_k_unique(
+                [SearchHit(str(ids[row]), float(score)) for score, row in zip(query_scores, query_rows) if row >= 0], k
+            )
+            for query_scores, query_rows in zip(scores, rows)
+        ]
+
+
+class NumpyBackend(VectorBackend):
+    """
+    Exact search with one matmul per batch of queries plus argpartition top-k.
+    Expects, for each collection, the files written by exportEmbeddingMatrix.py
+    in VECTOR_INDEX_DIR:
+        <collection>_embeddings.npy      normalized float32 or float16 matrix (rows = points)
+        <collection>_embeddings_ids.npy  catalog id of each row
+    Matrices are opened with mmap_mode="r", so every uvicorn worker shares the
+    same page-cache pages instead of holding its own copy.
+    """
+
+    name = "numpy"
+
+    # float16 matrices are upcast block by block (numpy has no float16 BLAS)
+    block_rows = 16384
+
+    def __init__(self, index_dir: str = VECTOR_INDEX_DIR, group_by_id: bool = PHRASE_SPLIT_COLLECTIONS):
+        super().__init__(group_by_id)
+        self.index_dir = index_dir
+        self._matrices = {}
+
+    def load(self):
+        suffix = "_embeddings.npy"
+        for file_name in sorted(os.listdir(self.index_dir)):
+            if not file_name.endswith(suffix):
+                continue
+            collection_name = file_name[: -len(suffix)]
+            matrix = np.load(os.path.join(self.index_dir, file_name), mmap_mode="r")
+            ids = np.load(os.path.join(self.index_dir, f"{collection_name}_embeddings_ids.npy"), allow_pickle=False)
+            if len(ids) != len(matrix):
+                raise ValueError(
+                    f"Embedding matrix {file_name} has {len(matrix)} rows but {len(ids)} ids"
+                )
+            self._matrices[collection_name] = (matrix, ids)
+            print(f"✅ Mapped embedding matrix {collection_name} ({matrix.shape[0]} x {matrix.shape[1]}, {matrix.dtype})")
+
+        if not self._matrices:
+            raise RuntimeError(f"No embedding matrices found in {self.index_dir}")
+
+    def collections(self) -> list[str]:
+        return list(self._matrices)
+
+    def _scores(self, matrix: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        if matrix.dtype == np.float32:
+            return np.asarray(queries @ matrix.T)
+
+        scores = np.empty((len(queries), len(matrix)), dtype=np.float32)
+        for start in range(0, len(matrix), self.block_rows):
+            block = np.asarray(matrix[start : start + self.block_rows], dtype=np.float32)
+            scores[:, start : start + len(block)] = queries @ block.T
+        return scores
+
+    def search_batch(self, collection_name, vectors, k, filters=None):
+        self._check_filters(filters)
+        if collection_name not in self._matrices:
+            raise ValueError(f"Collection {collection_name} not loaded in NumPy backend")
+
+        matrix, ids = self._matrices[collection_name]
+        queries = np.ascontiguousarray(vectors, dtype=np.float32)
+        scores = self._scores(matrix, queries)
+
+        fetch = min(self._fetch_size(k), scores.shape[1])
+        rows = np.argpartition(-scores, fetch - 1, axis=1)[:, :fetch]
+        top_scores = np.take_along_axis(scores, rows, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        rows = np.take_along_axis(rows, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        return [
+            self._top_k_unique(
+                [SearchHit(str(ids[row]), float(score)) for score, row in zip(query_scores, query_rows)], k
+            )
+            for query_scores, query_rows in zip(top_scores, rows)
+        ]
+
+
+BACKENDS = {
+    QdrantBackend.name: QdrantBackend,
+    FaissBackend.name: FaissBackend,
+    NumpyBackend.name: NumpyBackend,
+}
+
+
+def initialize_vector_backend():
+    """Create and load the configured backend at startup."""
+    global _vector_backend
+    if VECTOR_BACKEND not in BACKENDS:
+        raise ValueError(f"Unknown VECTOR_BACKEND '{VECTOR_BACKEND}'. Available: {list(BACKENDS)}")
+    backend = BACKENDS[VECTOR_BACKEND]()
+    backend.load()
+    _vector_backend = backend
+    print(f"✅ Vector backend '{backend.name}' ready")
+    return _vector_backend
+
+
+def get_vector_backend() -> VectorBackend:
+    """Return the configured backend, loading it lazily if startup did not."""
+    if _vector_backend is None:
+        return initialize_vector_backend()
+    return _vector_backend
+
+
+def get_qdrant_fallback(group_by_id: bool = PHRASE_SPLIT_COLLECTIONS) -> VectorBackend:
+    """Qdrant backend for the searches an in-process backend can't serve, created on first use."""
+    global _filter_backend
+    if _filter_backend is None:
+        _filter_backend = QdrantBackend(group_by_id=group_by_id)
+        _filter_backend.load()
+    return _filter_backend
+
+
+def get_filter_backend() -> VectorBackend:
+    """Backend for filtered searches: the configured one if it can filter, Qdrant otherwise."""
+    backend = get_vector_backend()
+    if backend.supports_filters:
+        return backend
+    return get_qdrant_fallback(backend.group_by_id)
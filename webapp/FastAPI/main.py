@@ -1,11 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 import os
-from routes import art_routes, doctor_routes, patient_routes, session_routes, memory_reconstruction, vr_routes, art_exploration, evaluation_routes
+from routes import art_routes, doctor_routes, patient_routes, session_routes, memory_reconstruction, vr_routes, art_exploration, evaluation_routes, metrics_routes
 import database
 from utils.spell_check import initialize_language_tools
+from utils.static_images import ImageFiles, FileDescriptorCache
+from clients import initialize_vector_backend, warm_up_embeddings, stop_metadata_refresh
+from utils.embeddings import warm_up_hybrid_search
 
 load_dotenv()
 
@@ -26,15 +28,20 @@ STATIC_DIR = os.getenv("STATIC_DIR", "../data/static")
 wikiart_dir = os.path.join(STATIC_DIR, "wikiart")
 semart_dir = os.path.join(STATIC_DIR, "semart")
 
+# Open file descriptors shared by both image mounts
+image_fd_cache = FileDescriptorCache(
+    max_open_files=int(os.getenv("STATIC_FD_CACHE_SIZE", "256"))
+)
+
 app.mount(
     "/art-images/wikiart",
-    StaticFiles(directory=wikiart_dir),
+    ImageFiles(directory=wikiart_dir, fd_cache=image_fd_cache),
     name="wikiart_images",
 )
 
 app.mount(
     "/art-images/semart", 
-    StaticFiles(directory=semart_dir),
+    ImageFiles(directory=semart_dir, fd_cache=image_fd_cache),
     name="semart_images",
 )
 
@@ -47,6 +54,7 @@ app.include_router(memory_reconstruction.router, prefix="/api/memory", tags=["Me
 app.include_router(art_exploration.router, prefix="/api/art", tags=["Art Exploration"])
 app.include_router(vr_routes.router, prefix="/api/vr", tags=["VR"])
 app.include_router(evaluation_routes.router, prefix="/api/evaluation", tags=["Evaluation"])
+app.include_router(metrics_routes.router, prefix="/api/metrics", tags=["Metrics"])
 
 
 @app.on_event("startup")
@@ -54,11 +62,16 @@ async def startup_event():
     await database.connect_to_mysql()
     initialize_language_tools()
     print("✅ Spell checking tools initialized")
+    initialize_vector_backend()
+    warm_up_embeddings()
+    warm_up_hybrid_search()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     await database.disconnect_from_mysql()
+    image_fd_cache.close()
+    stop_metadata_refresh()
 
 
 @app.get("/")
@@ -7,4 +7,5 @@ from . import session_routes
 from . import memory_reconstruction
 from . import vr_routes
 from . import art_exploration
-from . import evaluation_routes
\ No newline at end of file
+from . import evaluation_routes
+from . import metrics_routes
\ No newline at end of file
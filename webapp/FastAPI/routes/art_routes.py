@@ -4,9 +4,11 @@ from utils.text_processing import doTextSegmentation
 from utils.embeddings import (
     get_top_k_images_from_text,
     get_top_k_images_for_sections,
+    get_top_k_images_federated,
 )
 from api_types.common import (
     SearchImagesRequestDTO,
+    FederatedSearchImagesRequestDTO,
     SelectImagesPerSectionRequestDTO,
     SearchImagesResponse,
     SelectImagesResponse,
@@ -24,25 +26,40 @@ logger = logging.getLogger(__name__)
 
 
 @router.post("/search-images")
-async def search_images(
+def search_images(
     body: SearchImagesRequestDTO, db=Depends(get_db)
 ) -> SearchImagesResponse:
     text = check_and_correct_text(body.story, body.language)
-    listArt = get_top_k_images_from_text(text, body.dataset, k=6)
+    filters = body.filters.to_payload_filters() if body.filters else None
+    listArt = get_top_k_images_from_text(text, body.dataset, k=6, filters=filters)
+
+    return {"images": listArt}
+
+
+@router.post("/search-images-federated")
+def search_images_federated(
+    body: FederatedSearchImagesRequestDTO, db=Depends(get_db)
+) -> SearchImagesResponse:
+    text = check_and_correct_text(body.story, body.language)
+    filters = body.filters.to_payload_filters() if body.filters else None
+    listArt = get_top_k_images_federated(
+        text, body.datasets, k=body.k, quotas=body.quotas, filters=filters
+    )
 
     return {"images": listArt}
 
 
 @router.post("/select-images-per-section")
-async def select_images_per_section(
+def select_images_per_section(
     body: SelectImagesPerSectionRequestDTO, db=Depends(get_db)
 ) -> SelectImagesResponse:
     story = check_and_correct_text(body.story, body.language)
 
     sections = doTextSegmentation(body.segmentation, story, max_sections=8)
     # Batched embeddings: one embeddings API call for all sections
+    filters = body.filters.to_payload_filters() if body.filters else None
     results = get_top_k_images_for_sections(
-        sections, body.dataset, k=body.k
+        sections, body.dataset, k=body.k, filters=filters
     )
 
     return {"sections": results}
@@ -0,0 +1,13 @@
+"""
+Per-worker service metrics (embedding batching, ...).
+"""
+
+from fastapi import APIRouter
+from utils import metrics
+
+router = APIRouter()
+
+
+@router.get("")
+async def get_metrics():
+    return metrics.snapshot()
@@ -32,7 +32,7 @@ def load_vr_prompt() -> str:
 
 
 @router.post("/select-images-rv")
-async def select_images_rv(
+def select_images_rv(
     body: SelectImagesRVRequestDTO, db=Depends(get_db)
 ) -> SectionVRResponseDTO:
     # Split the Story into Segments
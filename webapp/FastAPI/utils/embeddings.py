@@ -1,11 +1,42 @@
+import os
+import time
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
 from orm import CatalogItem
 from api_types.common import Dataset, ImageItem
-from clients import get_database_client, get_qdrant_client, encode_text
+from clients import get_database_client, get_collection_name, get_vector_backend, get_filter_backend, encode_text
+from clients.vector_backends import SearchHit
+from utils import metrics
+
+# Retrieval mode: "dense" (embeddings only) or "hybrid" (dense + sparse keyword search
+# fused with reciprocal rank fusion; needs collections built with --sparse)
+SEARCH_MODE = os.getenv("SEARCH_MODE", "dense")
+HYBRID_DENSE_K = int(os.getenv("HYBRID_DENSE_K", "12"))
+HYBRID_SPARSE_K = int(os.getenv("HYBRID_SPARSE_K", "12"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Sparse half of hybrid search
+_search_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="vector-search")
+# Per-collection federated searches. A separate pool: in hybrid mode each of these tasks waits on
+# a sparse search in _search_executor, which would deadlock if both ran on the same saturated pool.
+_federated_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="federated-search")
+_sparse_search_ms = metrics.histogram(
+    "hybrid_sparse_search_ms", [1, 2, 5, 10, 25, 50, 100, 250, 500], "Sparse encode + search per batch"
+)
+_fusion_ms = metrics.histogram(
+    "hybrid_fusion_ms", [0.01, 0.05, 0.1, 0.5, 1, 5], "Reciprocal rank fusion per batch"
+)
+_federated_search_ms = metrics.histogram(
+    "federated_search_ms", [5, 10, 25, 50, 100, 250, 500, 1000], "Concurrent search of all selected collections"
+)
+_federated_hydrate_ms = metrics.histogram(
+    "federated_hydrate_ms", [1, 2, 5, 10, 25, 50, 100, 250], "Single catalog query for the merged hits"
+)
 
 # Lazy client initialization
 _SessionLocal = None
-_qdrant_client = None
 
 def _get_session_local():
     global _SessionLocal
@@ -13,12 +44,6 @@ def _get_session_local():
         _SessionLocal = get_database_client()
     return _SessionLocal
 
-def _get_qdrant_client():
-    global _qdrant_client
-    if _qdrant_client is None:
-        _qdrant_client = get_qdrant_client()
-    return _qdrant_client
-
 
 # Available datasets/collections
 available_datasets = [Dataset.wikiart, Dataset.semart, Dataset.ipiranga]
@@ -31,6 +56,7 @@ art_name_columns = {Dataset.wikiart: "file_name", Dataset.semart: "file_name", D
 def get_embedding(text: str):
     """
     Get a single normalized embedding vector for a piece of text.
+    Normalization runs after encode_text's Matryoshka truncation.
     """
     embedding = encode_text([text], convert_to_numpy=True)
     embedding = embedding / np.linalg.norm(embedding, axis=1, keepdims=True)  # Normalize
@@ -143,112 +169,270 @@ def format_catalog_item_info(catalog_item: CatalogItem, include_full_metadata: b
     return ImageItem(**artwork_info)
 
 
-def _search_top_k_from_embedding(
-    embedding_vector: np.ndarray, dataset: Dataset, k: int = 3
-):
+# CatalogItem column holding the source id of each dataset (what the vector collections store)
+source_id_columns = {
+    Dataset.semart: CatalogItem.semart_id,
+    Dataset.wikiart: CatalogItem.wikiart_id,
+    Dataset.ipiranga: CatalogItem.ipiranga_id,
+}
+source_relationships = {
+    Dataset.semart: CatalogItem.semart,
+    Dataset.wikiart: CatalogItem.wikiart,
+    Dataset.ipiranga: CatalogItem.ipiranga,
+}
+
+
+def _fetch_catalog_items(db, keys) -> dict:
     """
-    Internal helper: given a single embedding vector, search Qdrant and return formatted images.
+    Internal helper: load the CatalogItems (with their source rows) for (dataset, source id)
+    pairs in a single query, keyed by those pairs.
     """
-    if dataset not in available_datasets:
-        raise ValueError(f"Dataset {dataset} not available. Available: {available_datasets}")
+    ids_by_dataset = {}
+    for dataset, artwork_id in keys:
+        ids_by_dataset.setdefault(dataset, set()).add(artwork_id)
+    if not ids_by_dataset:
+        return {}
+
+    catalog_items = (
+        db.query(CatalogItem)
+        .options(*(joinedload(source_relationships[dataset]) for dataset in ids_by_dataset))
+        .filter(or_(*(
+            and_(CatalogItem.source == dataset, source_id_columns[dataset].in_(ids))
+            for dataset, ids in ids_by_dataset.items()
+        )))
+        .all()
+    )
+    return {
+        (item.source, getattr(item, source_id_columns[item.source].key)): item
+        for item in catalog_items
+    }
 
-    collection_name = dataset.value
 
-    # Search in Qdrant with error handling
-    try:
-        search_results = _get_qdrant_client().search(
-            collection_name=collection_name,
-            query_vector=embedding_vector.tolist(),
-            limit=k,
-            with_payload=True,
+def _format_hits(hits, catalog_items: dict) -> list[ImageItem]:
+    """
+    Internal helper: format (dataset, hit) pairs in order, skipping ids missing from the catalog.
+    """
+    images = []
+    for dataset, hit in hits:
+        image_item = format_catalog_item_info(
+            catalog_items.get((dataset, hit.id)), include_full_metadata=True
         )
-    except Exception as e:
-        print(f"❌ Error searching Qdrant collection {collection_name}: {e}")
-        return []
+        if image_item:
+            images.append(image_item)
+    return images
 
-    db = _get_session_local()()
-    try:
-        images = []
-        for result in search_results:
-            payload = result.payload
 
-            # Get the artwork ID from the payload
-            artwork_id = payload.get("id")
-            if not artwork_id:
-                continue
+def _hits_to_images(db, hits_per_query, dataset: Dataset) -> list[list[ImageItem]]:
+    """
+    Internal helper: turn vector search hits (source ids) into formatted images, best first,
+    with one catalog query for all queries of the batch.
+    """
+    catalog_items = _fetch_catalog_items(
+        db, [(dataset, hit.id) for hits in hits_per_query for hit in hits]
+    )
+    return [
+        _format_hits([(dataset, hit) for hit in hits], catalog_items)
+        for hits in hits_per_query
+    ]
+
 
-            # Query CatalogItem based on dataset and artwork ID
-            catalog_item = None
-            if dataset == Dataset.semart:
-                catalog_item = (
-                    db.query(CatalogItem)
-                    .filter(
-                        CatalogItem.semart_id == artwork_id,
-                        CatalogItem.source == Dataset.semart,
-                    )
-                    .first()
-                )
-            elif dataset == Dataset.wikiart:
-                catalog_item = (
-                    db.query(CatalogItem)
-                    .filter(
-                        CatalogItem.wikiart_id == artwork_id,
-                        CatalogItem.source == Dataset.wikiart,
-                    )
-                    .first()
-                )
-            elif dataset == Dataset.ipiranga:
-                catalog_item = (
-                    db.query(CatalogItem)
-                    .filter(
-                        CatalogItem.ipiranga_id == artwork_id,
-                        CatalogItem.source == Dataset.ipiranga,
-                    )
-                    .first()
-                )
-
-            if not catalog_item:
+def reciprocal_rank_fusion(result_lists: list[list[SearchHit]], k: int, rrf_k: int = RRF_K) -> list[SearchHit]:
+    """
+    Merge ranked hit lists: each id scores sum(1 / (rrf_k + rank)) over the lists it
+    appears in. Only ranks matter, so dense cosine and BM25 scores need no calibration.
+    """
+    scores = {}
+    for hits in result_lists:
+        rank = 0
+        seen = set()
+        for hit in hits:
+            if hit.id in seen:  # phrase-split collections: keep each artwork's best phrase
                 continue
+            seen.add(hit.id)
+            rank += 1
+            scores[hit.id] = scores.get(hit.id, 0.0) + 1.0 / (rrf_k + rank)
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+    return [SearchHit(hit_id, score) for hit_id, score in fused]
+
+
+def warm_up_hybrid_search():
+    """Load the sparse model at startup when SEARCH_MODE=hybrid"""
+    if SEARCH_MODE != "hybrid":
+        return
+    from clients.sparse_client import encode_sparse_queries
+    encode_sparse_queries(["warm-up"])
+    print(f"✅ Hybrid search enabled (dense k={HYBRID_DENSE_K}, sparse k={HYBRID_SPARSE_K}, RRF k={RRF_K})")
+
+
+def _search_sparse(collection_name: str, texts: list[str], k: int, filters: dict = None) -> list[list[SearchHit]]:
+    from clients.sparse_client import encode_sparse_queries, search_sparse_batch
+
+    start = time.perf_counter()
+    hits = search_sparse_batch(collection_name, encode_sparse_queries(texts), k, filters)
+    _sparse_search_ms.observe((time.perf_counter() - start) * 1000)
+    return hits
+
+
+def _search_hits(
+    collection_name: str, embeddings: np.ndarray, k: int, texts: list[str] = None, filters: dict = None
+) -> list[list[SearchHit]]:
+    """Dense search, or dense + sparse in parallel fused with RRF in hybrid mode"""
+    backend = get_filter_backend() if filters else get_vector_backend()
+    if SEARCH_MODE != "hybrid" or texts is None:
+        return backend.search_batch(collection_name, embeddings, k, filters)
+
+    sparse_future = _search_executor.submit(_search_sparse, collection_name, texts, max(HYBRID_SPARSE_K, k), filters)
+    dense_hits = backend.search_batch(collection_name, embeddings, max(HYBRID_DENSE_K, k), filters)
+    sparse_hits = sparse_future.result()
+
+    start = time.perf_counter()
+    fused = [
+        reciprocal_rank_fusion([dense, sparse], k)
+        for dense, sparse in zip(dense_hits, sparse_hits)
+    ]
+    _fusion_ms.observe((time.perf_counter() - start) * 1000)
+    return fused
+
+
+def _search_top_k_from_embeddings(
+    embeddings: np.ndarray, dataset: Dataset, k: int = 3, texts: list[str] = None, filters: dict = None
+) -> list[list[ImageItem]]:
+    """
+    Internal helper: search all embeddings (shape (n, dim)) in one vector backend call
+    and return one list of formatted images per embedding.
+    `texts` (the query texts) enable the sparse half of hybrid search.
+    `filters` ({payload field: [values]}) restrict the search to matching artworks.
+    """
+    if dataset not in available_datasets:
+        raise ValueError(f"Dataset {dataset} not available. Available: {available_datasets}")
 
-            # Use the helper function to format the catalog item
-            image_item = format_catalog_item_info(
-                catalog_item, include_full_metadata=True
-            )
-            if image_item:
-                images.append(image_item)
+    collection_name = get_collection_name(dataset)
 
-        return images
+    # Search with error handling
+    try:
+        hits_per_query = _search_hits(collection_name, embeddings, k, texts, filters)
+    except Exception as e:
+        print(f"❌ Error searching collection {collection_name}: {e}")
+        return [[] for _ in range(len(embeddings))]
 
+    db = _get_session_local()()
+    try:
+        return _hits_to_images(db, hits_per_query, dataset)
     finally:
         db.close()
 
 
-def get_top_k_images_from_text(text: str, dataset: Dataset, k: int = 3):
+def _search_top_k_from_embedding(
+    embedding_vector: np.ndarray, dataset: Dataset, k: int = 3, text: str = None, filters: dict = None
+):
+    """
+    Internal helper: given a single embedding vector, search and return formatted images.
     """
-    Search for top k similar images using Qdrant vector database and return CatalogItem information.
+    texts = [text] if text is not None else None
+    return _search_top_k_from_embeddings(embedding_vector[None, :], dataset, k, texts, filters)[0]
+
+
+def get_top_k_images_from_text(text: str, dataset: Dataset, k: int = 3, filters: dict = None):
+    """
+    Search for top k similar images with the configured vector backend and return CatalogItem information.
     (Single text version)
     """
     # Get query embedding (shape: (1, dim))
     query_embedding = get_embedding(text)
-    return _search_top_k_from_embedding(query_embedding[0], dataset, k)
+    return _search_top_k_from_embedding(query_embedding[0], dataset, k, text, filters)
 
 
 def get_top_k_images_for_sections(
-    sections: list[str], dataset: Dataset, k: int = 3
+    sections: list[str], dataset: Dataset, k: int = 3, filters: dict = None
 ):
     """
     Batched version for multiple sections:
     - Calls the embeddings API once with all sections
-    - Then runs one Qdrant search per section embedding
+    - Then runs one batched vector search for all section embeddings
     """
     if not sections:
         return []
 
     embeddings = get_embeddings_for_texts(sections)
-    results = []
+    images_per_section = _search_top_k_from_embeddings(embeddings, dataset, k, sections, filters)
 
-    for section_text, section_embedding in zip(sections, embeddings):
-        images = _search_top_k_from_embedding(section_embedding, dataset, k)
-        results.append({"section": section_text, "images": images})
+    return [
+        {"section": section_text, "images": images}
+        for section_text, images in zip(sections, images_per_section)
+    ]
 
-    return results
\ No newline at end of file
+def merge_with_quotas(hits_by_dataset: dict, k: int, quotas: dict = None) -> list:
+    """
+    Merge per-dataset hit lists by score into at most k (dataset, hit) pairs.
+    Each dataset takes at most its quota (default ceil(k / number of datasets)) on the
+    first pass; slots left empty are then filled with the best remaining hits of any dataset.
+    Scores are comparable because every collection is searched with the same embedding
+    (and the same fusion in hybrid mode).
+    """
+    if not hits_by_dataset:
+        return []
+    default_quota = -(-k // len(hits_by_dataset))
+    quotas = {dataset: (quotas or {}).get(dataset, default_quota) for dataset in hits_by_dataset}
+
+    ranked = sorted(
+        ((dataset, hit) for dataset, hits in hits_by_dataset.items() for hit in hits),
+        key=lambda pair: pair[1].score,
+        reverse=True,
+    )
+    selected, leftovers = [], []
+    taken = {dataset: 0 for dataset in hits_by_dataset}
+    for dataset, hit in ranked:
+        if len(selected) < k and taken[dataset] < quotas[dataset]:
+            selected.append((dataset, hit))
+            taken[dataset] += 1
+        else:
+            leftovers.append((dataset, hit))
+    selected.extend(leftovers[:k - len(selected)])
+
+    return sorted(selected, key=lambda pair: pair[1].score, reverse=True)
+
+
+def get_top_k_images_federated(
+    text: str, datasets: list[Dataset], k: int = 6, quotas: dict = None, filters: dict = None
+):
+    """
+    Federated search across several datasets:
+    - Embeds the query once
+    - Searches every selected collection concurrently (a failing collection contributes nothing)
+    - Merges the hits by score with per-dataset quotas
+    - Loads all catalog items in one query
+    """
+    datasets = list(dict.fromkeys(datasets))
+    for dataset in datasets:
+        if dataset not in available_datasets:
+            raise ValueError(f"Dataset {dataset} not available. Available: {available_datasets}")
+
+    query_embedding = get_embedding(text)
+
+    start = time.perf_counter()
+    futures = {
+        dataset: _federated_executor.submit(
+            _search_hits, get_collection_name(dataset), query_embedding, k, [text], filters
+        )
+        for dataset in datasets
+    }
+    hits_by_dataset = {}
+    for dataset, future in futures.items():
+        try:
+            hits_by_dataset[dataset] = future.result()[0]
+        except Exception as e:
+            print(f"❌ Error searching collection {get_collection_name(dataset)}: {e}")
+            hits_by_dataset[dataset] = []
+    _federated_search_ms.observe((time.perf_counter() - start) * 1000)
+
+    merged = merge_with_quotas(hits_by_dataset, k, quotas)
+
+    start = time.perf_counter()
+    db = _get_session_local()()
+    try:
+        catalog_items = _fetch_catalog_items(db, [(dataset, hit.id) for dataset, hit in merged])
+        images = _format_hits(merged, catalog_items)
+    finally:
+        db.close()
+    _federated_hydrate_ms.observe((time.perf_counter() - start) * 1000)
+    return images
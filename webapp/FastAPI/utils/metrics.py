@@ -0,0 +1,92 @@
+"""
+In-process metrics (counters, gauges and histograms) served by GET /api/metrics.
+
+Values are per uvicorn worker; the response includes the worker pid so
+scrapes from several workers can be told apart.
+"""
+import bisect
+import os
+import threading
+
+_lock = threading.Lock()
+_metrics = {}
+
+
+class Counter:
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        with _lock:
+            self.value += amount
+
+    def snapshot(self):
+        return {"type": "counter", "description": self.description, "value": self.value}
+
+
+class Gauge:
+    """Value read from a callback at scrape time."""
+
+    def __init__(self, name: str, read, description: str = ""):
+        self.name = name
+        self.description = description
+        self.read = read
+
+    def snapshot(self):
+        return {"type": "gauge", "description": self.description, "value": self.read()}
+
+
+class Histogram:
+    def __init__(self, name: str, buckets: list[float], description: str = ""):
+        self.name = name
+        self.description = description
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        with _lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self):
+        with _lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self.buckets + ["+Inf"], self.counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            return {
+                "type": "histogram",
+                "description": self.description,
+                "count": self.count,
+                "sum": round(self.sum, 3),
+                "mean": round(self.sum / self.count, 3) if self.count else None,
+                "buckets": buckets,
+            }
+
+
+def _register(metric):
+    with _lock:
+        return _metrics.setdefault(metric.name, metric)
+
+
+def counter(name: str, description: str = "") -> Counter:
+    return _register(Counter(name, description))
+
+
+def gauge(name: str, read, description: str = "") -> Gauge:
+    return _register(Gauge(name, read, description))
+
+
+def histogram(name: str, buckets: list[float], description: str = "") -> Histogram:
+    return _register(Histogram(name, buckets, description))
+
+
+def snapshot() -> dict:
+    metrics = {name: metric.snapshot() for name, metric in sorted(_metrics.items())}
+    return {"pid": os.getpid(), "metrics": metrics}
@@ -0,0 +1,186 @@
+"""
+Static artwork image serving.
+
+Drop-in replacement for Starlette's StaticFiles on the /art-images mounts:
+- keeps an LRU cache of open file descriptors for hot artworks
+- reads with os.pread on the cached descriptor (no open/seek/close per request)
+- hands the file to the server with the ASGI "http.response.pathsend" extension
+  when the server advertises it (zero-copy, e.g. Granian)
+- keeps Starlette's ETag / Last-Modified 304 handling and byte-range support
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import (
+    FileResponse,
+    MalformedRangeHeader,
+    PlainTextResponse,
+    RangeNotSatisfiable,
+)
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+CHUNK_SIZE = 256 * 1024
+
+
+class _CachedFile:
+    __slots__ = ("fd", "signature", "refs", "evicted")
+
+    def __init__(self, fd: int, signature: tuple):
+        self.fd = fd
+        self.signature = signature
+        self.refs = 0
+        self.evicted = False
+
+
+class FileDescriptorCache:
+    """
+    LRU cache of read-only file descriptors keyed by path.
+
+    Entries are validated against (inode, mtime, size) of the stat result the
+    request was resolved with, so replaced images are reopened. Evicted
+    descriptors are only closed once no response is still reading from them.
+    """
+
+    def __init__(self, max_open_files: int = 256):
+        self.max_open_files = max_open_files
+        self._entries: "OrderedDict[str, _CachedFile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, path: str, stat_result: os.stat_result) -> _CachedFile:
+        """Return a referenced descriptor for path. Blocking: call from a worker thread."""
+        signature = (stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size)
+
+        with self._lock:
+            entry = self._take(path, signature)
+            if entry is not None:
+                return entry
+
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+        new_entry = _CachedFile(fd, signature)
+
+        with self._lock:
+            entry = self._take(path, signature)
+            if entry is not None:
+                # Another request opened the same file concurrently
+                os.close(fd)
+                return entry
+
+            new_entry.refs = 1
+            self._entries[path] = new_entry
+            while len(self._entries) > self.max_open_files:
+                self._discard(next(iter(self._entries)))
+            return new_entry
+
+    def release(self, entry: _CachedFile):
+        with self._lock:
+            entry.refs -= 1
+            if entry.evicted and entry.refs == 0:
+                os.close(entry.fd)
+
+    def close(self):
+        """Close every cached descriptor (in-flight ones close on release)."""
+        with self._lock:
+            for path in list(self._entries):
+                self._discard(path)
+
+    def _take(self, path: str, signature: tuple):
+        entry = self._entries.get(path)
+        if entry is None:
+            return None
+        if entry.signature != signature:
+            self._discard(path)
+            return None
+        entry.refs += 1
+        self._entries.move_to_end(path)
+        return entry
+
+    def _discard(self, path: str):
+        entry = self._entries.pop(path)
+        entry.evicted = True
+        if entry.refs == 0:
+            os.close(entry.fd)
+
+
+class ImageFileResponse(FileResponse):
+    """FileResponse that streams from a FileDescriptorCache instead of reopening the file."""
+
+    chunk_size = CHUNK_SIZE
+
+    def __init__(
+        self,
+        path: str,
+        stat_result: os.stat_result,
+        fd_cache: FileDescriptorCache,
+        status_code: int = 200,
+    ):
+        super().__init__(path, status_code=status_code, stat_result=stat_result)
+        self.fd_cache = fd_cache
+
+    async def __call__(self, scope, receive, send):
+        send_header_only = scope["method"].upper() == "HEAD"
+        file_size = self.stat_result.st_size
+
+        headers = Headers(scope=scope)
+        http_range = headers.get("range")
+        http_if_range = headers.get("if-range")
+
+        start, end, status_code = 0, file_size, self.status_code
+        if http_range is not None and (http_if_range is None or self._should_use_range(http_if_range)):
+            try:
+                ranges = self._parse_range_header(http_range, file_size)
+            except MalformedRangeHeader as exc:
+                return await PlainTextResponse(exc.content, status_code=400)(scope, receive, send)
+            except RangeNotSatisfiable as exc:
+                response = PlainTextResponse(status_code=416, headers={"Content-Range": f"*/{exc.max_size}"})
+                return await response(scope, receive, send)
+
+            if len(ranges) > 1:
+                # multipart/byteranges is rare for images, keep Starlette's implementation
+                return await super().__call__(scope, receive, send)
+
+            start, end = ranges[0]
+            status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end - 1}/{file_size}"
+            self.headers["content-length"] = str(end - start)
+
+        await send({"type": "http.response.start", "status": status_code, "headers": self.raw_headers})
+
+        if send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if status_code != 206 and "http.response.pathsend" in scope.get("extensions", {}):
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+            return
+
+        entry = await anyio.to_thread.run_sync(self.fd_cache.acquire, str(self.path), self.stat_result)
+        try:
+            more_body = True
+            while more_body:
+                chunk = await anyio.to_thread.run_sync(
+                    os.pread, entry.fd, min(self.chunk_size, end - start), start
+                )
+                start += len(chunk)
+                more_body = bool(chunk) and start < end
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        finally:
+            self.fd_cache.release(entry)
+
+
+class ImageFiles(StaticFiles):
+    """StaticFiles mount serving images through a shared FileDescriptorCache."""
+
+    def __init__(self, *, fd_cache: FileDescriptorCache, **kwargs):
+        super().__init__(**kwargs)
+        self.fd_cache = fd_cache
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+
+        response = ImageFileResponse(full_path, stat_result, self.fd_cache, status_code=status_code)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response